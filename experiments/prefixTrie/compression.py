@@ -3,6 +3,7 @@ import gc
 from pympler import asizeof
 from memory_profiler import profile
 from structures.prefix_trie import PrefixTrie, lz_compress
+from structures.lz_container import pack_lz78
 import os
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
@@ -30,7 +31,7 @@ def measure_time_on_dataset(dataset_path):
         compressed = lz_compress(trie, input_string)
         elapsed_time = time.time() - start_time
 
-        compressed_data.append(compressed)
+        compressed_data.append(pack_lz78(compressed))
         times.append(elapsed_time)
 
         trie_size = asizeof.asizeof(trie)
@@ -48,6 +49,9 @@ def process_datasets():
 
         total_time, compressed_data, times, memory_usage = measure_time_on_dataset(path)
         print(f"  Total time for compression: {total_time:.6f} seconds")
+        input_size = sum(len(line) for line in load_dataset(path))
+        compressed_size = sum(len(packed) for packed in compressed_data)
+        print(f"  Input size: {input_size} characters, packed token size: {compressed_size} bytes ({compressed_size / input_size:.3f} bytes per character)")
         print(f"  Average time per string: {sum(times)/len(times):.6f} seconds")
         print(f"  Average memory used per trie: {sum(memory_usage)/len(memory_usage) / 1024:.2f} KB")
         print(f"  Times per string (first 5 shown): {times[:5]} seconds")
@@ -0,0 +1,54 @@
+import time
+import io
+import contextlib
+from pympler import asizeof
+from structures.prefix_trie import PrefixTrie
+from structures.trie_store import DictNodeStore, ArrayNodeStore
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+dataset_paths = {
+    "small": os.path.join(ROOT_DIR, "datasets/searchPatterns/short_patterns.csv"),
+    "medium": os.path.join(ROOT_DIR, "datasets/searchPatterns/medium_patterns.csv"),
+    "large": os.path.join(ROOT_DIR, "datasets/searchPatterns/long_patterns.csv"),
+}
+
+stores = {
+    "dict": DictNodeStore,
+    "array": ArrayNodeStore,
+}
+
+
+def load_dataset(file_path):
+    """Loads a dataset from the specified file path."""
+    with open(file_path, "r") as file:
+        return [line.split(',') for line in file.read().splitlines()[1:]]
+
+def measure_time_on_dataset(dataset_path, store):
+    dataset = load_dataset(dataset_path)
+    times = []
+    memory_usage = []
+
+    for word, pattern in dataset:
+        start_time = time.time()
+        trie = PrefixTrie(store())
+        with contextlib.redirect_stdout(io.StringIO()):
+            trie.insert(word)
+        times.append(time.time() - start_time)
+
+        memory_usage.append(trie.store.nbytes if store is ArrayNodeStore else asizeof.asizeof(trie.store))
+
+    return sum(times), times, memory_usage
+
+def process_datasets():
+    for size, path in dataset_paths.items():
+        print(f"\nProcessing {size} dataset from '{path}'...")
+
+        for name, store in stores.items():
+            total_time, times, memory_usage = measure_time_on_dataset(path, store)
+            print(f"  [{name}] Total construction time: {total_time:.6f} seconds")
+            print(f"  [{name}] Average memory per trie: {sum(memory_usage)/len(memory_usage) / 1024:.2f} KB")
+
+if __name__ == "__main__":
+    process_datasets()
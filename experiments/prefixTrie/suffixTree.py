@@ -0,0 +1,57 @@
+import time
+import io
+import contextlib
+from structures.prefix_trie import PrefixTrie
+from structures.suffix_tree import SuffixTree
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+dataset_paths = {
+    "small": os.path.join(ROOT_DIR, "datasets/searchPatterns/short_patterns.csv"),
+    "medium": os.path.join(ROOT_DIR, "datasets/searchPatterns/medium_patterns.csv"),
+    "large": os.path.join(ROOT_DIR, "datasets/searchPatterns/long_patterns.csv"),
+}
+
+structures = {
+    "trie": PrefixTrie,
+    "suffix tree": SuffixTree,
+}
+
+
+def load_dataset(file_path):
+    """Loads a dataset from the specified file path."""
+    with open(file_path, "r") as file:
+        return [line.split(',') for line in file.read().splitlines()[1:]]
+
+def measure_time_on_dataset(dataset_path, structure):
+    dataset = load_dataset(dataset_path)
+    build_times = []
+    query_times = []
+    results = []
+
+    for word, pattern in dataset:
+        start_time = time.time()
+        tree = structure()
+        with contextlib.redirect_stdout(io.StringIO()):
+            tree.insert(word)
+        build_times.append(time.time() - start_time)
+
+        start_time = time.time()
+        results.append(tree.count_substring_occurrences(pattern))
+        query_times.append(time.time() - start_time)
+
+    return build_times, query_times, results
+
+def process_datasets():
+    for size, path in dataset_paths.items():
+        print(f"\nProcessing {size} dataset from '{path}'...")
+
+        for name, structure in structures.items():
+            build_times, query_times, results = measure_time_on_dataset(path, structure)
+            print(f"  [{name}] Total construction time: {sum(build_times):.6f} seconds")
+            print(f"  [{name}] Total count time: {sum(query_times):.6f} seconds")
+            print(f"  [{name}] Results (first 5 shown): {results[:5]}")
+
+if __name__ == "__main__":
+    process_datasets()
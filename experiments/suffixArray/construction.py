@@ -0,0 +1,76 @@
+import time
+import gc
+from structures.suffix_array import encode_text, suffix_array_doubling, suffix_array_sais
+from structures.parallel_suffix_array import suffix_array_parallel
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+dataset_paths = {
+    "small": os.path.join(ROOT_DIR, "datasets/compression/random_words_small.txt"),
+    "medium": os.path.join(ROOT_DIR, "datasets/compression/random_words_medium.txt"),
+    "large": os.path.join(ROOT_DIR, "datasets/compression/random_words_large.txt"),
+}
+
+builders = {
+    "doubling": suffix_array_doubling,
+    "sais": suffix_array_sais,
+    "parallel": suffix_array_parallel,
+}
+
+def load_dataset(file_path):
+    with open(file_path, "r") as file:
+        return file.read().splitlines()
+
+def measure_time_on_dataset(dataset_path, builder):
+    dataset = load_dataset(dataset_path)
+    times = []
+    suffix_arrays = []
+
+    for input_string in dataset:
+        codes = encode_text(input_string)
+
+        start_time = time.time()
+        sa = builder(codes)
+        elapsed_time = time.time() - start_time
+
+        suffix_arrays.append(sa)
+        times.append(elapsed_time)
+
+        gc.collect()
+
+    total_time = sum(times)
+    return total_time, suffix_arrays, times
+
+def measure_time_on_whole_file(dataset_path, builder):
+    with open(dataset_path, "r") as file:
+        codes = encode_text(file.read())
+
+    start_time = time.time()
+    builder(codes)
+    return len(codes), time.time() - start_time
+
+def process_datasets():
+    for size, path in dataset_paths.items():
+        print(f"\nProcessing {size} dataset from '{path}'...")
+
+        results = {}
+        for algorithm, builder in builders.items():
+            total_time, suffix_arrays, times = measure_time_on_dataset(path, builder)
+            results[algorithm] = suffix_arrays
+            print(f"  [{algorithm}] Total time for construction: {total_time:.6f} seconds")
+            print(f"  [{algorithm}] Average time per string: {sum(times)/len(times):.6f} seconds")
+            print(f"  [{algorithm}] Times per string (first 5 shown): {times[:5]} seconds")
+
+            length, whole_time = measure_time_on_whole_file(path, builder)
+            print(f"  [{algorithm}] Whole file ({length} characters): {whole_time:.6f} seconds")
+
+        identical = all(
+            (a == b).all()
+            for algorithm in builders
+            for a, b in zip(results["doubling"], results[algorithm])
+        )
+        print(f"  Suffix arrays identical across builders: {identical}")
+
+if __name__ == "__main__":
+    process_datasets()
@@ -0,0 +1,68 @@
+import time
+import gc
+from structures.suffix_array import SuffixArray
+from structures.fm_index import FMIndex
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+dataset_paths = {
+    "small": os.path.join(ROOT_DIR, "datasets/compression/random_words_small.txt"),
+    "medium": os.path.join(ROOT_DIR, "datasets/compression/random_words_medium.txt"),
+    "large": os.path.join(ROOT_DIR, "datasets/compression/random_words_large.txt"),
+}
+
+sample_rates = [8, 32, 128]
+pattern_length = 8
+pattern_count = 2000
+
+def load_dataset(file_path):
+    with open(file_path, "r") as file:
+        return file.read()
+
+def measure_time_on_dataset(dataset_path):
+    text = load_dataset(dataset_path)
+    step = max(1, (len(text) - pattern_length) // pattern_count)
+    patterns = [text[i:i + pattern_length] for i in range(0, len(text) - pattern_length, step)]
+
+    sa = SuffixArray(text)
+    sizes = {"suffix array": sa.suffix_array.nbytes + sa.lcp_array.nbytes + len(sa.data)}
+    times = {}
+
+    start_time = time.time()
+    expected = [sa.count_substring_occurrences(pattern) for pattern in patterns]
+    times["suffix array"] = (time.time() - start_time) / len(patterns)
+
+    for rate in sample_rates:
+        fm = FMIndex(sa, sample_rate=rate)
+        name = f"fm index (sample rate {rate})"
+        sizes[name] = fm.nbytes
+
+        start_time = time.time()
+        counts = [fm.count(pattern) for pattern in patterns]
+        times[name] = (time.time() - start_time) / len(patterns)
+
+        start_time = time.time()
+        for pattern in patterns[:100]:
+            fm.locate(pattern)
+        times[name + " locate"] = (time.time() - start_time) / 100
+
+        if counts != expected:
+            raise AssertionError("FM index counts differ from the suffix array.")
+        gc.collect()
+
+    return len(text), sizes, times
+
+def process_datasets():
+    for size, path in dataset_paths.items():
+        print(f"\nProcessing {size} dataset from '{path}'...")
+
+        length, sizes, times = measure_time_on_dataset(path)
+        print(f"  Text length: {length} characters")
+        for name, nbytes in sizes.items():
+            print(f"  [{name}] Index size: {nbytes / 1024:.2f} KB ({nbytes / length:.2f} bytes/char)")
+        for name, elapsed_time in times.items():
+            print(f"  [{name}] Average time per query: {elapsed_time:.8f} seconds")
+
+if __name__ == "__main__":
+    process_datasets()
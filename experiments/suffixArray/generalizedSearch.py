@@ -0,0 +1,54 @@
+import time
+import gc
+from structures.suffix_array import SuffixArray
+from structures.generalized_suffix_array import GeneralizedSuffixArray
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+dataset_paths = {
+    "small": os.path.join(ROOT_DIR, "datasets/searchPatterns/short_patterns.csv"),
+    "medium": os.path.join(ROOT_DIR, "datasets/searchPatterns/medium_patterns.csv"),
+    "large": os.path.join(ROOT_DIR, "datasets/searchPatterns/long_patterns.csv"),
+}
+
+def load_dataset(file_path):
+    with open(file_path, "r") as file:
+        return file.read().splitlines()
+
+def measure_time_on_dataset(dataset_path):
+    dataset = load_dataset(dataset_path)
+    rows = [dataset[i].split(',') for i in range(len(dataset) - 1)]
+    inputs = [input for input, _ in rows]
+    patterns = [pattern for _, pattern in rows]
+
+    # One SuffixArray per row, as in countOccurences.py
+    start_time = time.time()
+    per_row = [SuffixArray(input).count_substring_occurrences(pattern) for input, pattern in rows]
+    per_row_time = time.time() - start_time
+    gc.collect()
+
+    # One generalized suffix array for the whole file, queried in a single batch
+    start_time = time.time()
+    gsa = GeneralizedSuffixArray(inputs)
+    build_time = time.time() - start_time
+    start_time = time.time()
+    batched = gsa.count_in_documents(patterns, range(len(rows))).tolist()
+    query_time = time.time() - start_time
+
+    if batched != per_row:
+        raise AssertionError("Generalized suffix array counts differ from the per-row suffix arrays.")
+    return len(rows), per_row_time, build_time, query_time, batched
+
+def process_datasets():
+    for size, path in dataset_paths.items():
+        print(f"\nProcessing {size} dataset from '{path}'...")
+
+        rows, per_row_time, build_time, query_time, results = measure_time_on_dataset(path)
+        print(f"  [per row] Total time for {rows} rows: {per_row_time:.6f} seconds")
+        print(f"  [generalized] Construction time: {build_time:.6f} seconds")
+        print(f"  [generalized] Query time for {rows} rows: {query_time:.6f} seconds")
+        print(f"  Results (first 5 shown): {results[:5]}")
+
+if __name__ == "__main__":
+    process_datasets()
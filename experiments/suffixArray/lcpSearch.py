@@ -0,0 +1,52 @@
+import time
+import gc
+from structures.suffix_array import SuffixArray
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+dataset_paths = {
+    "large": os.path.join(ROOT_DIR, "datasets/searchPatterns/long_patterns.csv"),
+}
+
+repetitions = 100
+
+def load_dataset(file_path):
+    with open(file_path, "r") as file:
+        return file.read().splitlines()
+
+def measure_time_on_dataset(dataset_path):
+    dataset = load_dataset(dataset_path)
+    times = {"binary": [], "lcp": []}
+    results = []
+
+    for i in range(len(dataset) - 1):
+        input, pattern = dataset[i].split(',')
+        sa = SuffixArray(input)
+        # Build the lazy lookup tables of both modes before timing
+        sa.build_llcp_rlcp_arrays()
+        sa.count_substring_occurrences(pattern)
+
+        for mode in times:
+            start_time = time.time()
+            for _ in range(repetitions):
+                count = sa.count_substring_occurrences(pattern, use_lcp=mode == "lcp")
+            times[mode].append((time.time() - start_time) / repetitions)
+
+        results.append(count)
+        gc.collect()
+
+    return times, results
+
+def process_datasets():
+    for size, path in dataset_paths.items():
+        print(f"\nProcessing {size} dataset from '{path}'...")
+
+        times, results = measure_time_on_dataset(path)
+        for mode, mode_times in times.items():
+            print(f"  [{mode}] Total time for counting: {sum(mode_times):.6f} seconds")
+            print(f"  [{mode}] Average time per query: {sum(mode_times)/len(mode_times):.6f} seconds")
+        print(f"  Results (first 5 shown): {results[:5]}")
+
+if __name__ == "__main__":
+    process_datasets()
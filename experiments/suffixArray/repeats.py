@@ -0,0 +1,43 @@
+import time
+from structures.suffix_array import SuffixArray
+from structures.repeats import RepeatAnalysis
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+dataset_paths = {
+    "small": os.path.join(ROOT_DIR, "datasets/compression/random_words_small.txt"),
+    "medium": os.path.join(ROOT_DIR, "datasets/compression/random_words_medium.txt"),
+    "large": os.path.join(ROOT_DIR, "datasets/compression/random_words_large.txt"),
+}
+
+def load_dataset(file_path):
+    with open(file_path, "r") as file:
+        return file.read()
+
+def measure_time_on_dataset(dataset_path):
+    text = load_dataset(dataset_path)
+    suffix_array = SuffixArray(text)
+
+    start_time = time.time()
+    analysis = RepeatAnalysis(suffix_array)
+    stats = {
+        "distinct substrings": analysis.distinct_substring_count(),
+        "longest repeat": analysis.longest_repeated_substring(),
+        "top 5 (length >= 4)": analysis.top_k_frequent(5, min_length=4),
+        "maximal repeats": len(analysis.maximal_repeats()),
+        "supermaximal repeats": len(analysis.supermaximal_repeats()),
+    }
+    return len(text), time.time() - start_time, stats
+
+def process_datasets():
+    for size, path in dataset_paths.items():
+        print(f"\nProcessing {size} dataset from '{path}'...")
+
+        length, elapsed_time, stats = measure_time_on_dataset(path)
+        print(f"  Total time for repeat analysis of {length} characters: {elapsed_time:.6f} seconds")
+        for name, value in stats.items():
+            print(f"  {name}: {value}")
+
+if __name__ == "__main__":
+    process_datasets()
@@ -0,0 +1,158 @@
+import numpy as np
+
+METRICS = ("hamming", "edit")
+# Upper bound on the number of cells of one verification matrix (candidates x window)
+MAX_CELLS = 1 << 22
+
+
+def approximate_search(index, pattern, k, metric="hamming"):
+    """
+    Finds all occurrences of a pattern with at most k errors.
+    See approximate_search_many.
+    :param index: SuffixArray of the text.
+    :param pattern: The pattern (string, or bytes for a bytes text).
+    :param k: Maximum number of errors.
+    :param metric: "hamming" (substitutions only) or "edit" (substitutions, insertions, deletions).
+    :return: Numpy int64 array of starting positions, in increasing order.
+    """
+    return approximate_search_many(index, [pattern], k, metric)[0]
+
+
+def approximate_search_many(index, patterns, k, metric="hamming"):
+    """
+    Finds all occurrences of many patterns with at most k errors each.
+    Seeds: a pattern split into k + 1 pieces has at least one piece without errors in every
+    occurrence (pigeonhole), so the pieces of all patterns are searched exactly in one batch
+    (SuffixArray.search_many) and every hit is turned into a candidate start. Candidates are
+    verified vectorized: by counting mismatches for Hamming distance, or with a banded
+    Sellers dynamic program over the text around the seed for edit distance. When the seeds
+    are too short or too frequent to pay off, the whole text is verified instead.
+    - Hamming: position i is reported when text[i:i + m] has at most k mismatches.
+    - Edit: position i is reported when some text[i:j] is within edit distance k of the pattern.
+    :param index: SuffixArray of the text.
+    :param patterns: List of patterns.
+    :param k: Maximum number of errors (non-negative).
+    :param metric: "hamming" or "edit".
+    :return: List of numpy int64 arrays of starting positions, in increasing order.
+
+    Time Complexity: O(p m log n) for the seeds plus O(c m) (Hamming) or O(c m (m + k)) (edit)
+        for the verification of c candidates; O(n m) when falling back to a full scan.
+    Space Complexity: O(c + MAX_CELLS).
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}.")
+    if k < 0:
+        raise ValueError("k must be non-negative.")
+    patterns = list(patterns)
+    text = np.asarray(index.codes, dtype=np.int64)
+    n = len(text)
+
+    # Pieces of every pattern, with their offset inside the pattern
+    pieces, piece_owners, piece_offsets = [], [], []
+    for p, pattern in enumerate(patterns):
+        bounds = [len(pattern) * j // (k + 1) for j in range(k + 2)]
+        if bounds[1] > 0:
+            pieces.extend(pattern[a:b] for a, b in zip(bounds[:-1], bounds[1:]))
+            piece_owners.extend([p] * (k + 1))
+            piece_offsets.extend(bounds[:-1])
+    starts = np.zeros(0, dtype=np.int64)
+    owners = np.zeros(0, dtype=np.int64)
+    if pieces:
+        _, seed_offsets, seed_positions = index.search_many(pieces)
+        hits = np.diff(seed_offsets)
+        # Pieces are grouped by pattern, so the hits of pattern p form one contiguous block
+        owners = np.repeat(np.asarray(piece_owners, dtype=np.int64), hits)
+        starts = seed_positions.astype(np.int64) - np.repeat(np.asarray(piece_offsets, dtype=np.int64), hits)
+    blocks = np.searchsorted(owners, np.arange(len(patterns) + 1))
+
+    results = []
+    for p, pattern in enumerate(patterns):
+        codes = index.pattern_codes(pattern).astype(np.int64)
+        m = len(codes)
+        seeded = len(pattern) >= k + 1
+        candidates = np.unique(starts[blocks[p]:blocks[p + 1]])
+        if metric == "hamming":
+            if m > n:
+                results.append(np.zeros(0, dtype=np.int64))
+                continue
+            if not seeded or len(candidates) > n - m + 1:
+                candidates = np.arange(n - m + 1, dtype=np.int64)
+            candidates = candidates[(candidates >= 0) & (candidates <= n - m)]
+            results.append(verify_hamming(text, codes, candidates, k))
+        else:
+            if not seeded or len(candidates) * (m + 3 * k) > n:
+                found = verify_edit(text, codes, np.zeros(1, dtype=np.int64), n, k)
+            else:
+                # Occurrences anchored at candidate c start in [c - k, c + k] and end before c + m + 2k
+                found = verify_edit(text, codes, candidates - k, m + 3 * k, k)
+            results.append(found)
+    return results
+
+
+def verify_hamming(text, pattern, candidates, k):
+    """
+    Keeps the candidate starts where the text has at most k mismatches with the pattern.
+    :param text: Numpy int64 array of text codes.
+    :param pattern: Numpy int64 array of pattern codes.
+    :param candidates: Sorted numpy array of starts, 0 <= start <= n - m.
+    :param k: Maximum number of mismatches.
+    :return: Numpy int64 array of matching starts, in increasing order.
+    """
+    m = len(pattern)
+    if m == 0:
+        return candidates.astype(np.int64)
+    matches = []
+    step = max(1, MAX_CELLS // m)
+    for chunk in range(0, len(candidates), step):
+        starts = candidates[chunk:chunk + step]
+        windows = text[starts[:, None] + np.arange(m)]
+        mismatches = np.count_nonzero(windows != pattern, axis=1)
+        matches.append(starts[mismatches <= k])
+    return np.concatenate(matches) if matches else np.zeros(0, dtype=np.int64)
+
+
+def verify_edit(text, pattern, regions, width, k):
+    """
+    Finds the starts of approximate occurrences inside text windows [r, r + width).
+    The window and the pattern are reversed, so that the free end of an occurrence becomes the
+    free start of Sellers' algorithm: D[0][j] = 0 and
+    D[i][j] = min(D[i - 1][j - 1] + (P[i] != T[j]), D[i - 1][j] + 1, D[i][j - 1] + 1).
+    A row is computed for all windows at once; the left-to-right insertion term is a running
+    minimum of D[i][j'] - j' plus j. Columns past the end of the text restart the match.
+    :param text: Numpy int64 array of text codes.
+    :param pattern: Numpy int64 array of pattern codes.
+    :param regions: Numpy array of window starts (may be negative).
+    :param width: Window width.
+    :param k: Maximum edit distance.
+    :return: Numpy int64 array of distinct starts, in increasing order.
+    """
+    n, m = len(text), len(pattern)
+    if m <= k:
+        # The empty substring at every position is close enough
+        return np.arange(n + 1, dtype=np.int64)
+    reversed_pattern = pattern[::-1]
+    columns = np.arange(width + 1, dtype=np.int64)
+    found = []
+    step = max(1, MAX_CELLS // (width + 1))
+    for chunk in range(0, len(regions), step):
+        starts = regions[chunk:chunk + step]
+        # Reversed windows: column j holds text[start + width - j], -1 outside the text
+        positions = starts[:, None] + width - columns[None, 1:]
+        inside = (positions >= 0) & (positions < n)
+        window = np.where(inside, text[np.clip(positions, 0, max(n - 1, 0))], -1)
+        # Columns up to the last one past the end of the text, where a match may start afresh
+        restart = starts + width - n
+        fresh = columns[None, :] <= restart[:, None]
+
+        row = np.zeros((len(starts), width + 1), dtype=np.int64)
+        for i in range(1, m + 1):
+            best = np.empty_like(row)
+            best[:, 0] = i
+            best[:, 1:] = np.minimum(row[:, :-1] + (window != reversed_pattern[i - 1]), row[:, 1:] + 1)
+            row = np.minimum.accumulate(best - columns, axis=1) + columns
+            row[fresh] = i
+        # A match of the reversed pattern ending at column j starts at text position start + width - j
+        rows, cols = np.nonzero(row <= k)
+        begin = starts[rows] + width - cols
+        found.append(begin[(begin >= 0) & (begin < n)])
+    return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
@@ -0,0 +1,172 @@
+import numpy as np
+
+from structures.repeats import nearest_smaller
+from structures.suffix_array import SearchResult
+
+
+class EnhancedSuffixArray:
+    def __init__(self, suffix_array):
+        """
+        Suffix array with the child table of Abouelhoda, Kurtz and Ohlebusch, which lets the
+        LCP intervals be walked top-down like the nodes of a suffix tree.
+        Over L = lcp with L[0] = L[n] = -1, for every index i:
+        - up[i]: the first index q < i with L[q] > L[i] and L[k] >= L[q] on (q, i), i.e. the
+          leftmost q whose next smaller value is i.
+        - down[i]: the last index q > i with L[q] > L[i] and L[k] > L[q] on (i, q), i.e. the
+          last q with L[q] > L[i] whose previous smaller-or-equal value is i.
+        - next_l[i]: the next index with the same value and only larger values in between.
+        The l-indices of an interval [i..j] (the slots where its lcp value is reached) are the
+        first one, up[j + 1] or down[i], followed by the next_l chain; they split the
+        interval into its child intervals. All three arrays come from nearest smaller values.
+        :param suffix_array: SuffixArray instance (suffix_array, lcp_array and the encoded text are used).
+
+        Time Complexity: O(n) expected, in O(log n) vectorized rounds, where n is the text length.
+        Space Complexity: O(n), four int32 arrays of n + 1 entries (the padded LCP array and the table).
+        """
+        self.index = suffix_array
+        n = self.n = len(suffix_array.suffix_array)
+        dtype = np.int32 if n < 1 << 31 else np.int64
+        self.sa = np.asarray(suffix_array.suffix_array)
+        lcp = np.full(n + 1, -1, dtype=np.int64)
+        lcp[1:n] = suffix_array.lcp_array[1:]
+
+        positions = np.arange(n + 1)
+        self.up = np.full(n + 1, -1, dtype=dtype)
+        nsv = nearest_smaller(lcp, 1)
+        inside = nsv <= n
+        # np.unique keeps the first, i.e. leftmost, q of every next smaller value
+        targets, first = np.unique(nsv[inside], return_index=True)
+        self.up[targets] = positions[inside][first]
+
+        self.down = np.full(n + 1, -1, dtype=dtype)
+        psv = nearest_smaller(lcp, -1, strict=False)
+        chosen = np.flatnonzero((psv >= 0) & (lcp > lcp[np.maximum(psv, 0)]))
+        # Reversed, np.unique keeps the last q of every previous value
+        sources, last = np.unique(psv[chosen][::-1], return_index=True)
+        self.down[sources] = chosen[::-1][last]
+
+        self.next_l = np.full(n + 1, -1, dtype=dtype)
+        nsv = nearest_smaller(lcp, 1, strict=False)
+        chosen = np.flatnonzero((nsv <= n) & (lcp[np.minimum(nsv, n)] == lcp))
+        self.next_l[chosen] = nsv[chosen]
+        self.lcp = lcp.astype(dtype)
+
+    @property
+    def nbytes(self):
+        return self.lcp.nbytes + self.up.nbytes + self.down.nbytes + self.next_l.nbytes
+
+    @property
+    def root(self):
+        """The interval of all suffixes, as a half-open (left, right) pair."""
+        return 0, self.n
+
+    def first_l_index(self, i, j):
+        """
+        First l-index of the lcp interval [i..j] (inclusive bounds, i < j).
+        """
+        up = int(self.up[j + 1])
+        return up if i < up <= j else int(self.down[i])
+
+    def interval_lcp(self, left, right):
+        """
+        Length of the prefix shared by the suffixes of an interval.
+        :param left: First slot of the interval.
+        :param right: End of the interval (exclusive).
+        :return: The lcp value of the interval, or the suffix length for a single slot.
+
+        Time Complexity: O(1).
+        """
+        if right - left == 1:
+            return self.n - int(self.sa[left])
+        return int(self.lcp[self.first_l_index(left, right - 1)])
+
+    def child_intervals(self, left, right):
+        """
+        Enumerates the child intervals of an lcp interval (the children of a suffix tree node).
+        :param left: First slot of the interval.
+        :param right: End of the interval (exclusive).
+        :return: List of half-open (left, right) pairs in suffix order; empty for a single slot.
+
+        Time Complexity: O(number of children).
+        """
+        if right - left < 2:
+            return []
+        i, j = left, right - 1
+        bounds = [i]
+        l_index = self.first_l_index(i, j)
+        value = self.lcp[l_index]
+        while 0 < l_index <= j and self.lcp[l_index] == value:
+            bounds.append(l_index)
+            l_index = int(self.next_l[l_index])
+        bounds.append(right)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def child_interval(self, left, right, depth, code):
+        """
+        Finds the child interval whose suffixes have a given character at a given depth.
+        :param depth: The lcp value of the interval [left, right).
+        :param code: Character code (as in SuffixArray.codes).
+        :return: A half-open (left, right) pair, or None.
+
+        Time Complexity: O(|Σ|).
+        """
+        codes, sa, n = self.index.codes, self.sa, self.n
+        for child_left, child_right in self.child_intervals(left, right):
+            # A suffix of length depth is a child of its own and has no character there
+            start = int(sa[child_left]) + depth
+            if start < n and codes[start] == code:
+                return child_left, child_right
+        return None
+
+    def find_range(self, pattern):
+        """
+        Finds the block of suffixes starting with the pattern by walking down the child table.
+        At each interval, the pattern is compared with the text up to the interval's lcp value,
+        then the walk continues into the child that has the next pattern character.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: A tuple (left, right) such that sa[left:right] are the matching suffixes.
+
+        Time Complexity: O(m |Σ|), where m is the pattern length, independent of n.
+        Space Complexity: O(m).
+        """
+        index = self.index
+        key = index.encode_pattern(pattern)
+        if key is None or self.n == 0:
+            return 0, 0
+        width, data, m = index.width, index.buffer, len(key) // index.width
+        left, right = self.root
+        matched = 0
+        while True:
+            depth = self.interval_lcp(left, right)
+            top = min(depth, m)
+            start = width * (int(self.sa[left]) + matched)
+            if data[start:start + width * (top - matched)] != key[width * matched:width * top]:
+                return left, left
+            matched = top
+            if matched == m:
+                return left, right
+            if right - left == 1:
+                return left, left
+            code = int.from_bytes(key[width * matched:width * (matched + 1)], "big")
+            child = self.child_interval(left, right, depth, code)
+            if child is None:
+                return left, left
+            left, right = child
+
+    def count_substring_occurrences(self, pattern):
+        """
+        Counts the occurrences of a pattern with the top-down search.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: Number of occurrences (integer).
+        """
+        left, right = self.find_range(pattern)
+        return right - left
+
+    def pattern_search(self, pattern):
+        """
+        Searches for all occurrences of a pattern with the top-down search.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: SearchResult over the matching block of the suffix array.
+        """
+        left, right = self.find_range(pattern)
+        return SearchResult(self.sa[left:right])
@@ -0,0 +1,423 @@
+import codecs
+import json
+import mmap
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from structures.suffix_array import SuffixArray, _extend_match
+
+DEFAULT_MEMORY_LIMIT = 256 << 20
+# Doubling key of a suffix: (rank[i], rank[i + d]) as two int64 fields, compared field by field
+PAIR_KEY = np.dtype([("first", "<i8"), ("second", "<i8")])
+INT64_MAX = np.iinfo(np.int64).max
+# Bytes of working memory per record in flight: key pair and value, their sorted copies and the sort order
+RECORD_BYTES = 96
+# Characters decoded per step when converting the input file
+READ_CHUNK = 1 << 20
+# Vectorized comparison rounds of the LCP pass before switching to block comparisons
+BATCH_DEPTH = 32
+
+
+def build_external(input_path, output_path, memory_limit=DEFAULT_MEMORY_LIMIT, encoding=None, tmp_dir=None):
+    """
+    Builds the suffix and LCP arrays of a file too large for memory and writes them in the
+    format of SuffixArray.save, so that SuffixArray.open(output_path) can query them.
+    Construction is prefix doubling over disk: every array of size n is a memory-mapped file
+    and is only read or written sequentially in chunks, except for the text itself.
+    - Round 0 keys every suffix by its first k characters packed into one integer.
+    - Round d keys suffix i by the pair (rank[i], rank[i + d]) (see pair_key), where rank is
+      the first suffix array slot of the group of suffixes sharing the previous prefix. The
+      records (key, i) are
+      sorted with an external merge sort (sorted runs in a memory-mapped file, then a k-way
+      merge), the new ranks are read off in suffix order, and the records (i, rank) are sorted
+      back by position. Rounds stop when all keys differ.
+    - The LCP array follows from Phi/PLCP: Phi and the final ranks are permutations applied
+      with the same external sort, PLCP is computed in text order.
+    :param input_path: File to index.
+    :param output_path: Directory to write (created if missing).
+    :param memory_limit: Working memory in bytes, independent of the input size; sets the run
+        length of the external sort.
+    :param encoding: None to index the raw bytes, or the text encoding of the file (the index
+        then holds a str text, stored as in SuffixArray.encode).
+    :param tmp_dir: Directory for the temporary files (default: the system temporary directory).
+    :return: Number of characters indexed.
+
+    Time Complexity: O(n log n log m) character operations, where m is the longest repeat,
+        plus O(n log n) for the LCP pass on typical texts.
+    Space Complexity: O(memory_limit) in memory, O(n) on disk.
+    """
+    records = max(1 << 10, memory_limit // RECORD_BYTES)
+    os.makedirs(output_path, exist_ok=True)
+    header_path = os.path.join(output_path, "header.json")
+    if os.path.exists(header_path):
+        os.remove(header_path)
+
+    text_path = os.path.join(output_path, "text.bin")
+    n, width = convert_text(input_path, text_path, encoding)
+    index_dtype = np.int32 if n < 1 << 31 else np.int64
+    sa_file = np.lib.format.open_memmap(os.path.join(output_path, "suffix_array.npy"), mode="w+",
+                                        dtype=index_dtype, shape=(n,))
+    lcp_file = np.lib.format.open_memmap(os.path.join(output_path, "lcp_array.npy"), mode="w+",
+                                         dtype=index_dtype, shape=(n,))
+    if n:
+        workspace = tempfile.mkdtemp(dir=tmp_dir)
+        try:
+            with open(text_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                codes = np.frombuffer(buffer, dtype=np.uint8 if width == 1 else ">u4")
+                builder = ExternalBuilder(codes, workspace, records)
+                builder.build_suffix_array(sa_file)
+                builder.build_lcp_array(buffer, width, sa_file, lcp_file)
+                del codes, builder
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+    sa_file.flush()
+    lcp_file.flush()
+    del sa_file, lcp_file
+
+    header = {
+        "format": SuffixArray.FORMAT,
+        "version": SuffixArray.FORMAT_VERSION,
+        "kind": "bytes" if encoding is None else "str",
+        "width": width,
+        "algorithm": "external",
+        "length": n,
+    }
+    with open(header_path, "w") as file:
+        json.dump(header, file)
+    return n
+
+
+def convert_text(input_path, text_path, encoding):
+    """
+    Copies the input into text.bin with the layout of SuffixArray.encode, in chunks.
+    Bytes are copied as is. Decoded text is stored as Latin-1 when every character fits,
+    otherwise as big-endian UTF-32, which takes a first pass to find the largest code point.
+    :return: A tuple (length in characters, bytes per character).
+    """
+    if encoding is None:
+        shutil.copyfile(input_path, text_path)
+        return os.path.getsize(text_path), 1
+
+    def decoded_chunks():
+        decoder = codecs.getincrementaldecoder(encoding)()
+        with open(input_path, "rb") as file:
+            while True:
+                data = file.read(READ_CHUNK)
+                chunk = decoder.decode(data, final=not data)
+                if chunk:
+                    yield chunk
+                if not data:
+                    return
+
+    wide = any(max(chunk) > "\xff" for chunk in decoded_chunks())
+    width, target = (4, "utf-32-be") if wide else (1, "latin-1")
+    length = 0
+    with open(text_path, "wb") as file:
+        for chunk in decoded_chunks():
+            file.write(chunk.encode(target))
+            length += len(chunk)
+    return length, width
+
+
+class ExternalBuilder:
+    def __init__(self, codes, workspace, records):
+        """
+        Disk-backed state of the external construction.
+        :param codes: Text codes (numpy view over the memory-mapped text).
+        :param workspace: Directory for the temporary memory-mapped files.
+        :param records: Number of records held in memory at once.
+        """
+        self.codes = codes
+        self.n = len(codes)
+        self.workspace = workspace
+        self.records = records
+        self.files = 0
+        self._scratch = None
+
+    def array(self, dtype=np.int64):
+        """
+        Creates a temporary memory-mapped array of n values.
+        """
+        self.files += 1
+        path = os.path.join(self.workspace, f"array{self.files}.bin")
+        return np.memmap(path, dtype=dtype, mode="w+", shape=(self.n,))
+
+    def scratch(self):
+        """
+        Returns the pair of scratch arrays used by multi-pass merges, created on first use.
+        """
+        if self._scratch is None:
+            self._scratch = (self.array(PAIR_KEY), self.array())
+        return self._scratch
+
+    def chunks(self):
+        """
+        Yields the (start, end) bounds of the chunks of n records.
+        """
+        for start in range(0, self.n, self.records):
+            yield start, min(start + self.records, self.n)
+
+    def build_suffix_array(self, sa_file):
+        """
+        Runs the doubling rounds and writes the suffix array into sa_file.
+        Leaves self.rank, the rank (suffix array slot) of every position.
+        """
+        n = self.n
+        keys, values = self.array(PAIR_KEY), self.array()
+        sorted_keys, sorted_values = self.array(PAIR_KEY), self.array()
+        rank = self.rank = self.array()
+
+        d = self.pack_prefixes(keys, values)
+        while True:
+            external_sort(keys, values, sorted_keys, sorted_values, self)
+            # sorted_values is the current suffix order; relabel it with positions as keys
+            groups = self.assign_ranks(sorted_keys, sorted_values, keys, values)
+            if groups == n:
+                for start, end in self.chunks():
+                    sa_file[start:end] = sorted_values[start:end]
+            external_sort(keys, values, sorted_keys, sorted_values, self)
+            for start, end in self.chunks():
+                rank[start:end] = sorted_values[start:end]
+            if groups == n:
+                return
+
+            # Next keys: (rank[i], rank[i + d]), read sequentially
+            for start, end in self.chunks():
+                first = rank[start:end]
+                second = np.zeros(end - start, dtype=np.int64)
+                ahead = rank[min(start + d, n):min(end + d, n)]
+                second[:len(ahead)] = ahead + 1
+                keys[start:end] = pair_key(first, second)
+                values[start:end] = np.arange(start, end)
+            d *= 2
+
+    def pack_prefixes(self, keys, values):
+        """
+        Writes the round 0 records (first k characters packed, position); the packed prefix
+        is the first field of the key pair, the second one is 0.
+        Characters are mapped to code + 1 and positions past the end to 0.
+        :return: k, the number of packed characters.
+        """
+        n, codes = self.n, self.codes
+        largest = max(int(codes[start:end].max()) for start, end in self.chunks())
+        base = largest + 2
+        k = 1
+        while base ** (k + 1) < 1 << 62:
+            k += 1
+        for start, end in self.chunks():
+            window = np.zeros(end - start + k, dtype=np.int64)
+            tail = min(end + k, n)
+            window[:tail - start] = codes[start:tail].astype(np.int64) + 1
+            key = np.zeros(end - start, dtype=np.int64)
+            for j in range(k):
+                key = key * base + window[j:j + end - start]
+            keys[start:end] = pair_key(key, np.zeros(end - start, dtype=np.int64))
+            values[start:end] = np.arange(start, end)
+        return k
+
+    def assign_ranks(self, sorted_keys, sorted_values, keys, values):
+        """
+        Reads the sorted records in suffix order and writes the records (position, rank),
+        where the rank is the slot of the first suffix with the same key.
+        :return: Number of distinct keys.
+        """
+        previous_key, group_start, groups = None, 0, 0
+        for start, end in self.chunks():
+            key = np.asarray(sorted_keys[start:end])
+            head = np.empty(end - start, dtype=bool)
+            head[0] = previous_key is None or key[0] != previous_key
+            head[1:] = key[1:] != key[:-1]
+            slots = np.arange(start, end)
+            first = np.maximum.accumulate(np.where(head, slots, group_start))
+            keys[start:end] = pair_key(sorted_values[start:end], np.zeros(end - start, dtype=np.int64))
+            values[start:end] = first
+            previous_key, group_start = key[-1], first[-1]
+            groups += int(np.count_nonzero(head))
+        return groups
+
+    def build_lcp_array(self, buffer, width, sa_file, lcp_file):
+        """
+        Computes the LCP array with Phi/PLCP and writes it into lcp_file.
+        :param buffer: The memory-mapped text bytes.
+        :param width: Bytes per character.
+        """
+        n, codes, rank = self.n, self.codes, self.rank
+        keys, values = self.array(PAIR_KEY), self.array()
+        sorted_keys, sorted_values = self.array(PAIR_KEY), self.array()
+        zeros = np.zeros(min(self.records, n), dtype=np.int64)
+
+        # Phi[sa[r]] = sa[r - 1], sorted into text order
+        for start, end in self.chunks():
+            keys[start:end] = pair_key(sa_file[start:end], zeros[:end - start])
+            values[start:end] = np.concatenate((sa_file[start - 1:start] if start else [-1], sa_file[start:end - 1]))
+        external_sort(keys, values, sorted_keys, sorted_values, self)
+
+        # PLCP in text order; the records (rank, plcp) are then sorted into suffix order
+        previous, previous_h = -2, 0
+        for start, end in self.chunks():
+            phi = np.asarray(sorted_values[start:end])
+            positions = np.arange(start, end)
+            plcp = np.zeros(end - start, dtype=np.int64)
+            active = np.flatnonzero(phi >= 0)
+            h = 0
+            while active.size and h < BATCH_DEPTH:
+                i, j = positions[active] + h, phi[active] + h
+                inside = np.maximum(i, j) < n
+                match = inside & (codes[np.minimum(i, n - 1)] == codes[np.minimum(j, n - 1)])
+                plcp[active[~match]] = h
+                active = active[match]
+                h += 1
+            for a in active.tolist():
+                i = start + a
+                # Kasai: PLCP[i] >= PLCP[i - 1] - 1
+                h = max(BATCH_DEPTH, previous_h - 1) if previous == i - 1 else BATCH_DEPTH
+                plcp[a] = previous_h = _extend_match(buffer, i, int(phi[a]), h, n, width)
+                previous = i
+            keys[start:end] = pair_key(rank[start:end], zeros[:end - start])
+            values[start:end] = plcp
+        external_sort(keys, values, sorted_keys, sorted_values, self)
+        for start, end in self.chunks():
+            lcp_file[start:end] = sorted_values[start:end]
+
+
+def pair_key(first, second):
+    """
+    Builds doubling keys as records of two fields rather than a single rank[i] * (n + 1) +
+    rank[i + d] integer: ranks reach n, which may pass 2^32 here, and the packed key would then
+    overflow int64 (n above about 3e9). Structured arrays compare and searchsorted field by
+    field, like the pairs.
+    :param first: Numpy integer array, the major key (rank[i], or the packed prefix).
+    :param second: Numpy integer array of the same length, the minor key (rank[i + d] + 1, 0 past the end).
+    :return: Numpy array of PAIR_KEY records.
+    :raises OverflowError: If a value does not fit in int64.
+
+    Time Complexity: O(n).
+    Space Complexity: O(n), 16 bytes per key.
+    """
+    key = np.empty(len(first), dtype=PAIR_KEY)
+    key["first"] = as_int64(first)
+    key["second"] = as_int64(second)
+    return key
+
+
+def as_int64(values):
+    """
+    Converts an integer array to int64, failing instead of wrapping around.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "iu":
+        raise TypeError(f"Doubling keys must be integers, got {values.dtype}.")
+    if values.dtype.kind == "u" and values.dtype.itemsize == 8 and values.size and int(values.max()) > INT64_MAX:
+        raise OverflowError("Doubling key does not fit in int64.")
+    return values.astype(np.int64, copy=False)
+
+
+def sort_pair_keys(key):
+    """
+    Sorts PAIR_KEY records by their first field, then their second.
+    When every record provably packs into first * (s + 1) + second without overflow, where s
+    is the largest second value (always the case for a run of a text below about 3e9
+    characters), the packed integers are argsorted, which is several times faster than a
+    lexsort and gives the same order; otherwise the fields are lexsorted.
+    :param key: Numpy array of PAIR_KEY records.
+    :return: Numpy int64 array of indices.
+
+    Time Complexity: O(n log n).
+    Space Complexity: O(n).
+    """
+    first, second = key["first"], key["second"]
+    if not len(key):
+        return np.zeros(0, dtype=np.int64)
+    low = min(int(first.min()), int(second.min()))
+    high, radix = int(first.max()), int(second.max()) + 1
+    if low >= 0 and high <= (INT64_MAX - radix + 1) // radix:
+        return np.argsort(first * radix + second)
+    return np.lexsort((second, first))
+
+
+def external_sort(keys, values, sorted_keys, sorted_values, builder):
+    """
+    Sorts (key, value) records by key with an external merge sort. Keys are PAIR_KEY records,
+    ordered by their first field, then their second.
+    Runs of builder.records records are sorted in memory and written back in place, then
+    merged into the outputs, in several passes when there are too many runs to keep a useful
+    buffer per run. Equal keys may come out in any order.
+    :param keys: Memory-mapped PAIR_KEY keys (overwritten by the sorted runs).
+    :param values: Memory-mapped int64 values (overwritten by the sorted runs).
+    :param sorted_keys: Output memory-mapped array for the keys.
+    :param sorted_values: Output memory-mapped array for the values.
+    :param builder: ExternalBuilder providing the chunk size and temporary arrays.
+
+    Time Complexity: O(n log n) comparisons, O(n log_f(n / B)) sequential I/O for run length B
+        and merge fan-in f.
+    Space Complexity: O(B) in memory.
+    """
+    records, n = builder.records, builder.n
+    for start, end in builder.chunks():
+        key = np.asarray(keys[start:end])
+        order = sort_pair_keys(key)
+        keys[start:end] = key[order]
+        values[start:end] = np.asarray(values[start:end])[order]
+    runs = [(start, end) for start, end in builder.chunks()]
+
+    # At least 1024 records of buffer per run in a merge
+    fan_in = max(2, records // 1024)
+    source, spare = (keys, values), None
+    while len(runs) > fan_in:
+        # Intermediate passes alternate between the input arrays and a scratch pair
+        spare = spare or builder.scratch()
+        merged, position = [], 0
+        for group in range(0, len(runs), fan_in):
+            size = merge_runs(source, runs[group:group + fan_in], spare, position, records)
+            merged.append((position, position + size))
+            position += size
+        source, spare, runs = spare, source, merged
+    merge_runs(source, runs, (sorted_keys, sorted_values), 0, records)
+
+
+def merge_runs(source, runs, target, position, records):
+    """
+    Merges sorted runs of the source arrays into the target arrays from the given position.
+    Every step loads a buffer from each run, emits all the records not above the smallest
+    last buffered key among the runs that continue (they cannot be preceded by a record
+    still on disk), and advances each run past what it emitted.
+    :param source: Tuple (keys, values) of arrays holding the runs.
+    :param runs: List of (start, end) bounds of the sorted runs.
+    :param target: Tuple (keys, values) of output arrays.
+    :param position: First output index.
+    :param records: Number of records held in memory at once.
+    :return: Number of records written.
+    """
+    keys, values = source
+    out_keys, out_values = target
+    buffer = max(1, records // (len(runs) + 1))
+    cursors = [start for start, _ in runs]
+    written = 0
+    while True:
+        live = [r for r, (_, end) in enumerate(runs) if cursors[r] < end]
+        if not live:
+            return written
+        loaded = {r: np.asarray(keys[cursors[r]:min(cursors[r] + buffer, runs[r][1])]) for r in live}
+        continuing = [loaded[r][-1:] for r in live if cursors[r] + len(loaded[r]) < runs[r][1]]
+        bound = None
+        if continuing:
+            lasts = np.concatenate(continuing)
+            bound = lasts[sort_pair_keys(lasts)[0]]
+
+        pieces_keys, pieces_values = [], []
+        for r in live:
+            chunk, c = loaded[r], cursors[r]
+            take = len(chunk) if bound is None else int(np.searchsorted(chunk, bound, side="right"))
+            pieces_keys.append(chunk[:take])
+            pieces_values.append(np.asarray(values[c:c + take]))
+            cursors[r] = c + take
+
+        key = np.concatenate(pieces_keys)
+        order = sort_pair_keys(key)
+        end = position + written + len(key)
+        out_keys[position + written:end] = key[order]
+        out_values[position + written:end] = np.concatenate(pieces_values)[order]
+        written += len(key)
@@ -0,0 +1,342 @@
+import numpy as np
+
+from structures.suffix_array import SuffixArray
+
+# Number of set bits of every byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+# Characters per superblock of rank checkpoints: counts inside a superblock fit in 16 bits
+SUPERBLOCK_BITS = 16
+
+
+def popcount(words):
+    """
+    Counts the set bits of every 64-bit word.
+    :param words: Numpy uint64 array.
+    :return: Numpy int64 array.
+    """
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    return POPCOUNT[words.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class BitVector:
+    def __init__(self, bits):
+        """
+        Packed bit vector with constant-time rank.
+        Bits are stored in 64-bit words next to the number of set bits before every word.
+        :param bits: Numpy boolean array.
+        """
+        self.size = len(bits)
+        packed = np.packbits(np.asarray(bits, dtype=bool), bitorder="little")
+        padded = np.zeros((len(packed) + 8) // 8 * 8, dtype=np.uint8)
+        padded[:len(packed)] = packed
+        self.words = padded.view("<u8")
+        self.ranks = np.zeros(len(self.words) + 1, dtype=np.int64)
+        np.cumsum(popcount(self.words), out=self.ranks[1:])
+        self.ones = int(self.ranks[-1])
+
+    def rank1(self, i):
+        """
+        Counts the set bits before position i.
+        :param i: Position (0 <= i <= size).
+        :return: Number of set bits in [0, i).
+
+        Time Complexity: O(1).
+        Space Complexity: O(1).
+        """
+        word, bit = i >> 6, i & 63
+        return self.ranks.item(word) + bin(self.words.item(word) & ((1 << bit) - 1)).count("1")
+
+    def rank1_many(self, i):
+        """
+        Vectorized rank1.
+        :param i: Numpy array of positions.
+        :return: Numpy array with the number of set bits before each position.
+        """
+        word, bit = i >> 6, (i & 63).astype(np.uint64)
+        mask = (np.uint64(1) << bit) - np.uint64(1)
+        return self.ranks[word] + popcount(self.words[word] & mask)
+
+    def get_many(self, i):
+        """
+        Reads many bits at once.
+        :param i: Numpy array of positions.
+        :return: Numpy boolean array.
+        """
+        return ((self.words[i >> 6] >> (i & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes + self.ranks.nbytes
+
+
+class WaveletMatrix:
+    def __init__(self, values, sigma):
+        """
+        Wavelet matrix over a sequence of small integers, used as the rank structure of
+        large alphabets. Level l stores bit l (from the top) of every value, after the values
+        have been stably partitioned by the bits of the previous levels.
+        :param values: Numpy integer array with values in [0, sigma).
+        :param sigma: Alphabet size.
+
+        Time Complexity: O(n log sigma).
+        Space Complexity: O(n log sigma) bits.
+        """
+        self.size = len(values)
+        self.height = max(1, int(sigma - 1).bit_length())
+        self.levels = []
+        self.zeros = []
+        values = np.asarray(values, dtype=np.int64)
+        for level in range(self.height):
+            bits = (values >> (self.height - 1 - level)) & 1 == 1
+            self.levels.append(BitVector(bits))
+            self.zeros.append(self.size - int(bits.sum()))
+            values = np.concatenate((values[~bits], values[bits]))
+
+    def rank(self, c, i):
+        """
+        Counts the occurrences of value c before position i.
+        :param c: Value.
+        :param i: Position (0 <= i <= size).
+        :return: Number of occurrences of c in [0, i).
+
+        Time Complexity: O(log sigma).
+        Space Complexity: O(1).
+        """
+        start = 0
+        for level, bits in enumerate(self.levels):
+            if (c >> (self.height - 1 - level)) & 1:
+                start = self.zeros[level] + bits.rank1(start)
+                i = self.zeros[level] + bits.rank1(i)
+            else:
+                start -= bits.rank1(start)
+                i -= bits.rank1(i)
+        return i - start
+
+    def access_rank_many(self, i):
+        """
+        Reads the values at many positions together with their rank.
+        :param i: Numpy array of positions.
+        :return: A tuple (values, ranks), where ranks[k] is the number of occurrences of
+            values[k] before position i[k].
+        """
+        i = np.asarray(i, dtype=np.int64)
+        values = np.zeros(len(i), dtype=np.int64)
+        for level, bits in enumerate(self.levels):
+            bit = bits.get_many(i)
+            ones = bits.rank1_many(i)
+            values = (values << 1) | bit
+            i = np.where(bit, self.zeros[level] + ones, i - ones)
+        # i is now the position of the value among its equals, which start at the first
+        # position of their bucket on the last level
+        starts = np.zeros(len(values), dtype=np.int64)
+        for level, bits in enumerate(self.levels):
+            bit = (values >> (self.height - 1 - level)) & 1 == 1
+            ones = bits.rank1_many(starts)
+            starts = np.where(bit, self.zeros[level] + ones, starts - ones)
+        return values, i - starts
+
+    @property
+    def nbytes(self):
+        return sum(bits.nbytes for bits in self.levels)
+
+
+class FMIndex:
+    def __init__(self, suffix_array, sample_rate=32, block_size=64):
+        """
+        FM-index built from an existing suffix array: the Burrows-Wheeler transform of the text,
+        a rank structure over it and a sample of the suffix array.
+        - Alphabets of at most min(255, block_size - 1) characters keep the BWT as bytes with
+          rank checkpoints on two levels: uint16 counts every block_size characters, relative
+          to uint32 counts every 2^16 characters. They take about 2 sigma / block_size bytes
+          per character (at most 2), so larger alphabets use a wavelet matrix instead, which
+          takes about log2(sigma) / 4.
+        - Suffix array entries are kept for text positions that are multiples of sample_rate,
+          so locating an occurrence takes fewer than sample_rate LF steps.
+        The suffix array object is not referenced once the index is built.
+        :param suffix_array: A SuffixArray (or the text, which is indexed first).
+        :param sample_rate: Distance between sampled text positions (larger is smaller but slower).
+        :param block_size: Distance between rank checkpoints (larger is smaller but slower).
+
+        Time Complexity: O(n) on top of the suffix array (O(n log sigma) with a wavelet matrix).
+        Space Complexity: O(n) bytes for the BWT, O(sigma n / block_size) for the checkpoints and
+            O(n / sample_rate) for the samples (O(n log sigma) bits with a wavelet matrix).
+        """
+        if sample_rate < 1 or block_size < 1:
+            raise ValueError("sample_rate and block_size must be positive.")
+        if not isinstance(suffix_array, SuffixArray):
+            suffix_array = SuffixArray(suffix_array)
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.is_bytes = suffix_array.is_bytes
+
+        codes = suffix_array.codes
+        n = self.n = len(codes)
+        sa = np.empty(n + 1, dtype=np.int64)
+        sa[0] = n  # The sentinel suffix sorts first
+        sa[1:] = suffix_array.suffix_array
+
+        # Dense symbols: 0 is the sentinel, characters are numbered by their order
+        self.alphabet, symbols = np.unique(codes, return_inverse=True)
+        symbols = symbols.astype(np.int64).ravel() + 1
+        self.symbols = {int(code): s + 1 for s, code in enumerate(self.alphabet)}
+        sigma = len(self.alphabet) + 1
+
+        bwt = np.zeros(n + 1, dtype=np.int64)
+        has_previous = sa > 0
+        bwt[has_previous] = symbols[sa[has_previous] - 1]
+
+        self.C = np.zeros(sigma + 1, dtype=np.int64)
+        np.cumsum(np.bincount(bwt, minlength=sigma), out=self.C[1:])
+        self.C = self.C.tolist()
+
+        if sigma <= min(256, block_size):
+            self.bwt = bwt.astype(np.uint8).tobytes()
+            self.bwt_codes = np.frombuffer(self.bwt, dtype=np.uint8)
+            positions = np.arange(n + 1)
+            # superblocks[s, c]: occurrences of c in bwt[:s << SUPERBLOCK_BITS]
+            superblocks = self.prefix_counts(positions >> SUPERBLOCK_BITS, bwt, sigma)
+            self.superblocks = superblocks.astype(np.uint32 if n < 1 << 32 else np.uint64)
+            # block_counts[b, c]: occurrences of c in bwt[:b * block_size], from the start of its superblock
+            block_counts = self.prefix_counts(positions // block_size, bwt, sigma)
+            block_starts = np.minimum(np.arange(len(block_counts)) * block_size, n + 1)
+            block_counts -= superblocks[block_starts >> SUPERBLOCK_BITS]
+            self.block_counts = block_counts.astype(np.uint16)
+            self.wavelet = None
+        else:
+            self.bwt = self.bwt_codes = self.superblocks = self.block_counts = None
+            self.wavelet = WaveletMatrix(bwt, sigma)
+
+        # Rows whose suffix starts at a multiple of sample_rate, and their positions in row order
+        marked = sa % sample_rate == 0
+        self.marked = BitVector(marked)
+        self.samples = (sa[marked] // sample_rate).astype(np.uint32 if n // sample_rate < 1 << 32 else np.uint64)
+
+    @staticmethod
+    def prefix_counts(groups, bwt, sigma):
+        """
+        Counts every symbol before the start of every group of consecutive BWT rows.
+        :param groups: Non-decreasing numpy array, the group of every row.
+        :param bwt: Numpy array of dense symbols.
+        :param sigma: Alphabet size.
+        :return: Numpy int64 array counts[g, c], the occurrences of c before group g, for every
+            group up to the one after the last.
+        """
+        rows = int(groups[-1]) + 2
+        counts = np.bincount((groups + 1) * sigma + bwt, minlength=rows * sigma).reshape(rows, sigma)
+        return np.cumsum(counts, axis=0, out=counts)
+
+    def rank(self, c, i):
+        """
+        Counts the occurrences of symbol c in the first i characters of the BWT.
+        :param c: Dense symbol.
+        :param i: Row (0 <= i <= n + 1).
+        :return: Number of occurrences.
+
+        Time Complexity: O(block_size) with checkpoints (a single bytes.count), O(log sigma) otherwise.
+        Space Complexity: O(1).
+        """
+        if self.wavelet is not None:
+            return self.wavelet.rank(c, i)
+        start = i // self.block_size * self.block_size
+        return (self.superblocks.item(start >> SUPERBLOCK_BITS, c) + self.block_counts.item(start // self.block_size, c)
+                + self.bwt.count(c, start, i))
+
+    def lf_many(self, rows):
+        """
+        LF mapping of many rows: the row of the suffix starting one position earlier.
+        :param rows: Numpy array of rows whose suffix does not start at position 0.
+        :return: Numpy array of rows.
+        """
+        if self.wavelet is not None:
+            symbols, ranks = self.wavelet.access_rank_many(rows)
+            return np.asarray(self.C)[symbols] + ranks
+
+        symbols = self.bwt_codes[rows].astype(np.int64)
+        start = rows // self.block_size * self.block_size
+        window = start[:, None] + np.arange(self.block_size)
+        in_block = (window < rows[:, None]) & (self.bwt_codes[np.minimum(window, self.n)] == symbols[:, None])
+        ranks = (self.superblocks[start >> SUPERBLOCK_BITS, symbols].astype(np.int64)
+                 + self.block_counts[rows // self.block_size, symbols] + in_block.sum(axis=1))
+        return np.asarray(self.C)[symbols] + ranks
+
+    def find_range(self, pattern):
+        """
+        Finds the block of suffix array entries whose suffixes start with the pattern by backward search.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: A tuple (left, right), in the same suffix array coordinates as SuffixArray.find_range.
+
+        Time Complexity: O(m) rank queries, where m is the length of the pattern.
+        Space Complexity: O(1).
+        """
+        if isinstance(pattern, str) == self.is_bytes:
+            raise TypeError("Pattern and text must both be str or both be bytes.")
+        if not pattern:
+            return 0, self.n
+
+        symbols, C, rank = self.symbols, self.C, self.rank
+        low, high = 0, self.n + 1
+        for character in reversed(pattern):
+            c = symbols.get(character if self.is_bytes else ord(character))
+            if c is None:
+                return 0, 0
+            low, high = C[c] + rank(c, low), C[c] + rank(c, high)
+            if low >= high:
+                return 0, 0
+        # Row 0 is the sentinel suffix, which no non-empty pattern matches
+        return low - 1, high - 1
+
+    def count(self, pattern):
+        """
+        Counts the occurrences of a pattern.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: Number of occurrences.
+
+        Time Complexity: O(m), independent of the text length (O(m log sigma) with a wavelet matrix).
+        Space Complexity: O(1).
+        """
+        left, right = self.find_range(pattern)
+        return right - left
+
+    def locate(self, pattern):
+        """
+        Finds the starting positions of a pattern, walking every row of its block back to
+        the nearest sampled position. All rows are walked together.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: Numpy array of starting positions, in suffix array order.
+
+        Time Complexity: O(m + occ * sample_rate).
+        Space Complexity: O(occ).
+        """
+        left, right = self.find_range(pattern)
+        return self.locate_rows(np.arange(left + 1, right + 1, dtype=np.int64))
+
+    def locate_rows(self, rows):
+        """
+        Recovers the text positions of many BWT rows through the suffix array samples.
+        :param rows: Numpy array of rows (row i is suffix array entry i - 1).
+        :return: Numpy array of text positions.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        positions = np.empty(len(rows), dtype=np.int64)
+        pending = np.arange(len(rows))
+        current = rows.copy()
+        for steps in range(self.sample_rate):
+            marked = self.marked.get_many(current)
+            hit = pending[marked]
+            sample = self.samples[self.marked.rank1_many(current[marked])].astype(np.int64)
+            positions[hit] = sample * self.sample_rate + steps
+            pending, current = pending[~marked], current[~marked]
+            if not pending.size:
+                break
+            current = self.lf_many(current)
+        return positions
+
+    @property
+    def nbytes(self):
+        """
+        Size of the index arrays in bytes.
+        """
+        size = self.marked.nbytes + self.samples.nbytes + self.alphabet.nbytes
+        if self.wavelet is not None:
+            return size + self.wavelet.nbytes
+        return size + len(self.bwt) + self.superblocks.nbytes + self.block_counts.nbytes
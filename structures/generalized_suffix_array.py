@@ -0,0 +1,259 @@
+from collections import deque
+
+import numpy as np
+
+from structures.suffix_array import suffix_array_doubling, suffix_array_sais, lcp_array_phi, suffix_ranges_many
+
+
+class GeneralizedSuffixArray:
+    def __init__(self, documents, algorithm="doubling"):
+        """
+        Suffix array over a list of documents, built once for the whole collection.
+        Every document is followed by its own sentinel: document d ends with code d, and the
+        characters are shifted to D + code (D documents), so sentinels are distinct, sort below
+        every character and can never be part of a match. doc_id[i] is the document of suffix
+        array slot i and position[i] the offset of that suffix inside its document.
+        :param documents: List of documents (all strings or all bytes).
+        :param algorithm: "doubling" or "sais".
+
+        Time Complexity: O(N log^2 N) with doubling, O(N log N log r) with SA-IS, where N is the
+            total length and r the longest run of suffixes of the same type.
+        Space Complexity: O(N).
+        """
+        if algorithm not in ("doubling", "sais"):
+            raise ValueError(f"Unknown suffix array algorithm '{algorithm}', expected 'doubling' or 'sais'.")
+        self.documents = [bytes(d) if isinstance(d, (bytearray, memoryview)) else d for d in documents]
+        self.is_bytes = bool(self.documents) and isinstance(self.documents[0], bytes)
+        if any(isinstance(d, bytes) != self.is_bytes for d in self.documents):
+            raise TypeError("Documents must be all strings or all bytes.")
+        self.algorithm = algorithm
+
+        count = len(self.documents)
+        lengths = np.array([len(d) for d in self.documents], dtype=np.int64)
+        # starts[d] is the position of document d in the concatenation, sentinels included
+        self.starts = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(lengths + 1, out=self.starts[1:])
+
+        codes = np.empty(int(self.starts[-1]), dtype=np.int64)
+        if count:
+            codes[:] = self.character_codes(self.separator.join(self.documents) + self.separator) + count
+            codes[self.starts[1:] - 1] = np.arange(count)
+        self.codes = codes
+
+        build = suffix_array_sais if algorithm == "sais" else suffix_array_doubling
+        self.suffix_array = build(codes)
+        self.lcp_array = lcp_array_phi(codes, self.suffix_array)
+
+        document_of = np.repeat(np.arange(count, dtype=np.int32), lengths + 1)
+        self.doc_id = document_of[self.suffix_array]
+        self.position = (self.suffix_array - self.starts[self.doc_id]).astype(np.int32)
+
+    @property
+    def empty(self):
+        return b"" if self.is_bytes else ""
+
+    @property
+    def separator(self):
+        # Placeholder character of the sentinel slots, overwritten by the document's sentinel code
+        return b"\0" if self.is_bytes else "\0"
+
+    def character_codes(self, text):
+        """
+        Converts a text into character codes (byte values, or Unicode code points).
+        :param text: String or bytes, matching the documents.
+        :return: Numpy int64 array.
+        """
+        if isinstance(text, str) == self.is_bytes:
+            raise TypeError("Pattern and documents must both be str or both be bytes.")
+        if self.is_bytes:
+            return np.frombuffer(bytes(text), dtype=np.uint8).astype(np.int64)
+        return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+
+    def find_ranges(self, patterns):
+        """
+        Finds the suffix array block of many patterns in one vectorized search.
+        :param patterns: List of patterns.
+        :return: Numpy array of shape (k, 2) with the [left, right) block of each pattern.
+        """
+        patterns = list(patterns)
+        if not patterns:
+            return np.zeros((0, 2), dtype=np.int64)
+        lengths = np.array([len(p) for p in patterns], dtype=np.int64)
+        flat = self.character_codes(self.empty.join(patterns)) + len(self.documents)
+        starts = np.zeros(len(patterns), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+
+        ranges = suffix_ranges_many(self.codes, self.suffix_array, flat, starts, lengths)
+        # The empty pattern matches every character position but not the sentinels
+        ranges[lengths == 0] = (len(self.documents), len(self.codes))
+        return ranges
+
+    def find_range(self, pattern):
+        """
+        Finds the suffix array block whose suffixes start with the pattern.
+        :param pattern: The pattern (string or bytes).
+        :return: A tuple (left, right).
+
+        Time Complexity: O(m log N), where m is the length of the pattern.
+        Space Complexity: O(m).
+        """
+        left, right = self.find_ranges([pattern])[0]
+        return int(left), int(right)
+
+    def search(self, pattern):
+        """
+        Searches all documents with a single suffix array search.
+        :param pattern: The pattern (string or bytes).
+        :return: A tuple (counts, hits, document_frequency), where:
+            - counts (numpy array): the number of occurrences in each document.
+            - hits (dict): document index -> sorted list of starting positions in that document,
+              for every document containing the pattern.
+            - document_frequency (int): the number of documents containing the pattern.
+
+        Time Complexity: O(m log N + occ log occ).
+        Space Complexity: O(D + occ), where D is the number of documents.
+        """
+        left, right = self.find_range(pattern)
+        documents = self.doc_id[left:right]
+        counts = np.bincount(documents, minlength=len(self.documents))
+
+        order = np.lexsort((self.position[left:right], documents))
+        documents, positions = documents[order], self.position[left:right][order]
+        bounds = np.flatnonzero(np.diff(documents)) + 1
+        hits = {
+            int(group[0]): chunk.tolist()
+            for group, chunk in zip(np.split(documents, bounds), np.split(positions, bounds))
+            if group.size
+        }
+        return counts, hits, len(hits)
+
+    def document_counts(self, pattern):
+        """
+        Counts the occurrences of a pattern in every document.
+        :param pattern: The pattern (string or bytes).
+        :return: Numpy array with the number of occurrences in each document.
+        """
+        left, right = self.find_range(pattern)
+        return np.bincount(self.doc_id[left:right], minlength=len(self.documents))
+
+    def document_frequency(self, pattern):
+        """
+        Counts the documents that contain a pattern.
+        :param pattern: The pattern (string or bytes).
+        :return: Number of documents (integer).
+        """
+        return int(np.count_nonzero(self.document_counts(pattern)))
+
+    def count_substring_occurrences(self, pattern):
+        """
+        Counts the occurrences of a pattern over all documents.
+        :param pattern: The pattern (string or bytes).
+        :return: Number of occurrences (integer).
+        """
+        left, right = self.find_range(pattern)
+        return right - left
+
+    def count_in_documents(self, patterns, documents):
+        """
+        Counts pattern i in document documents[i] for many (pattern, document) pairs at once,
+        e.g. the rows of a search-pattern dataset indexed as one collection.
+        :param patterns: List of patterns.
+        :param documents: Document index of every pattern.
+        :return: Numpy array of counts.
+
+        Time Complexity: O(k m log N + occ), where occ is the total number of occurrences of the
+            patterns in all documents.
+        Space Complexity: O(k + occ).
+        """
+        ranges = self.find_ranges(patterns)
+        widths = ranges[:, 1] - ranges[:, 0]
+        # Concatenate the doc_id blocks of all patterns and compare them with their target
+        offsets = np.zeros(len(ranges) + 1, dtype=np.int64)
+        np.cumsum(widths, out=offsets[1:])
+        slots = np.repeat(ranges[:, 0] - offsets[:-1], widths) + np.arange(offsets[-1])
+        owner = np.repeat(np.arange(len(ranges)), widths)
+        matches = self.doc_id[slots] == np.asarray(documents, dtype=np.int64)[owner]
+        return np.bincount(owner[matches], minlength=len(ranges))
+
+    def longest_common_substring(self, q=None):
+        """
+        Finds the longest substring shared by at least q documents (by all of them by default).
+        A window of suffix array slots covering q documents shares a prefix as long as the minimum
+        LCP inside it. The windows are swept left to right, shrinking each one to the shortest
+        window that still covers q documents, with a monotonic deque giving the LCP minimum.
+        For q = 2 the best window is always two adjacent slots, which is checked vectorized.
+        :param q: Minimum number of documents (2 <= q <= D), defaults to all documents.
+        :return: The longest common substring (string or bytes); the first one in suffix order on ties.
+
+        Time Complexity: O(N), where N is the total length of the documents.
+        Space Complexity: O(N + D).
+        """
+        count = len(self.documents)
+        q = count if q is None else q
+        if count == 0:
+            return self.empty
+        if not 1 <= q <= count:
+            raise ValueError(f"q must be between 1 and the number of documents ({count}).")
+        if q == 1:
+            return max(self.documents, key=len)
+
+        doc_id, lcp = self.doc_id, self.lcp_array
+        # Slots 0..D-1 hold the sentinel suffixes, which match nothing
+        if q == 2:
+            candidates = np.where(doc_id[count + 1:] != doc_id[count:-1], lcp[count + 1:], 0)
+            if not candidates.size:
+                return self.empty
+            best = int(np.argmax(candidates))
+            return self.substring(count + best + 1, int(candidates[best]))
+
+        doc_id, lcp = doc_id.tolist(), lcp.tolist()
+        covered, counts = 0, [0] * count
+        minimum = deque()  # Slots i in (left, right] with increasing lcp[i]
+        left = count
+        best_length, best_slot = 0, count
+        for right in range(count, len(doc_id)):
+            d = doc_id[right]
+            counts[d] += 1
+            if counts[d] == 1:
+                covered += 1
+            if right > left:
+                while minimum and lcp[minimum[-1]] >= lcp[right]:
+                    minimum.pop()
+                minimum.append(right)
+
+            # Drop slots from the left while the window still covers q documents
+            while covered > q or counts[doc_id[left]] > 1:
+                counts[doc_id[left]] -= 1
+                if counts[doc_id[left]] == 0:
+                    covered -= 1
+                left += 1
+                while minimum and minimum[0] <= left:
+                    minimum.popleft()
+
+            if covered >= q and lcp[minimum[0]] > best_length:
+                best_length, best_slot = lcp[minimum[0]], right
+        return self.substring(best_slot, best_length)
+
+    def substring(self, slot, length):
+        """
+        Reads the first characters of the suffix at a suffix array slot.
+        :param slot: Suffix array slot.
+        :param length: Number of characters.
+        :return: The substring (string or bytes).
+        """
+        start = int(self.position[slot])
+        return self.documents[int(self.doc_id[slot])][start:start + length]
+
+
+def longest_common_substring(strings, q=None):
+    """
+    Finds the longest substring shared by at least q of the strings (by all of them by default),
+    using a single generalized suffix array. Any character is allowed in the strings.
+    :param strings: List of strings (or of bytes).
+    :param q: Minimum number of strings containing the substring.
+    :return: The longest common substring.
+
+    Time Complexity: O(N log^2 N) for the construction plus O(N) for the sweep, where N is the total length.
+    Space Complexity: O(N).
+    """
+    return GeneralizedSuffixArray(strings).longest_common_substring(q)
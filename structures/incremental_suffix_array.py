@@ -0,0 +1,277 @@
+from bisect import bisect_right
+
+import numpy as np
+
+from structures.suffix_array import SuffixArray, SearchResult
+
+
+class IncrementalSuffixArray:
+    def __init__(self, text="", algorithm="doubling", merge_factor=2):
+        """
+        Log-structured suffix array supporting appends and deletions without a full rebuild.
+        The text is split into segments, each indexed by its own SuffixArray (with a consistent
+        LCP array). Appended text becomes a new segment, and neighbouring segments are merged
+        whenever the older one is less than merge_factor times larger, so segment sizes grow
+        geometrically. Deletions only record the deleted range of a segment (a tombstone); the
+        segment is rebuilt once half of it is deleted. Queries are fanned out over the segments,
+        and matches crossing a segment or tombstone boundary are found by scanning the text
+        around that boundary.
+        :param text: Initial text (string or bytes).
+        :param algorithm: Suffix array construction algorithm of the segments.
+        :param merge_factor: Size ratio below which two neighbouring segments are merged.
+        """
+        if algorithm not in SuffixArray.ALGORITHMS:
+            raise ValueError(f"Unknown suffix array algorithm '{algorithm}', expected one of {SuffixArray.ALGORITHMS}.")
+        if merge_factor < 1:
+            raise ValueError("merge_factor must be at least 1.")
+        self.algorithm = algorithm
+        self.merge_factor = merge_factor
+        self.empty = text[:0] if isinstance(text, (str, bytes)) else bytes(text)[:0]
+        self.segments = []  # SuffixArray of every segment, in text order
+        self.deleted = []   # Sorted, disjoint deleted [start, end) ranges of every segment
+        self.update_runs()
+        if text:
+            self.insert(text)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def text(self):
+        """
+        The current text, with all deletions applied.
+        """
+        return self.window(0, self.length)
+
+    def update_runs(self):
+        """
+        Recomputes the runs: the maximal live pieces of the segments, in text order.
+        run_segment[r], run_local[r] and run_start[r] are the segment, the start inside it and
+        the start in the text of run r.
+        :return: None
+        """
+        self.run_segment, self.run_local, self.run_start = [], [], []
+        self.run_end = []
+        position = 0
+        for index, (segment, deleted) in enumerate(zip(self.segments, self.deleted)):
+            local = 0
+            for start, end in deleted + [(len(segment.text), len(segment.text))]:
+                if start > local:
+                    self.run_segment.append(index)
+                    self.run_local.append(local)
+                    self.run_start.append(position)
+                    position += start - local
+                    self.run_end.append(position)
+                local = end
+        self.length = position
+
+    def window(self, start, end):
+        """
+        Extracts text[start:end] from the runs.
+        :param start: Start position in the text.
+        :param end: End position in the text.
+        :return: The substring (string or bytes).
+        """
+        start, end = max(start, 0), min(end, self.length)
+        pieces = []
+        run = max(bisect_right(self.run_start, start) - 1, 0)
+        while start < end and run < len(self.run_start):
+            offset = self.run_local[run] - self.run_start[run]
+            stop = min(end, self.run_end[run])
+            pieces.append(self.segments[self.run_segment[run]].text[start + offset:stop + offset])
+            start = stop
+            run += 1
+        return self.empty.join(pieces)
+
+    def segment_text(self, index):
+        """
+        Live text of a segment, with its deleted ranges removed.
+        :param index: Segment index.
+        :return: The text (string or bytes).
+        """
+        text = self.segments[index].text
+        pieces, local = [], 0
+        for start, end in self.deleted[index]:
+            pieces.append(text[local:start])
+            local = end
+        pieces.append(text[local:])
+        return self.empty.join(pieces)
+
+    def insert(self, new_text):
+        """
+        Appends text as a new segment, then merges segments until their sizes decrease geometrically.
+        :param new_text: Text to append (same type as the text).
+        :return: None
+
+        Time Complexity: O(k log n) amortized construction work, where k is the length of the
+            appended text and n the length of the whole text.
+        Space Complexity: O(k) for the new segment.
+        """
+        new_text = bytes(new_text) if isinstance(new_text, (bytearray, memoryview)) else new_text
+        if not isinstance(new_text, type(self.empty)):
+            raise TypeError("Inserted text must have the same type as the text.")
+        if not new_text:
+            return
+        self.segments.append(SuffixArray(new_text, self.algorithm))
+        self.deleted.append([])
+        while len(self.segments) > 1 and self.live_size(-2) < self.merge_factor * self.live_size(-1):
+            merged = self.segment_text(-2) + self.segment_text(-1)
+            del self.segments[-2:], self.deleted[-2:]
+            self.segments.append(SuffixArray(merged, self.algorithm))
+            self.deleted.append([])
+        self.update_runs()
+
+    def delete(self, substring):
+        """
+        Deletes the first occurrence of a substring by recording tombstones on the segments it covers.
+        A segment is rebuilt from its live text once half of it is deleted.
+        :param substring: Substring to delete.
+        :return: True if the substring was found and deleted, False otherwise.
+
+        Time Complexity: O(m log n + occ) for the search, plus amortized O(m log n) rebuild work,
+            where m is the length of the substring.
+        Space Complexity: O(occ).
+        """
+        positions = self.positions(substring)
+        if not substring or not positions.size:
+            return False
+        start, end = int(positions[0]), int(positions[0]) + len(substring)
+
+        # Translate the deleted text range into the ranges of the runs it covers
+        run = bisect_right(self.run_start, start) - 1
+        touched = set()
+        while start < end:
+            index = self.run_segment[run]
+            offset = self.run_local[run] - self.run_start[run]
+            stop = min(end, self.run_end[run])
+            self.deleted[index] = merge_ranges(self.deleted[index], start + offset, stop + offset)
+            touched.add(index)
+            start = stop
+            run += 1
+
+        for index in sorted(touched, reverse=True):
+            if 2 * self.live_size(index) <= len(self.segments[index].text):
+                live = self.segment_text(index)
+                if live:
+                    self.segments[index] = SuffixArray(live, self.algorithm)
+                    self.deleted[index] = []
+                else:
+                    del self.segments[index], self.deleted[index]
+        self.update_runs()
+        return True
+
+    def live_size(self, index):
+        """
+        Number of characters of a segment that are not deleted.
+        :param index: Segment index.
+        :return: Integer.
+        """
+        return len(self.segments[index].text) - sum(end - start for start, end in self.deleted[index])
+
+    def positions(self, pattern):
+        """
+        Finds all starting positions of a pattern in the current text.
+        Matches inside a run come from the suffix array of its segment; matches crossing the
+        boundary between two runs are found by scanning the m - 1 characters on each side of it.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: Sorted numpy array of starting positions.
+
+        Time Complexity: O(s m log n + b m + occ), where s is the number of segments and b the
+            number of run boundaries.
+        Space Complexity: O(occ).
+        """
+        m = len(pattern)
+        if not m:
+            return np.arange(self.length, dtype=np.int64)
+
+        found = []
+        run_local = np.array(self.run_local, dtype=np.int64)
+        run_start = np.array(self.run_start, dtype=np.int64)
+        run_end = np.array(self.run_end, dtype=np.int64)
+        run_segment = np.array(self.run_segment, dtype=np.int64)
+        for index, segment in enumerate(self.segments):
+            left, right = segment.find_range(pattern)
+            if left == right:
+                continue
+            local = np.asarray(segment.suffix_array[left:right], dtype=np.int64)
+            runs = np.flatnonzero(run_segment == index)
+            # Run of every occurrence, kept only if the occurrence ends inside it
+            run = runs[np.maximum(np.searchsorted(run_local[runs], local, side="right") - 1, 0)]
+            logical = run_start[run] + local - run_local[run]
+            inside = (local >= run_local[run]) & (logical + m <= run_end[run])
+            found.append(logical[inside])
+
+        found.append(self.crossing_positions(pattern))
+        return np.sort(np.concatenate(found))
+
+    def crossing_positions(self, pattern):
+        """
+        Finds the occurrences of a pattern that cross at least one run boundary.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: Numpy array of starting positions, unordered.
+        """
+        m = len(pattern)
+        crossing = set()
+        for boundary in self.run_start[1:] if m > 1 else []:
+            start = max(boundary - m + 1, 0)
+            text = self.window(start, boundary + m - 1)
+            i = text.find(pattern)
+            while i != -1 and start + i < boundary:
+                crossing.add(start + i)
+                i = text.find(pattern, i + 1)
+        return np.fromiter(crossing, dtype=np.int64, count=len(crossing))
+
+    def pattern_search(self, pattern):
+        """
+        Searches for all occurrences of a pattern in the current text.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: SearchResult over the starting positions, in increasing order.
+        """
+        return SearchResult(self.positions(pattern))
+
+    def count_substring_occurrences(self, pattern):
+        """
+        Counts the occurrences of a pattern in the current text.
+        Without tombstones, the segments are counted from their suffix array ranges alone.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: Number of occurrences (integer).
+        """
+        if not pattern:
+            return self.length
+        if any(self.deleted):
+            return len(self.positions(pattern))
+        inside = sum(segment.count_substring_occurrences(pattern) for segment in self.segments)
+        return inside + len(self.crossing_positions(pattern))
+
+    def compact(self):
+        """
+        Merges all segments into a single SuffixArray and drops the tombstones.
+        :return: The SuffixArray of the whole text, with consistent suffix and LCP arrays.
+
+        Time Complexity: O(n log n), where n is the length of the text.
+        Space Complexity: O(n).
+        """
+        text = self.text
+        self.segments = [SuffixArray(text, self.algorithm)] if text else []
+        self.deleted = [[]] if text else []
+        self.update_runs()
+        return self.segments[0] if self.segments else SuffixArray(self.empty, self.algorithm)
+
+
+def merge_ranges(ranges, start, end):
+    """
+    Adds the range [start, end) to a sorted list of disjoint ranges, merging overlapping or adjacent ones.
+    :param ranges: Sorted list of disjoint (start, end) tuples.
+    :param start: Start of the new range.
+    :param end: End of the new range.
+    :return: New sorted list of disjoint ranges.
+    """
+    merged = []
+    for range_start, range_end in ranges:
+        if range_end < start or range_start > end:
+            merged.append((range_start, range_end))
+        else:
+            start, end = min(start, range_start), max(end, range_end)
+    merged.append((start, end))
+    merged.sort()
+    return merged
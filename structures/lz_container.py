@@ -0,0 +1,298 @@
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b"LZTK"
+VERSION = 1
+
+KIND_LZ77 = 1  # (offset, length, next character) tokens of SuffixArray.lz_compress
+KIND_LZ78 = 2  # (dictionary index, character) tokens of prefix_trie.lz_compress
+
+FLAG_BYTES = 1       # Literals are byte values rather than characters
+FLAG_OPEN_END = 2    # The last token has no literal (None for LZ77, "" for LZ78)
+
+# magic, version, kind, flags, reserved, token count, payload length, payload CRC32
+HEADER = struct.Struct("<4sBBBBQQI")
+# The header is followed by the CRC32 of its own bytes
+HEADER_SIZE = HEADER.size + 4
+
+
+def encode_varints(values):
+    """
+    Encodes non-negative integers as LEB128 varints (7 bits per byte, high bit set on all but the last byte).
+    :param values: Sequence or numpy array of non-negative integers below 2^64.
+    :return: The encoded bytes.
+
+    Time Complexity: O(n), vectorized, where n is the number of values.
+    Space Complexity: O(n).
+    """
+    values = np.asarray(values, dtype=np.uint64).ravel()
+    if values.size == 0:
+        return b""
+    # Number of 7-bit groups of every value
+    sizes = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        sizes += values >= np.uint64(1) << np.uint64(shift)
+
+    groups = np.arange(int(sizes.max()))
+    digits = (values[:, None] >> (groups * 7).astype(np.uint64)) & np.uint64(0x7F)
+    digits |= np.where(groups < sizes[:, None] - 1, 0x80, 0).astype(np.uint64)
+    return digits[groups < sizes[:, None]].astype(np.uint8).tobytes()
+
+
+def decode_varints(data):
+    """
+    Decodes a sequence of LEB128 varints.
+    :param data: Bytes holding whole varints only.
+    :return: Numpy uint64 array of the values.
+
+    Time Complexity: O(n), vectorized, where n is the number of bytes.
+    Space Complexity: O(n).
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    last = raw < 0x80
+    if not last[-1]:
+        raise ValueError("Truncated varint.")
+    ends = np.flatnonzero(last)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Index of every byte inside its varint
+    group = np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)
+    if group.max() > 9:
+        raise ValueError("Varint longer than 64 bits.")
+    digits = (raw & 0x7F).astype(np.uint64) << (group * 7).astype(np.uint64)
+    return np.bitwise_or.reduceat(digits, starts)
+
+
+def encode_fixed_width(values):
+    """
+    Bit-packs non-negative integers with the smallest common width (LSB first).
+    :param values: Sequence or numpy array of non-negative integers below 2^64.
+    :return: Bytes: the width in bits, followed by the packed values.
+
+    Time Complexity: O(n w), vectorized, where w is the width.
+    Space Complexity: O(n w).
+    """
+    values = np.asarray(values, dtype=np.uint64).ravel()
+    width = int(values.max()).bit_length() if values.size else 0
+    bits = (values[:, None] >> np.arange(width, dtype=np.uint64)) & np.uint64(1)
+    return bytes((width,)) + np.packbits(bits.astype(np.uint8).ravel(), bitorder="little").tobytes()
+
+
+def decode_fixed_width(data, count):
+    """
+    Decodes the output of encode_fixed_width.
+    :param data: Bytes.
+    :param count: Number of values.
+    :return: Numpy uint64 array.
+    """
+    width = data[0]
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=1), count=count * width, bitorder="little")
+    weights = np.uint64(1) << np.arange(width, dtype=np.uint64)
+    return (bits.reshape(count, width).astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+
+def encode_integers(values):
+    """
+    Encodes an integer column with varints or fixed-width bit-packing, whichever is smaller.
+    :param values: Sequence of non-negative integers.
+    :return: Bytes: a mode byte (0 varint, 1 fixed width) followed by the encoding.
+    """
+    varints = encode_varints(values)
+    fixed = encode_fixed_width(values)
+    return b"\x00" + varints if len(varints) <= len(fixed) else b"\x01" + fixed
+
+
+def decode_integers(data, count):
+    """
+    Decodes the output of encode_integers.
+    :param data: Bytes.
+    :param count: Number of values.
+    :return: List of integers.
+    """
+    if not data:
+        raise ValueError("Missing integer column.")
+    values = decode_varints(data[1:]) if data[0] == 0 else decode_fixed_width(data[1:], count)
+    return values.tolist()
+
+
+def pack_columns(columns):
+    """
+    Concatenates byte columns, each prefixed by its length as a varint.
+    :param columns: List of bytes.
+    :return: Bytes.
+    """
+    return b"".join(encode_varints([len(column)]) + column for column in columns)
+
+
+def unpack_columns(payload, count):
+    """
+    Splits the output of pack_columns.
+    :param payload: Bytes.
+    :param count: Number of columns.
+    :return: List of bytes.
+    """
+    columns, position = [], 0
+    for _ in range(count):
+        end = position
+        while end < len(payload) and payload[end] >= 0x80:
+            end += 1
+        size = int(decode_varints(payload[position:end + 1])[0])
+        position = end + 1
+        columns.append(payload[position:position + size])
+        if len(columns[-1]) != size:
+            raise ValueError("Truncated container payload.")
+        position += size
+    return columns
+
+
+def write_container(kind, flags, count, payload):
+    """
+    Prepends the header (with the payload CRC32) and the header CRC32 to a payload.
+    :return: Bytes.
+    """
+    header = HEADER.pack(MAGIC, VERSION, kind, flags, 0, count, len(payload), zlib.crc32(payload))
+    return header + struct.pack("<I", zlib.crc32(header)) + payload
+
+
+def read_container(data, kind):
+    """
+    Checks the header and both checksums of a container.
+    :param data: Bytes written by write_container.
+    :param kind: Expected kind (KIND_LZ77 or KIND_LZ78).
+    :return: A tuple (flags, count, payload).
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Data is too short to be an LZ token container.")
+    header = bytes(data[:HEADER.size])
+    magic, version, found_kind, flags, _, count, size, checksum = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Data is not an LZ token container.")
+    if struct.unpack("<I", data[HEADER.size:HEADER_SIZE])[0] != zlib.crc32(header):
+        raise ValueError("Container header checksum mismatch.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported container version {version}, expected {VERSION}.")
+    if found_kind != kind:
+        raise ValueError(f"Container holds token kind {found_kind}, expected {kind}.")
+    payload = bytes(data[HEADER_SIZE:HEADER_SIZE + size])
+    if len(payload) != size or zlib.crc32(payload) != checksum:
+        raise ValueError("Container payload checksum mismatch.")
+    return flags, count, payload
+
+
+def encode_literals(literals, flags):
+    """
+    Encodes the literal column: raw bytes for byte values, UTF-8 for characters.
+    """
+    if flags & FLAG_BYTES:
+        return bytes(literals)
+    return "".join(literals).encode("utf-8")
+
+
+def decode_literals(column, flags):
+    """
+    Decodes the literal column back to a list of byte values or characters.
+    """
+    return list(column) if flags & FLAG_BYTES else list(column.decode("utf-8"))
+
+
+def literal_flags(literals, open_end):
+    """
+    Computes the flags of a token stream from its literals.
+    """
+    flags = FLAG_OPEN_END if open_end else 0
+    if literals and not isinstance(literals[0], str):
+        flags |= FLAG_BYTES
+    if any(isinstance(literal, str) != (not flags & FLAG_BYTES) for literal in literals):
+        raise ValueError("Literals must be all characters or all byte values.")
+    return flags
+
+
+def pack_lz77(tokens):
+    """
+    Packs LZ77 tokens (offset, length, next character) into a binary container.
+    Offsets and lengths are stored as integer columns (varints or bit-packed), literals as raw bytes (byte texts) or UTF-8.
+    A next character of None is only allowed on the last token.
+    :param tokens: List of tuples, as returned by SuffixArray.lz_compress or lz_encode_stream.
+    :return: Bytes.
+
+    Time Complexity: O(z), vectorized apart from unzipping the tuples, where z is the number of tokens.
+    Space Complexity: O(z).
+    """
+    tokens = list(tokens)
+    offsets, lengths, literals = zip(*tokens) if tokens else ((), (), ())
+    literals = list(literals)
+    open_end = bool(literals) and literals[-1] is None
+    if open_end:
+        literals.pop()
+    if None in literals:
+        raise ValueError("Only the last LZ77 token may lack a next character.")
+    flags = literal_flags(literals, open_end)
+    payload = pack_columns([encode_integers(offsets), encode_integers(lengths), encode_literals(literals, flags)])
+    return write_container(KIND_LZ77, flags, len(tokens), payload)
+
+
+def unpack_lz77(data):
+    """
+    Unpacks a container written by pack_lz77.
+    :param data: Bytes.
+    :return: List of tuples (offset, length, next character), equal to the packed tokens.
+
+    Time Complexity: O(z), vectorized apart from building the tuples.
+    Space Complexity: O(z).
+    """
+    flags, count, payload = read_container(data, KIND_LZ77)
+    offsets, lengths, literals = unpack_columns(payload, 3)
+    offsets, lengths = decode_integers(offsets, count), decode_integers(lengths, count)
+    literals = decode_literals(literals, flags)
+    if flags & FLAG_OPEN_END:
+        literals.append(None)
+    if not len(offsets) == len(lengths) == len(literals) == count:
+        raise ValueError("Container columns do not match the token count.")
+    return list(zip(offsets, lengths, literals))
+
+
+def pack_lz78(tokens):
+    """
+    Packs LZ78 tokens (dictionary index, character) into a binary container.
+    Indices are stored as an integer column (varints or bit-packed), characters as UTF-8 (or raw bytes for byte values).
+    An empty character is only allowed on the last token.
+    :param tokens: List of tuples, as returned by prefix_trie.lz_compress.
+    :return: Bytes.
+
+    Time Complexity: O(z), vectorized apart from unzipping the tuples, where z is the number of tokens.
+    Space Complexity: O(z).
+    """
+    tokens = list(tokens)
+    indices, literals = zip(*tokens) if tokens else ((), ())
+    literals = list(literals)
+    open_end = bool(literals) and literals[-1] == ""
+    if open_end:
+        literals.pop()
+    if any(isinstance(literal, str) and len(literal) != 1 for literal in literals):
+        raise ValueError("LZ78 tokens must hold single characters, except an empty last one.")
+    flags = literal_flags(literals, open_end)
+    payload = pack_columns([encode_integers(indices), encode_literals(literals, flags)])
+    return write_container(KIND_LZ78, flags, len(tokens), payload)
+
+
+def unpack_lz78(data):
+    """
+    Unpacks a container written by pack_lz78.
+    :param data: Bytes.
+    :return: List of tuples (dictionary index, character), equal to the packed tokens.
+
+    Time Complexity: O(z), vectorized apart from building the tuples.
+    Space Complexity: O(z).
+    """
+    flags, count, payload = read_container(data, KIND_LZ78)
+    indices, literals = unpack_columns(payload, 2)
+    indices = decode_integers(indices, count)
+    literals = decode_literals(literals, flags)
+    if flags & FLAG_OPEN_END:
+        literals.append("")
+    if not len(indices) == len(literals) == count:
+        raise ValueError("Container columns do not match the token count.")
+    return list(zip(indices, literals))
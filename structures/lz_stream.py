@@ -0,0 +1,121 @@
+from structures.suffix_array import SuffixArray
+
+DEFAULT_WINDOW_SIZE = 1 << 16
+# Characters left unparsed at the end of the buffer, so that matches can continue into the next chunk
+MAX_LOOKAHEAD = 1024
+
+
+def read_up_to(file, size):
+    """
+    Reads up to size characters (or bytes), retrying short reads until the end of the file.
+    :param file: File object opened in text or binary mode.
+    :param size: Number of characters to read.
+    :return: The data read (string or bytes); shorter than size only at the end of the file.
+    """
+    data = file.read(size)
+    pieces = [data]
+    while data and size > sum(len(piece) for piece in pieces):
+        data = file.read(size - sum(len(piece) for piece in pieces))
+        pieces.append(data)
+    return pieces[0][:0].join(pieces)
+
+
+def lz_encode_stream(file, window_size=DEFAULT_WINDOW_SIZE, chunk_size=None, algorithm="doubling"):
+    """
+    Compresses a file with LZ77 in a bounded window, yielding tokens as the input is read.
+    The buffer holds at most window_size characters: up to window_size - chunk_size already
+    encoded characters (the history matches may refer to) followed by new input. Each time it
+    is refilled, the buffer is indexed with a SuffixArray and the new part is parsed greedily
+    with its LPF array (see SuffixArray.lz_compress), stopping min(chunk_size / 2, MAX_LOOKAHEAD)
+    characters before the end so that matches can continue into the next chunk.
+    The index is not maintained incrementally: every refill rebuilds it over the whole buffer,
+    so each character is indexed about window_size / chunk_size times (twice by default). An
+    IncrementalSuffixArray would index each chunk once, but it answers pattern queries, not
+    longest previous factors, and matches reaching into older segments would need one search
+    per position. A larger chunk_size means fewer rebuilds, but a shorter history.
+    :param file: File object opened in text or binary mode.
+    :param window_size: Maximum number of characters held in memory; also bounds the offsets.
+    :param chunk_size: Number of new characters read per step (default window_size / 2).
+    :param algorithm: Suffix array construction algorithm.
+    :return: Generator of tuples (offset, length, next character), as SuffixArray.lz_compress.
+
+    Time Complexity: O(n W/C log^2 W) with doubling, where n is the input length, W the window
+        size and C the chunk size.
+    Space Complexity: O(W), independent of the input length.
+    """
+    chunk_size = window_size // 2 if chunk_size is None else chunk_size
+    if not 2 <= chunk_size < window_size:
+        raise ValueError("chunk_size must be at least 2 and smaller than window_size.")
+    history = window_size - chunk_size
+    lookahead = min(chunk_size // 2, MAX_LOOKAHEAD)
+
+    buffer = read_up_to(file, window_size)
+    position = 0  # First character of the buffer not encoded yet
+    while position < len(buffer):
+        end_of_file = len(buffer) < window_size
+        limit = len(buffer) if end_of_file else len(buffer) - lookahead
+        lpf, previous = SuffixArray(buffer, algorithm).build_lpf_array()
+        lpf, previous = lpf.tolist(), previous.tolist()
+
+        while position < limit:
+            length = lpf[position]
+            if not end_of_file and position + length >= len(buffer):
+                # Keep the next character inside the buffer; the match continues in the next token
+                length = len(buffer) - 1 - position
+            end = position + length
+            yield (position - previous[position] if length else 0, length,
+                   buffer[end] if end < len(buffer) else None)
+            position = end + 1
+
+        if end_of_file:
+            break
+        # Keep the history the next matches may refer to, then refill the buffer
+        start = max(position - history, 0)
+        buffer, position = buffer[start:], position - start
+        buffer += read_up_to(file, window_size - len(buffer))
+
+
+def lz_decode_stream(tokens, file, window_size=DEFAULT_WINDOW_SIZE):
+    """
+    Decompresses LZ77 tokens into a file, keeping only the last window_size characters.
+    Copies are bulk slice copies; an overlapping copy (offset < length) repeats its source
+    slice. Output is written in blocks of about window_size characters.
+    :param tokens: Iterable of tuples (offset, length, next character).
+    :param file: File object opened in text mode (string tokens) or binary mode (byte tokens).
+    :param window_size: Window size used by the encoder (the largest possible offset).
+    :return: Number of characters written.
+
+    Time Complexity: O(n), where n is the length of the decompressed data.
+    Space Complexity: O(W), where W is the window size.
+    """
+    buffer = bytearray()
+    width = None  # Bytes per character in the buffer: 1 for bytes, 4 (UTF-32) for strings
+    written = total = 0
+
+    def decode(data):
+        return data.decode("utf-32-le") if width == 4 else bytes(data)
+
+    for offset, length, next_char in tokens:
+        if width is None:
+            width = 4 if isinstance(next_char, str) else 1
+        if length:
+            if offset > len(buffer) // width or offset <= 0:
+                raise ValueError(f"Token offset {offset} is outside the decoded window.")
+            start = len(buffer) - offset * width
+            if offset >= length:
+                buffer += buffer[start:start + length * width]
+            else:
+                source = buffer[start:]
+                buffer += (source * (length // offset + 1))[:length * width]
+        if next_char is not None:
+            buffer += next_char.encode("utf-32-le") if width == 4 else bytes((next_char,))
+        total += length + (next_char is not None)
+
+        if len(buffer) >= 2 * window_size * width:
+            file.write(decode(buffer[written:]))
+            del buffer[:len(buffer) - window_size * width]
+            written = len(buffer)
+
+    if width:
+        file.write(decode(buffer[written:]))
+    return total
@@ -0,0 +1,211 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Below this many characters the process start-up costs more than the sort, so the rounds run in-process
+PARALLEL_THRESHOLD = 1 << 16
+# Jobs per worker and round, so that a slow job does not leave the other workers idle
+JOBS_PER_WORKER = 4
+
+
+class SharedArrays:
+    def __init__(self, n, names=None):
+        """
+        The int64 arrays shared by the parent and the workers, one shared memory block each:
+        - sa: suffix array slots, sorted in place group by group.
+        - rank: slot of the first suffix of the group of every suffix (read during a round).
+        - new_rank: ranks written during a round, copied into rank once all jobs are done.
+        - key: packed first characters of every suffix (round 0 only).
+        - head: 1 where a slot starts a group of suffixes with the same prefix (stored as int64 too).
+        :param n: Number of suffixes.
+        :param names: Names of existing blocks to attach to, or None to create them.
+        """
+        self.n = n
+        self.blocks = {
+            field: shared_memory.SharedMemory(name=names[field]) if names else
+            shared_memory.SharedMemory(create=True, size=max(n, 1) * 8)
+            for field in ("sa", "rank", "new_rank", "key", "head")
+        }
+        for field, block in self.blocks.items():
+            setattr(self, field, np.ndarray(n, dtype=np.int64, buffer=block.buf))
+
+    @property
+    def names(self):
+        return {field: block.name for field, block in self.blocks.items()}
+
+    def close(self, unlink=False):
+        for field, block in self.blocks.items():
+            # The numpy views must go before the buffer they point into can be released
+            delattr(self, field)
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+def suffix_array_parallel(codes, workers=None):
+    """
+    Builds a suffix array by prefix doubling, with every round split across worker processes.
+    - Round 0 packs the first k characters of every suffix into one integer key, splits the key
+      range at sampled quantiles (sample sort) and sorts each bucket in a separate job.
+    - Round r > 0 only re-sorts the groups of suffixes whose 2^(r-1) k first characters are
+      still equal, keyed by (rank[i], rank[i + d]). A group is sorted by a single job, so the
+      jobs are independent; they are balanced by total group size.
+    A rank is the slot of the first suffix of its group, which a job can compute without
+    knowing the other jobs. The arrays live in multiprocessing.shared_memory blocks, so only
+    the group boundaries of each job are pickled.
+    :param codes: Numpy array of integer character codes.
+    :param workers: Number of worker processes (default os.cpu_count()).
+    :return: Suffix array (numpy array of int32), identical to suffix_array_doubling.
+
+    Time Complexity: O((n log^2 n) / p) per worker with p workers, plus O(n) per round in the parent.
+    Space Complexity: O(n), shared between the processes.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    shared = SharedArrays(n)
+    pool = ProcessPoolExecutor(workers) if workers > 1 and n >= PARALLEL_THRESHOLD else None
+    try:
+        jobs = max(1, workers * JOBS_PER_WORKER)
+        d = pack_prefixes(codes, shared.key)
+        starts, sizes = sample_buckets(shared, jobs)
+        run_round(pool, shared, 0, starts, sizes, jobs)
+
+        while True:
+            starts = np.flatnonzero(shared.head)
+            sizes = np.diff(np.append(starts, n))
+            unsorted = sizes > 1
+            if not unsorted.any():
+                break
+            run_round(pool, shared, d, starts[unsorted], sizes[unsorted], jobs)
+            d *= 2
+        return shared.sa.astype(np.int32)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        shared.close(unlink=True)
+
+
+def pack_prefixes(codes, key):
+    """
+    Packs the first k characters of every suffix into one integer, k as large as fits in 62 bits.
+    Characters are mapped to 1..sigma and positions past the end to 0.
+    :param codes: Numpy array of integer character codes.
+    :param key: Output int64 array of the same length.
+    :return: k, the number of packed characters.
+    """
+    n = len(codes)
+    dense = np.unique(codes, return_inverse=True)[1].astype(np.int64).reshape(n) + 1
+    base = int(dense.max()) + 1
+    k = 1
+    while base ** (k + 1) < 1 << 62:
+        k += 1
+    key[:] = 0
+    for j in range(k):
+        key *= base
+        if j < n:
+            key[:n - j] += dense[j:]
+    return k
+
+
+def sample_buckets(shared, jobs, sample_size=1 << 12):
+    """
+    Splits the packed keys into up to jobs key ranges at sampled quantiles and lays the
+    suffixes out bucket by bucket in shared.sa (in text order inside each bucket).
+    :return: A tuple (starts, sizes) of the non-empty buckets.
+    """
+    key, n = shared.key, shared.n
+    sample = np.sort(key[np.random.default_rng(0).integers(0, n, size=min(sample_size, n))])
+    splitters = np.unique(sample[len(sample) * np.arange(1, jobs) // jobs])
+    bucket = np.searchsorted(splitters, key, side="right").astype(np.uint16)
+    # Stable sort of small integers is a radix sort
+    shared.sa[:] = np.argsort(bucket, kind="stable")
+    sizes = np.bincount(bucket, minlength=len(splitters) + 1)
+    starts = np.concatenate(([0], np.cumsum(sizes[:-1])))
+    return starts[sizes > 0], sizes[sizes > 0]
+
+
+def run_round(pool, shared, d, starts, sizes, jobs):
+    """
+    Sorts the given groups of slots, split into balanced jobs, then publishes the new ranks.
+    :param d: Doubling offset of the second key, 0 for the packed-prefix round.
+    :param starts: First slot of every group to sort, ascending.
+    :param sizes: Size of every group.
+    """
+    # Cut the groups into jobs of about equal total size, never splitting a group
+    ends = np.cumsum(sizes)
+    cuts = np.searchsorted(ends, ends[-1] * np.arange(1, jobs) // jobs, side="right")
+    cuts = np.unique(np.concatenate(([0], cuts, [len(starts)])))
+    batches = [(starts[a:b], sizes[a:b]) for a, b in zip(cuts[:-1], cuts[1:]) if b > a]
+
+    names, n = shared.names, shared.n
+    calls = [(sort_groups, batches), (commit_ranks, batches)]
+    for function, arguments in calls:
+        tasks = [(names, n, d, group_starts, group_sizes) for group_starts, group_sizes in arguments]
+        if pool is None:
+            for task in tasks:
+                function(*task)
+        else:
+            # Consume the results to surface the exceptions of the workers
+            list(pool.map(function, *zip(*tasks)))
+
+
+def group_slots(starts, sizes):
+    """
+    Concatenates the slot ranges [start, start + size) of several groups.
+    """
+    offsets = np.cumsum(sizes) - sizes
+    return np.repeat(starts - offsets, sizes) + np.arange(int(sizes.sum()))
+
+
+def sort_groups(names, n, d, starts, sizes):
+    """
+    Worker job: sorts the suffixes of some groups by their next key and writes their new ranks
+    into new_rank and their group boundaries into head.
+    Groups are laid out by ascending rank, which is the major key, so one stable argsort over
+    the concatenated slots sorts each group in place. The packed key rank[i] * (n + 1) +
+    rank[i + d] + 1 stays below 2^62, since n < 2^31 (the int32 suffix array limit).
+    """
+    shared = SharedArrays(n, names)
+    try:
+        slots = group_slots(starts, sizes)
+        suffixes = shared.sa[slots]
+        if d == 0:
+            key = shared.key[suffixes]
+        else:
+            # Second key is the rank d positions ahead, 0 when the suffix is shorter than d
+            ahead = suffixes + d
+            inside = ahead < n
+            second = np.zeros(len(suffixes), dtype=np.int64)
+            second[inside] = shared.rank[ahead[inside]] + 1
+            key = shared.rank[suffixes] * (n + 1) + second
+        order = np.argsort(key, kind="stable")
+        suffixes, key = suffixes[order], key[order]
+        shared.sa[slots] = suffixes
+
+        head = np.ones(len(slots), dtype=bool)
+        head[1:] = key[1:] != key[:-1]
+        shared.head[slots] = head
+        # Slot of the first suffix of every run of equal keys
+        first = np.maximum.accumulate(np.where(head, np.arange(len(slots)), 0))
+        shared.new_rank[suffixes] = slots[first]
+    finally:
+        shared.close()
+
+
+def commit_ranks(names, n, d, starts, sizes):
+    """
+    Worker job: copies the new ranks of the suffixes of some groups into rank.
+    """
+    shared = SharedArrays(n, names)
+    try:
+        suffixes = shared.sa[group_slots(starts, sizes)]
+        shared.rank[suffixes] = shared.new_rank[suffixes]
+    finally:
+        shared.close()
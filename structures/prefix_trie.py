@@ -1,13 +1,27 @@
-class TrieNode:
-    def __init__(self):
-        self.children = {}      # Child nodes (dictionary of characters)
-        self.is_end = False     # Marks the end of a word
-        self.indices = []       # Store the indices of word occurrences
-        self.depth = 0          # Depth of the node (length of the substring it represents)
+from structures.trie_store import DictNodeStore, ArrayNodeStore, TrieNode, NodeView, NO_NODE, aggregate_counts
+from structures.trie_traversal import follow, match_length
 
 class PrefixTrie:
-    def __init__(self):
-        self.root = TrieNode()
+    def __init__(self, store=None):
+        """
+        Trie of all suffixes of the inserted words (reversed).
+        :param store: Node storage (see structures.trie_store): DictNodeStore (default), one object
+            per node, or ArrayNodeStore, flat arrays of 32 bytes and one bit per node.
+        Nodes are integer ids of the store; the root node is self.store.root.
+        """
+        self.store = DictNodeStore() if store is None else store
+        self.word_count = 0
+
+    @property
+    def root(self):
+        """
+        Read-only TrieNode-like view of the root (.children, .is_end, .indices, .depth).
+        root used to be the root TrieNode itself: code can still walk it through .children, but
+        not change the trie through it (assigning attributes or adding children raises). Nodes
+        are changed through self.store, and walks are faster on the node ids of self.store with
+        structures.trie_traversal (walk, follow, dfs, bfs) than through views.
+        """
+        return NodeView(self.store, self.store.root)
 
     def insert(self, word, index=None):
         """
@@ -16,131 +30,139 @@ class PrefixTrie:
         :param index: Optional, index of the word occurrence (int).
         :return: None
 
+        The counters of every node on the way are updated (see count_substring_occurrences).
+
         Time Complexity: O(n^2), where n is the length of the word.
         Space Complexity: O(n^2), for the additional nodes created in the trie.
         """
         word = word[::-1]  # Reverse the word before inserting
-        for i in range(len(word)):
-            suffix = word[i:]
-            node = self.root
-            for char in suffix:
-                if char not in node.children:
-                    node.children[char] = TrieNode()
-                node = node.children[char]
-                if index is not None:
-                    node.indices.append(index)
-            node.is_end = True
+        self.store.insert_suffixes(word, index, self.word_count)
+        self.word_count += 1
         print(f"Inserted all suffixes (inverted): '{word[::-1]}'")
 
-    def find_pattern(self, pattern):
+    def insert_many(self, words, indices=None):
         """
-        Checks if a pattern exists in the trie as a substring.
-        - Reverses the pattern and searches for it recursively in the trie.
-        - Traverses the trie to find matching paths.
-        :param pattern: Pattern to check (string).
-        :return: True if pattern exists, False otherwise.
+        Inserts many words, then computes the counters of the whole trie in a single pass
+        instead of updating them along the path of every suffix.
+        :param words: Iterable of words (strings).
+        :param indices: Optional list with the index of every word occurrence.
+        :return: None
 
-        Time Complexity: O(n * m), where n is the length of the pattern and m is the total number of nodes in the trie.
-        Space Complexity: O(n), for the recursion stack during the pattern match.
+        Time Complexity: O(n^2) for the nodes plus O(N + k log k) for the counters, where n is the
+            total length of the words, N the number of nodes and k the number of suffixes.
+        Space Complexity: O(N + k).
         """
-        pattern = pattern[::-1]
-
-        def _search_from_node(node, pattern, depth=0):
-            if depth == len(pattern):
-                return True
-
-            char = pattern[depth]
-            if char not in node.children:
-                return False
+        ends_by_word = []
+        for i, word in enumerate(words):
+            index = None if indices is None else indices[i]
+            ends_by_word.append(self.store.insert_suffixes(word[::-1], index))
+        aggregate_counts(self.store, ends_by_word)
+        self.word_count += len(ends_by_word)
+        print(f"Inserted all suffixes (inverted) of {len(ends_by_word)} words")
+
+    def copy_to(self, store):
+        """
+        Copies the trie into another node store (see NodeStore.copy_to), e.g. to keep a trie
+        built with the default DictNodeStore in a compact ArrayNodeStore.
+        :param store: Empty NodeStore.
+        :return: New PrefixTrie with the same nodes, flags, indices and counters.
 
-            return _search_from_node(node.children[char], pattern, depth + 1)
+        Time Complexity: O(N), where N is the number of nodes.
+        Space Complexity: O(N), for the new store.
+        """
+        trie = PrefixTrie(self.store.copy_to(store))
+        trie.word_count = self.word_count
+        return trie
 
-        def _traverse_and_match(node, pattern):
-            if _search_from_node(node, pattern):
-                return True
+    def locate(self, pattern):
+        """
+        Walks the reversed pattern down from the root.
+        :param pattern: Pattern (string).
+        :return: The node of the pattern, or NO_NODE if it does not exist.
 
-            for child in node.children.values():
-                if _traverse_and_match(child, pattern):
-                    return True
+        Time Complexity: O(m), where m is the length of the pattern.
+        """
+        return follow(self.store, reversed(pattern), self.store.root)
 
-            return False
+    def find_pattern(self, pattern):
+        """
+        Checks if a pattern exists in the trie as a substring.
+        Every suffix of the reversed words is inserted, so every substring is a prefix of one of
+        them: the reversed pattern exists if and only if it is a path from the root.
+        :param pattern: Pattern to check (string).
+        :return: True if pattern exists, False otherwise.
 
-        if _traverse_and_match(self.root, pattern):
-            print(f"Pattern '{pattern[::-1]}' exists as a substring.")
+        Time Complexity: O(m), where m is the length of the pattern.
+        Space Complexity: O(1).
+        """
+        if self.locate(pattern) != NO_NODE:
+            print(f"Pattern '{pattern}' exists as a substring.")
             return True
         else:
-            print(f"Pattern '{pattern[::-1]}' does not exist as a substring.")
+            print(f"Pattern '{pattern}' does not exist as a substring.")
             return False
 
     def find_longest_common_substring(self, word):
         """
         Finds the longest common substring between the trie and the given word.
-        Compares the suffixes of the reversed word against the trie.
+        Compares the suffixes of the reversed word against the trie: the longest prefix of each
+        one that is a path from the root.
         :param word: Word to compare with the trie (string).
         :return: Longest common substring (string).
 
         Time Complexity: O(n*m), where n is the length of the word and m is the maximum depth of the trie (length of the longest substring stored)
-        Space Complexity: O(m), for storing the current substring during traversal.
+        Space Complexity: O(n), for the current suffix.
         """
         word = word[::-1]  # Reverse the word to match the trie structure
-        longest_common_substring = ""
-        current_substring = []
-
-        def search(node, index):
-            nonlocal longest_common_substring
-            if index == len(word):
-                return
-
-            char = word[index]
-            if char in node.children:
-                current_substring.append(char)
-                search(node.children[char], index + 1)
-
-                if len(current_substring) > len(longest_common_substring):
-                    longest_common_substring = "".join(current_substring)
-
-                current_substring.pop()
+        best_start, best_length = 0, 0
 
         for i in range(len(word)):
-            search(self.root, i)
-
-        return longest_common_substring[::-1]
+            if len(word) - i <= best_length:
+                # No later suffix is long enough to do better
+                break
+            length = match_length(self.store, word[i:], self.store.root)
+            if length > best_length:
+                best_start, best_length = i, length
+
+        return word[best_start:best_start + best_length][::-1]
     
     def count_substring_occurrences(self, pattern):
         """
-        Counts the number of occurrences of a pattern in the string.
+        Counts the number of occurrences of a pattern in the string: the end nodes below the
+        pattern node, kept in its end count by insert.
+        :param pattern: Pattern to count (string).
+        :return: Number of occurrences (int).
+
+        Time Complexity: O(m), where m is the length of the pattern.
+        Space Complexity: O(1).
+        """
+        node = self.locate(pattern)
+        if node == NO_NODE:
+            # Pattern does not exist in the trie
+            return 0
+        return self.store.end_count(node)
+
+    def count_all_occurrences(self, pattern):
+        """
+        Counts the occurrences of a pattern in all the inserted words, repeated words included.
         :param pattern: Pattern to count (string).
         :return: Number of occurrences (int).
 
-        Time Complexity: O(n*m), where n is the length of the original word, and m the length of the pattern.
-        Space Complexity: O(m), for the recursion stack during the DFS.
+        Time Complexity: O(m), where m is the length of the pattern.
+        """
+        node = self.locate(pattern)
+        return 0 if node == NO_NODE else self.store.occurrence_count(node)
+
+    def count_words_containing(self, pattern):
+        """
+        Counts the inserted words that contain a pattern.
+        :param pattern: Pattern to count (string).
+        :return: Number of words (int).
+
+        Time Complexity: O(m), where m is the length of the pattern.
         """
-        pattern = pattern[::-1]  # Reverse the pattern to match the trie structure
-        total_count = 0
-        node = self.root
-
-        for depth, char in enumerate(pattern):
-            if char in node.children:
-                node = node.children[char]
-            else:
-                # Pattern does not exist in the trie
-                return 0
-
-        # Count occurrences from this node
-        def count_end_nodes(current_node):
-            """
-            Counts all end nodes (representing full occurrences) starting from the current node.
-            """
-            nonlocal total_count
-            if current_node.is_end:
-                total_count += 1
-            for child in current_node.children.values():
-                count_end_nodes(child)
-
-        # Start counting from the node where the pattern ends
-        count_end_nodes(node)
-        #print(f"Pattern '{pattern[::-1]}' occurs {total_count} time(s).")
-        return total_count
+        node = self.locate(pattern)
+        return 0 if node == NO_NODE else self.store.word_count(node)
     
 
 def lz_compress(trie, input_string):
@@ -152,30 +174,31 @@ def lz_compress(trie, input_string):
     :return: List of tuples (index, char).
     """
     compressed_data = [] 
-    node = trie.root 
+    store = trie.store
+    node = store.root 
     trie.next_index = 1 
     prefix_index = 0 
 
     print("Starting compression...")
     for char in input_string:
         print(f"Processing character: {char}")
-        if char in node.children:
-            node = node.children[char] 
-            prefix_index = node.depth
+        child = store.child(node, char)
+        if child != NO_NODE:
+            node = child
+            prefix_index = store.depth(node)
             print(f"Found existing prefix: (index={prefix_index})")
         else:
             print(f"New substring detected. Outputting ({prefix_index}, {char})")
             compressed_data.append((prefix_index, char))
 
             # Add a new node to the trie for the new substring (prefix + char)
-            new_node = TrieNode() 
-            node.children[char] = new_node  # Add it as a child of the current node
-            new_node.depth = trie.next_index  # Assign the next available index to the new node
+            new_node = store.add_child(node, char)  # Add it as a child of the current node
+            store.set_depth(new_node, trie.next_index)  # Assign the next available index to the new node
             print(f"Adding new node for substring '{char}' with index {trie.next_index}")
             trie.next_index += 1  # Increment the next index counter
 
             # Reset for the next iteration:
-            node = trie.root
+            node = store.root
             prefix_index = 0 
 
     if prefix_index > 0:
@@ -0,0 +1,217 @@
+import numpy as np
+
+from structures.rmq import RangeMinimumQuery
+
+
+class RepeatAnalysis:
+    def __init__(self, suffix_array):
+        """
+        Repeat statistics of a text, from the LCP intervals of its suffix array.
+        An LCP interval [left, right) of depth h is a maximal block of suffix array slots whose
+        suffixes share a prefix of length h (every lcp inside is >= h, one of them equals h).
+        The intervals are the internal nodes of the suffix tree: the prefix of length h occurs
+        exactly right - left times, and so does every substring whose locus is this node.
+        All intervals are found at once from the nearest smaller LCP values on both sides of
+        every slot, without building any suffix string.
+        :param suffix_array: SuffixArray instance (suffix_array, lcp_array and codes are used).
+
+        Time Complexity: O(n) expected, in O(log n) vectorized rounds, where n is the text length.
+        Space Complexity: O(n).
+        """
+        self.index = suffix_array
+        self.text = suffix_array.text
+        self.left, self.right, self.depth = lcp_intervals(suffix_array.lcp_array)
+
+    @property
+    def counts(self):
+        """Number of occurrences of the prefix of every interval."""
+        return self.right - self.left
+
+    def substring(self, slot, length):
+        """
+        Reads the first characters of the suffix at a suffix array slot.
+        :param slot: Suffix array slot.
+        :param length: Number of characters.
+        :return: The substring (string or bytes).
+        """
+        start = int(self.index.suffix_array[slot])
+        return self.text[start:start + length]
+
+    def distinct_substring_count(self):
+        """
+        Counts the distinct non-empty substrings: every suffix adds its length minus the
+        prefix it shares with the previous suffix in suffix order.
+        :return: Number of distinct substrings (integer).
+
+        Time Complexity: O(n).
+        Space Complexity: O(1).
+        """
+        n = len(self.index.suffix_array)
+        return n * (n + 1) // 2 - int(np.sum(self.index.lcp_array, dtype=np.int64))
+
+    def longest_repeated_substring(self):
+        """
+        Finds the longest substring occurring at least twice (occurrences may overlap).
+        :return: The substring (string or bytes), empty when no character repeats; the first one
+            in suffix order on ties.
+
+        Time Complexity: O(n).
+        Space Complexity: O(1).
+        """
+        lcp = self.index.lcp_array
+        if len(lcp) < 2:
+            return self.text[:0]
+        slot = int(np.argmax(lcp))
+        return self.substring(slot, int(lcp[slot]))
+
+    def top_k_frequent(self, k, min_length=1):
+        """
+        Finds the k most frequent repeated substrings of length >= min_length.
+        Substrings with the same occurrences are reported once, by the longest of them (the
+        prefix of depth h of their interval), so each result is a distinct suffix tree node.
+        :param k: Number of substrings.
+        :param min_length: Minimum substring length.
+        :return: List of tuples (substring, count), by decreasing count, then decreasing length,
+            then suffix order.
+
+        Time Complexity: O(n log n) for sorting the intervals.
+        Space Complexity: O(n).
+        """
+        if k < 0:
+            raise ValueError("k must be non-negative.")
+        chosen = np.flatnonzero(self.depth >= min_length)
+        counts, depth = self.counts[chosen], self.depth[chosen]
+        order = np.lexsort((self.left[chosen], -depth, -counts))[:k]
+        return [(self.substring(int(self.left[chosen[i]]), int(depth[i])), int(counts[i])) for i in order]
+
+    def preceding_codes(self):
+        """
+        Character code before every suffix in suffix array order (the BWT without the sentinel).
+        :return: Numpy int64 array, -1 - slot for the suffix starting at position 0, so it differs
+            from every other value.
+        """
+        sa = np.asarray(self.index.suffix_array, dtype=np.int64)
+        codes = np.asarray(self.index.codes, dtype=np.int64)
+        preceding = codes[sa - 1]
+        first = sa == 0
+        preceding[first] = -1 - np.flatnonzero(first)
+        return preceding
+
+    def left_maximal(self):
+        """
+        Marks the intervals whose occurrences are not all preceded by the same character.
+        :return: Numpy boolean array, one value per interval.
+        """
+        preceding = self.preceding_codes()
+        changes = np.zeros(len(preceding) + 1, dtype=np.int64)
+        np.cumsum(preceding[1:] != preceding[:-1], out=changes[2:])
+        # changes[x] counts the slots j < x with preceding[j] != preceding[j - 1]
+        return changes[self.right] - changes[self.left + 1] > 0
+
+    def maximal_repeats(self, min_length=1):
+        """
+        Finds the maximal repeats: repeated substrings that can be extended neither to the
+        right (their occurrences are followed by different characters, i.e. they are the prefix
+        of an LCP interval) nor to the left (not all preceded by the same character).
+        :param min_length: Minimum repeat length.
+        :return: List of tuples (substring, count) in suffix order.
+
+        Time Complexity: O(n) plus the length of the output.
+        Space Complexity: O(n).
+        """
+        chosen = np.flatnonzero((self.depth >= min_length) & self.left_maximal())
+        return self.report(chosen)
+
+    def supermaximal_repeats(self, min_length=1):
+        """
+        Finds the supermaximal repeats: maximal repeats that are not a substring of another
+        maximal repeat. Their intervals have no nested interval (all lcp values inside equal
+        the depth) and all their occurrences are preceded by pairwise different characters.
+        :param min_length: Minimum repeat length.
+        :return: List of tuples (substring, count) in suffix order.
+
+        Time Complexity: O(n log n) for the distinctness check, plus the length of the output.
+        Space Complexity: O(n).
+        """
+        lcp = np.asarray(self.index.lcp_array, dtype=np.int64)
+        if not len(self.depth):
+            return []
+        # Largest lcp inside every interval, through a minimum query on the negated values
+        top = int(lcp.max())
+        largest = top - RangeMinimumQuery(top - lcp).query_many(self.left + 1, self.right)
+        leaves = np.flatnonzero((largest == self.depth) & (self.depth >= min_length))
+
+        # Leaf intervals are disjoint, so their slots can be concatenated without repetition
+        sizes = self.counts[leaves]
+        owner = np.repeat(np.arange(len(leaves)), sizes)
+        slots = np.repeat(self.left[leaves] - (np.cumsum(sizes) - sizes), sizes) + np.arange(int(sizes.sum()))
+        preceding = self.preceding_codes()[slots]
+        order = np.lexsort((preceding, owner))
+        owner, preceding = owner[order], preceding[order]
+        repeated = (owner[1:] == owner[:-1]) & (preceding[1:] == preceding[:-1])
+        distinct = np.bincount(owner[1:][repeated], minlength=len(leaves)) == 0
+        return self.report(leaves[distinct])
+
+    def report(self, intervals):
+        """
+        Converts intervals into (substring, count) tuples.
+        :param intervals: Numpy array of interval indices.
+        :return: List of tuples.
+        """
+        return [
+            (self.substring(left, depth), right - left)
+            for left, right, depth in zip(self.left[intervals].tolist(), self.right[intervals].tolist(),
+                                          self.depth[intervals].tolist())
+        ]
+
+
+def nearest_smaller(values, step, strict=True):
+    """
+    Finds, for every index, the nearest index in one direction holding a smaller value.
+    Pointers are followed by pointer jumping: as long as an index points at a value it must
+    skip, it takes over the pointer of that index, which only skipped values it must skip too.
+    :param values: Numpy array of integers.
+    :param step: -1 for the previous smaller value, 1 for the next one.
+    :param strict: If False, find the nearest smaller or equal value instead.
+    :return: Numpy int64 array of indices, -1 (previous) or len(values) (next) when there is none.
+
+    Time Complexity: O(n) expected, in O(log n) vectorized rounds.
+    Space Complexity: O(n).
+    """
+    n = len(values)
+    # A sentinel below every value at both ends stops every pointer
+    padded = np.empty(n + 2, dtype=np.int64)
+    padded[1:-1] = values
+    padded[0] = padded[-1] = np.iinfo(np.int64).min
+    pointer = np.arange(n + 2, dtype=np.int64) + step
+    pointer[0], pointer[-1] = 0, n + 1
+
+    active = np.arange(1, n + 1)
+    own = padded[active]
+    while active.size:
+        target = padded[pointer[active]]
+        keep = target >= own if strict else target > own
+        active, own = active[keep], own[keep]
+        pointer[active] = pointer[pointer[active]]
+    return pointer[1:-1] - 1
+
+
+def lcp_intervals(lcp):
+    """
+    Enumerates the LCP intervals of positive depth (the internal suffix tree nodes except the root).
+    Slot i with lcp[i] = h > 0 lies in the interval of depth h that starts at the previous slot
+    with a smaller lcp and ends before the next one; slots sharing an interval give the same one.
+    :param lcp: LCP array, lcp[i] = lcp(sa[i - 1], sa[i]) and lcp[0] = 0.
+    :return: A tuple (left, right, depth) of numpy int64 arrays, sorted by left then depth.
+
+    Time Complexity: O(n) expected, plus O(k log k) to remove duplicates, where k <= n.
+    Space Complexity: O(n).
+    """
+    lcp = np.asarray(lcp, dtype=np.int64)
+    slots = np.flatnonzero(lcp > 0)
+    left = nearest_smaller(lcp, -1)[slots]
+    right = nearest_smaller(lcp, 1)[slots]
+    depth = lcp[slots]
+    # left and depth are below n < 2^31, so the packed key stays below 2^62
+    _, unique = np.unique(left * (int(lcp.max(initial=0)) + 1) + depth, return_index=True)
+    return left[unique], right[unique], depth[unique]
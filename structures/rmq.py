@@ -0,0 +1,132 @@
+import numpy as np
+
+
+class RangeMinimumQuery:
+    def __init__(self, values, block_size=16):
+        """
+        Range minimum queries in O(1) with a block-decomposed sparse table.
+        - Ranges shorter than 2 * block_size are answered from a sparse table truncated to
+          log2(block_size) + 1 levels (two overlapping power-of-two windows).
+        - Longer ranges are split into the suffix of the first block, the prefix of the last
+          block (both precomputed) and the full blocks in between, answered from a sparse table
+          over the block minima.
+        Values are stored in the smallest unsigned type that holds them, so an LCP array
+        typically takes one or two bytes per entry and level.
+        :param values: Numpy array of non-negative integers.
+        :param block_size: Power of two, at least 2.
+
+        Time Complexity: O(n log b) to build, where b is the block size.
+        Space Complexity: O(n log b + (n / b) log(n / b)).
+        """
+        if block_size < 2 or block_size & (block_size - 1):
+            raise ValueError("block_size must be a power of two, at least 2.")
+        values = np.asarray(values)
+        n = self.n = len(values)
+        self.block_size = block_size
+        self.block_bits = block_size.bit_length() - 1
+
+        largest = int(values.max()) if n else 0
+        if n and int(values.min()) < 0:
+            raise ValueError("RangeMinimumQuery expects non-negative values.")
+        dtype = next(t for t in (np.uint8, np.uint16, np.uint32, np.uint64) if largest < np.iinfo(t).max)
+        fill = np.iinfo(dtype).max
+
+        # short[k, i] = min(values[i:i + 2^k]) for k <= log2(block_size)
+        self.short = np.full((self.block_bits + 1, n), fill, dtype=dtype)
+        self.short[0] = values
+        for k in range(1, self.block_bits + 1):
+            half = 1 << (k - 1)
+            if half >= n:
+                break
+            self.short[k, :n - half] = np.minimum(self.short[k - 1, :n - half], self.short[k - 1, half:])
+
+        blocks = -(-n // block_size)
+        padded = np.full(blocks * block_size, fill, dtype=dtype)
+        padded[:n] = values
+        padded = padded.reshape(blocks, block_size)
+        self.prefix = np.minimum.accumulate(padded, axis=1).ravel()[:n]
+        self.suffix = np.minimum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()[:n]
+
+        # top[k, b] = min of the values in blocks b .. b + 2^k - 1
+        top_levels = max(1, blocks.bit_length())
+        self.top = np.full((top_levels, blocks), fill, dtype=dtype)
+        self.top[0] = padded.min(axis=1) if blocks else self.top[0]
+        for k in range(1, top_levels):
+            half = 1 << (k - 1)
+            if half >= blocks:
+                break
+            self.top[k, :blocks - half] = np.minimum(self.top[k - 1, :blocks - half], self.top[k - 1, half:])
+
+    def query(self, left, right):
+        """
+        Minimum of values[left:right].
+        :param left: Start of the range.
+        :param right: End of the range (exclusive), left < right <= n.
+        :return: The minimum (integer).
+
+        Time Complexity: O(1).
+        Space Complexity: O(1).
+        """
+        length = right - left
+        if length <= 0 or left < 0 or right > self.n:
+            raise IndexError(f"Invalid range [{left}, {right}) for {self.n} values.")
+        if length < 2 * self.block_size:
+            k = length.bit_length() - 1
+            return min(self.short.item(k, left), self.short.item(k, right - (1 << k)))
+
+        first, last = left >> self.block_bits, (right - 1) >> self.block_bits
+        edges = min(self.suffix.item(left), self.prefix.item(right - 1))
+        if last - first == 1:
+            return edges
+        k = (last - first - 1).bit_length() - 1
+        return min(edges, self.top.item(k, first + 1), self.top.item(k, last - (1 << k)))
+
+    def query_many(self, left, right):
+        """
+        Vectorized query: minimum of values[left[i]:right[i]] for every i.
+        :param left: Numpy array of range starts.
+        :param right: Numpy array of range ends (exclusive), left < right.
+        :return: Numpy int64 array of minima.
+
+        Time Complexity: O(1) per range, vectorized.
+        Space Complexity: O(k), where k is the number of ranges.
+        """
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        length = right - left
+        if length.size and (length.min() <= 0 or left.min() < 0 or right.max() > self.n):
+            raise IndexError(f"Invalid range for {self.n} values.")
+        result = np.empty(len(left), dtype=np.int64)
+
+        short = length < 2 * self.block_size
+        l, r, m = left[short], right[short], length[short]
+        k = floor_log2(m)
+        # Flat indices into the level-major table are cheaper to gather than 2-D ones
+        table, row = self.short.ravel(), k * self.n
+        result[short] = np.minimum(table[row + l], table[row + r - (1 << k)])
+
+        long = ~short
+        l, r = left[long], right[long]
+        first, last = l >> self.block_bits, (r - 1) >> self.block_bits
+        # Blocks strictly between the first and the last one; there may be none
+        blocks = np.maximum(last - first - 1, 1)
+        k = floor_log2(blocks)
+        edges = np.minimum(self.suffix[l], self.prefix[r - 1])
+        table, row = self.top.ravel(), k * self.top.shape[1] + first + 1
+        middle = np.minimum(table[row], table[row + blocks - (1 << k)])
+        result[long] = np.where(last - first > 1, np.minimum(edges, middle), edges)
+        return result
+
+    @property
+    def nbytes(self):
+        return self.short.nbytes + self.prefix.nbytes + self.suffix.nbytes + self.top.nbytes
+
+
+def floor_log2(values):
+    """
+    Vectorized floor(log2(v)) for positive integers.
+    :param values: Numpy array of positive integers.
+    :return: Numpy int64 array.
+    """
+    # The binary exponent of the float is exact for values below 2^53
+    return np.frexp(np.asarray(values, dtype=np.float64))[1].astype(np.int64) - 1
@@ -1,12 +1,73 @@
+import json
+import mmap as mmap_module
+import os
+from functools import partial
+
 import numpy as np
-from bisect import bisect_left, bisect_right
+
+from structures.parallel_suffix_array import suffix_array_parallel
+from structures.rmq import RangeMinimumQuery
 
 class SuffixArray:
-    def __init__(self, text):
+    ALGORITHMS = ("doubling", "sais", "radix", "parallel")
+    LZ_METHODS = ("search", "lpf")
+    FORMAT = "suffix-array"
+    FORMAT_VERSION = 1
+
+    def __init__(self, text, algorithm="doubling"):
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown suffix array algorithm '{algorithm}', expected one of {self.ALGORITHMS}.")
+        self.algorithm = algorithm
         self.original_text = text
-        self.text = text
-        self.suffix_array = self.build_suffix_array(self.text)
-        self.lcp_array = self.build_lcp_array()
+        self.text = bytes(text) if isinstance(text, bytearray) else text
+        self.encode()
+        self.suffix_array = self.construct_suffix_array(self.text)
+        self.lcp_array = self.build_lcp_array_phi()
+
+    def encode(self):
+        """
+        Stores the text as a compact code array plus the raw bytes used for comparisons.
+        - data: bytes of the text, one byte per character when every character fits in Latin-1
+          (or the text is bytes), otherwise four big-endian bytes per character, so that byte
+          order equals character order.
+        - buffer: memoryview over data.
+        - codes: numpy uint8 / big-endian uint32 view over data (no copy).
+        :return: None
+        """
+        self.is_bytes = isinstance(self.text, bytes)
+        self.set_buffer(*text_buffer(self.text))
+
+    def set_buffer(self, data, width):
+        """
+        Installs already encoded text bytes and resets the lookup tables derived from them.
+        :param data: Encoded text (bytes, or a memory map of them), as returned by text_buffer.
+        :param width: Number of bytes per character (1 or 4).
+        :return: None
+        """
+        self.data, self.width = data, width
+        self.mapped = not isinstance(data, bytes)
+        # A memory map has no startswith; a find bounded to the length of the key does the same
+        self._starts_with = partial(_starts_with, data) if self.mapped else data.startswith
+        self.buffer = memoryview(self.data)
+        self.codes = np.frombuffer(self.data, dtype=np.uint8 if self.width == 1 else ">u4")
+        self._buckets = None
+        self._llcp = self._rlcp = None
+        self._rmq = self._rank = None
+        self._child_table = None
+
+    def construct_suffix_array(self, s):
+        """
+        Builds the suffix array with the algorithm selected at construction time.
+        :param s: Input string.
+        :return: Suffix array (numpy array of integers).
+        """
+        if self.algorithm == "sais":
+            return self.build_suffix_array_sais(s)
+        if self.algorithm == "radix":
+            return self.build_suffix_array(s)
+        if self.algorithm == "parallel":
+            return self.build_suffix_array_parallel(s)
+        return self.build_suffix_array_doubling(s)
 
     def build_suffix_array(self, s):
         """
@@ -77,6 +138,44 @@ class SuffixArray:
 
         return sa
 
+    def build_suffix_array_doubling(self, s):
+        """
+        Constructs the suffix array with whole-array prefix doubling in NumPy.
+        Each round sorts the (rank, rank + d) pairs at once and derives the new
+        ranks with np.diff/cumsum, so there is no per-element Python loop.
+        :param s: Input string.
+        :return: Suffix array (numpy array of integers), identical to build_suffix_array.
+
+        Time Complexity: O(n log^2 n), where n is the length of the input string (log n sorting rounds).
+        Space Complexity: O(n), for the rank and key arrays.
+        """
+        return suffix_array_doubling(encode_text(s))
+
+    def build_suffix_array_sais(self, s):
+        """
+        Constructs the suffix array with SA-IS (induced sorting), vectorized.
+        :param s: Input string.
+        :return: Suffix array (numpy array of integers).
+
+        Time Complexity: O(n log n log r), where n is the length of the input string and r the
+            longest run of suffixes of the same type (see suffix_array_sais).
+        Space Complexity: O(n), for the type, bucket and reduced-problem arrays.
+        """
+        return suffix_array_sais(encode_text(s))
+
+    def build_suffix_array_parallel(self, s, workers=None):
+        """
+        Constructs the suffix array with prefix doubling split across worker processes
+        (see parallel_suffix_array.suffix_array_parallel).
+        :param s: Input string.
+        :param workers: Number of worker processes (default os.cpu_count()).
+        :return: Suffix array (numpy array of integers), identical to build_suffix_array_doubling.
+
+        Time Complexity: O((n log^2 n) / p) with p workers, where n is the length of the input string.
+        Space Complexity: O(n), in shared memory.
+        """
+        return suffix_array_parallel(encode_text(s), workers)
+
     def build_lcp_array(self):
         """
         Constructs the LCP (Longest Common Prefix) array using the Kasai algorithm.
@@ -103,46 +202,36 @@ class SuffixArray:
 
         return lcp
 
+    def build_lcp_array_phi(self):
+        """
+        Constructs the LCP array with the Phi/PLCP formulation on the integer codes of the text.
+        Phi and the final PLCP-to-LCP permutation are single vectorized steps, and the
+        character comparisons for all suffix pairs are done in batched NumPy rounds.
+        :return: LCP array (numpy array of integers), identical to build_lcp_array.
+
+        Time Complexity: O(n) expected for typical texts, where n is the length of the input string.
+        Space Complexity: O(n), for the Phi and PLCP arrays.
+        """
+        return lcp_array_phi(self.codes, self.suffix_array)
+
     def get_suffixes(self):
         return [self.text[i:] for i in self.suffix_array]
 
-    def pattern_search(self, pattern):
+    def pattern_search(self, pattern, use_lcp=False):
         """
         Searches for all occurrences of a pattern in the text using binary search on the suffix array.
         :param pattern: The pattern string to search for.
-        :return: A tuple (exists, result), where:
-            - exists (bool): True if the pattern exists in the text, False otherwise.
-            - result (list): A list of starting indices where the pattern occurs in the text.
+        :param use_lcp: If True, use the LLCP/RLCP-accelerated search (O(m + log n)).
+        :return: SearchResult over the view sa[left:right] of the matching suffixes; the positions
+            are only read when the caller consumes them. This used to be a tuple (exists, positions):
+            a SearchResult cannot be unpacked (TypeError), use result.exists and
+            result.iter_positions() or result.sorted() instead.
 
         Time Complexity: O(m log n), where m is the pattern length and n is the text length.
-        Space Complexity: O(1).
+        Space Complexity: O(m), independent of the number of occurrences.
         """
-        sa = self.suffix_array
-        n = len(self.text)
-        m = len(pattern)
-
-        def compare_suffix(index):
-            """Helper function to compare the suffix with the pattern."""
-            suffix = self.text[index:index + m]
-            if suffix < pattern:
-                return -1
-            elif suffix > pattern:
-                return 1
-            return 0
-
-        # Binary search for the leftmost match
-        left = bisect_left(sa, pattern, key=lambda x: self.text[x:x + m])
-
-        # Binary search for the rightmost match
-        right = bisect_right(sa, pattern, key=lambda x: self.text[x:x + m])
-
-        # Collect starting indices of matching suffixes
-        result = [sa[i] for i in range(left, right)]
-
-        # Determine if the pattern exists
-        exists = len(result) > 0
-
-        return exists, result
+        left, right = self.find_range(pattern, use_lcp)
+        return SearchResult(self.suffix_array[left:right])
 
     def suffices_pattern_search(self, pattern):
         sa = self.suffix_array
@@ -156,49 +245,584 @@ class SuffixArray:
 
         return results
 
-    def count_substring_occurrences(self, pattern):
+    def count_substring_occurrences(self, pattern, use_lcp=False):
         """
         Counts the occurrences of a pattern in the text using binary search on the suffix array.
         :param pattern: The pattern string to count.
+        :param use_lcp: If True, use the LLCP/RLCP-accelerated search (O(m + log n)).
         :return: Number of occurrences (integer).
 
         Time Complexity: O(m log n), where m is the pattern length and n is the text length.
         Space Complexity: O(m).
         """
+        left, right = self.find_range(pattern, use_lcp)
+        return right - left
+
+    def find_range(self, pattern, use_lcp=False):
+        """
+        Finds the block of the suffix array whose suffixes start with the pattern.
+        The pattern is encoded once and compared against the text bytes in place, so no
+        substring is allocated per binary-search probe.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :param use_lcp: If True, use the Manber-Myers search over the LLCP/RLCP arrays.
+        :return: A tuple (left, right) such that sa[left:right] are the matching suffixes.
+
+        Time Complexity: O(m log n), or O(m + log n) with use_lcp, where m is the pattern length
+            and n is the text length.
+        Space Complexity: O(m), for the encoded pattern.
+        """
+        key = self.encode_pattern(pattern)
+        if key is None:
+            return 0, 0
+        if not key:
+            return 0, len(self.suffix_array)
+        if use_lcp:
+            return self._lcp_bound(key, upper=False), self._lcp_bound(key, upper=True)
+
+        low, high, matched = self._bucket_range(key)
+        left = self._bound(key, False, low, high, matched)
+        right = self._bound(key, True, left, high, matched)
+        return left, right
+
+    def encode_pattern(self, pattern):
+        """
+        Encodes a pattern with the same byte layout as the text.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: Encoded pattern (bytes), or None if it contains characters absent from the encoding.
+        """
+        if self.is_bytes:
+            if isinstance(pattern, str):
+                raise TypeError("Cannot search a str pattern in a bytes text.")
+            return bytes(pattern)
+        if not isinstance(pattern, str):
+            raise TypeError("Cannot search a bytes pattern in a str text.")
+        if self.width == 4:
+            return pattern.encode("utf-32-be")
+        try:
+            return pattern.encode("latin-1")
+        except UnicodeEncodeError:
+            return None
+
+    def bucket_table(self):
+        """
+        Returns the table of suffix array blocks by leading bytes, building it on first use.
+        Entry v holds the first suffix whose one- or two-byte prefix value is v. Texts of 64 KiB
+        or more use two-byte prefixes, valued b0 * 257 + (b1 + 1), with 0 for a single-byte suffix.
+        There is no table when the text is memory-mapped (SuffixArray.open): building it reads the
+        whole suffix array and the text at every suffix start, with O(n) scratch memory, so
+        searches there start from the whole array.
+        :return: Numpy int64 array of 257 or 256 * 257 + 1 block starts, or None.
+        """
+        if self._buckets is None and not self.mapped:
+            data = self.data
+            starts = self.suffix_array.astype(np.int64) * self.width
+            raw = np.frombuffer(data, dtype=np.uint8)
+            prefixes = raw[starts].astype(np.int64)
+            size = 256
+            if len(data) >= 1 << 16:
+                second = np.zeros(len(starts), dtype=np.int64)
+                has_second = starts + 1 < len(data)
+                second[has_second] = raw[starts[has_second] + 1].astype(np.int64) + 1
+                prefixes = prefixes * 257 + second
+                size = 256 * 257
+            buckets = np.zeros(size + 1, dtype=np.int64)
+            np.cumsum(np.bincount(prefixes, minlength=size), out=buckets[1:])
+            self._buckets = buckets
+        return self._buckets
+
+    def _bucket_range(self, key):
+        """
+        Looks up the suffix array block sharing the first one or two bytes with the key.
+        :param key: Encoded, non-empty pattern (bytes).
+        :return: A tuple (low, high, matched): the candidate block and the number of key bytes
+            every suffix in it is known to share.
+        """
+        buckets = self.bucket_table()
+        if buckets is None:
+            return 0, len(self.suffix_array), 0
+        bucket = buckets.item
+        if len(buckets) == 257:
+            return bucket(key[0]), bucket(key[0] + 1), 1
+        if len(key) == 1:
+            return bucket(key[0] * 257), bucket((key[0] + 1) * 257), 1
+        value = key[0] * 257 + key[1] + 1
+        return bucket(value), bucket(value + 1), 2
+
+    def _bound(self, key, upper, left, right, matched):
+        """
+        Binary search for the first suffix in sa[left:right] that is not smaller than the key.
+        The matched prefix lengths of both search bounds are tracked, and every suffix
+        between them shares the smaller one with the key, so comparison resumes from there.
+        :param key: Encoded pattern (bytes).
+        :param upper: If True, suffixes starting with the key count as smaller (right bound).
+        :param left: Start of the block to search.
+        :param right: End of the block to search.
+        :param matched: Number of leading bytes every suffix in the block shares with the key.
+        :return: Index into the suffix array.
+        """
+        suffix_at = self.suffix_array.item
+        data = self.data
+        starts_with = self._starts_with
+        size = len(data)
+        width = self.width
+        m = len(key)
+        left_lcp = right_lcp = matched
+        while left < right:
+            mid = (left + right) // 2
+            offset = suffix_at(mid) * width
+            k = left_lcp if left_lcp < right_lcp else right_lcp
+            if k < m and offset + k < size and data[offset + k] != key[k]:
+                smaller = data[offset + k] < key[k]
+            else:
+                k = m if starts_with(key, offset) else self._mismatch(offset, key, k + 1)
+                if k == m:
+                    smaller = upper
+                else:
+                    smaller = offset + k >= size or data[offset + k] < key[k]
+            if smaller:
+                left = mid + 1
+                left_lcp = k
+            else:
+                right = mid
+                right_lcp = k
+        return left
+
+    def build_llcp_rlcp_arrays(self):
+        """
+        Returns the LLCP/RLCP arrays of the Manber-Myers search, building them on first use.
+        :return: A tuple (llcp, rlcp) of numpy int32 arrays, see llcp_rlcp_arrays.
+        """
+        if self._llcp is None:
+            self._llcp, self._rlcp = llcp_rlcp_arrays(self.lcp_array)
+        return self._llcp, self._rlcp
+
+    def _lcp_bound(self, key, upper):
+        """
+        Manber-Myers binary search for the first suffix that is not smaller than the key.
+        The search follows the fixed midpoint tree over [0, n - 1]. At a midpoint M, LLCP[M]
+        (or RLCP[M]) is compared with the prefix the key shares with the left (or right) bound,
+        and characters are only read when the two are equal, starting after that prefix.
+        :param key: Encoded pattern (bytes).
+        :param upper: If True, suffixes starting with the key count as smaller (right bound).
+        :return: Index into the suffix array.
+        """
         sa = self.suffix_array
-        n = len(self.text)
-        m = len(pattern)
+        n = len(sa)
+        if n == 0:
+            return 0
+        llcp, rlcp = self.build_llcp_rlcp_arrays()
+        llcp_at, rlcp_at, suffix_at = llcp.item, rlcp.item, sa.item
+        data = self.data
+        size = len(data)
+        width = self.width
+        m = len(key)
+
+        def compare(index, k):
+            # Returns (characters shared with the key, whether the suffix sorts before the key)
+            offset = suffix_at(index) * width
+            k = self._mismatch(offset, key, k * width)
+            if k == m:
+                return k // width, upper
+            return k // width, offset + k >= size or data[offset + k] < key[k]
+
+        left_lcp, smaller = compare(0, 0)
+        if not smaller:
+            return 0
+        right_lcp, smaller = compare(n - 1, 0)
+        if smaller:
+            return n
+
+        left, right = 0, n - 1
+        while right - left > 1:
+            mid = (left + right) // 2
+            if left_lcp >= right_lcp:
+                shared = llcp_at(mid)
+                if shared > left_lcp:
+                    left = mid
+                    continue
+                if shared < left_lcp:
+                    right, right_lcp = mid, shared
+                    continue
+                k = left_lcp
+            else:
+                shared = rlcp_at(mid)
+                if shared > right_lcp:
+                    right = mid
+                    continue
+                if shared < right_lcp:
+                    left, left_lcp = mid, shared
+                    continue
+                k = right_lcp
+
+            k, smaller = compare(mid, k)
+            if smaller:
+                left, left_lcp = mid, k
+            else:
+                right, right_lcp = mid, k
+        return right
 
-        def compare_suffix(index):
-            return self.text[index:index + m]
+    def _mismatch(self, offset, key, k):
+        """
+        Finds the first byte at which the text starting at offset differs from the key.
+        Comparisons use bytes.startswith (or a bounded find on a memory map) on memoryview
+        slices, which never copy the text.
+        :param offset: Byte offset of the suffix in the text.
+        :param key: Encoded pattern (bytes).
+        :param k: Number of leading bytes already known to match.
+        :return: Index of the first mismatching byte, len(key) if the key is a prefix of the suffix,
+            or the suffix length if the suffix is a proper prefix of the key.
+        """
+        data = self.data
+        starts_with = self._starts_with
+        m = len(key)
+        if starts_with(key, offset):
+            return m
+
+        # Most mismatches are within a few bytes: scan those directly before galloping
+        limit = min(m, len(data) - offset)
+        stop = min(k + 8, limit)
+        while k < stop:
+            if data[offset + k] != key[k]:
+                return k
+            k += 1
+
+        view = memoryview(key)
+        step = 8
+        while k < limit:
+            end = min(k + step, limit)
+            if starts_with(view[k:end], offset + k):
+                k = end
+                step *= 2
+                continue
+
+            # The first mismatch lies in [k, end)
+            while end - k > 1:
+                mid = (k + end) // 2
+                if starts_with(view[k:mid], offset + k):
+                    k = mid
+                else:
+                    end = mid
+            return k
+        return limit
 
-        left = bisect_left(sa, pattern, key=lambda x: compare_suffix(x))
-        right = bisect_right(sa, pattern, key=lambda x: compare_suffix(x))
+    def pattern_codes(self, pattern):
+        """
+        Converts a pattern into the integer codes used by self.codes.
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :return: Numpy array of character codes.
+        """
+        if self.is_bytes:
+            if isinstance(pattern, str):
+                raise TypeError("Cannot search a str pattern in a bytes text.")
+            return np.frombuffer(bytes(pattern), dtype=np.uint8)
+        if not isinstance(pattern, str):
+            raise TypeError("Cannot search a bytes pattern in a str text.")
+        return np.frombuffer(pattern.encode("utf-32-le"), dtype=np.uint32)
+
+    def search_many(self, patterns):
+        """
+        Searches for many patterns at once with a vectorized binary search.
+        :param patterns: Iterable (or numpy array) of patterns.
+        :return: A tuple (ranges, offsets, positions), where:
+            - ranges (numpy array, shape (k, 2)): the suffix array block [left, right) of each pattern.
+            - offsets (numpy array, length k + 1): positions[offsets[i]:offsets[i + 1]] are the
+              occurrences of pattern i (CSR layout).
+            - positions (numpy array): starting indices of all occurrences, in suffix array order.
+
+        Time Complexity: O(k m log n + occ), vectorized, where k is the number of patterns, m the
+            longest pattern length and occ the total number of occurrences.
+        Space Complexity: O(k + occ), plus bounded scratch space for the comparisons.
+        """
+        ranges = self.find_ranges(patterns)
+        counts = ranges[:, 1] - ranges[:, 0]
+        offsets = np.zeros(len(ranges) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
 
-        return right - left
+        # Gather sa[left:right] of every pattern in one step
+        starts = np.repeat(ranges[:, 0] - offsets[:-1], counts)
+        positions = self.suffix_array[starts + np.arange(offsets[-1])]
+        return ranges, offsets, positions
+
+    def count_many(self, patterns):
+        """
+        Counts the occurrences of many patterns at once.
+        :param patterns: Iterable (or numpy array) of patterns.
+        :return: Numpy array with the number of occurrences of each pattern.
+
+        Time Complexity: O(k m log n), vectorized, where k is the number of patterns and m the longest pattern length.
+        Space Complexity: O(k).
+        """
+        ranges = self.find_ranges(patterns)
+        return ranges[:, 1] - ranges[:, 0]
+
+    def find_ranges(self, patterns):
+        """
+        Finds the suffix array block of many patterns at once.
+        Duplicate patterns are searched once, all patterns are encoded in a single call, and
+        for Latin-1/bytes texts each search starts from the bucket of the pattern's leading bytes.
+        :param patterns: Iterable (or numpy array) of patterns.
+        :return: Numpy array of shape (k, 2) with the [left, right) block of each pattern.
+        """
+        patterns = [p.item() if isinstance(p, np.generic) else p for p in patterns]
+        first_seen = {}
+        inverse = np.array([first_seen.setdefault(p, len(first_seen)) for p in patterns], dtype=np.int64)
+        unique = list(first_seen)
+        n = len(self.suffix_array)
+        if not unique:
+            return np.zeros((0, 2), dtype=np.int64)
+
+        lengths = np.array([len(p) for p in unique], dtype=np.int64)
+        flat = self.pattern_codes(unique[0][:0].join(unique)).astype(np.int64)
+        starts = np.zeros(len(unique), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+
+        low = np.zeros(len(unique), dtype=np.int64)
+        high = np.full(len(unique), n, dtype=np.int64)
+        buckets = self.bucket_table() if self.width == 1 and n else None
+        if buckets is not None:
+            nonempty = lengths > 0
+            first = np.where(nonempty, flat[np.minimum(starts, len(flat) - 1)] if len(flat) else 0, 0)
+            if len(buckets) == 257:
+                value, span = first, 1
+            else:
+                second = np.where(lengths > 1, flat[np.minimum(starts + 1, len(flat) - 1)] + 1, 0)
+                value = np.where(lengths > 1, first * 257 + second, first * 257)
+                span = np.where(lengths > 1, 1, 257)
+            # Characters outside the one-byte alphabet cannot occur in the text
+            valid = nonempty & (first < 256) & (value + span < len(buckets))
+            safe_value = np.where(valid, value, 0)
+            low = np.where(valid, buckets[safe_value], np.where(nonempty, 0, low))
+            high = np.where(valid, buckets[np.where(valid, value + span, 0)], np.where(nonempty, 0, high))
+
+        ranges = suffix_ranges_many(self.codes, self.suffix_array, flat, starts, lengths, low, high)
+        return ranges[inverse]
+
+    def approximate_search(self, pattern, k, metric="hamming"):
+        """
+        Finds all occurrences of a pattern with at most k mismatches ("hamming") or edits ("edit"),
+        from exactly matched pattern pieces verified against the text
+        (see approximate_search.approximate_search_many).
+        :param pattern: The pattern (string, or bytes for a bytes text).
+        :param k: Maximum number of errors.
+        :param metric: "hamming" or "edit".
+        :return: Numpy int64 array of starting positions, in increasing order.
+
+        Time Complexity: O(m log n + c m) for Hamming distance, where c is the number of candidate starts.
+        Space Complexity: O(c), plus bounded scratch space for the verification.
+        """
+        from structures.approximate_search import approximate_search
+
+        return approximate_search(self, pattern, k, metric)
+
+    def build_rmq(self):
+        """
+        Returns the range minimum structure over the LCP array and the inverse suffix array
+        (rank of every suffix), building them on first use.
+        :return: A tuple (rmq, rank).
+
+        Time Complexity: O(n log b) on first use, where b is the RMQ block size.
+        Space Complexity: O(n).
+        """
+        if self._rmq is None:
+            self._rmq = RangeMinimumQuery(self.lcp_array)
+            rank = np.empty(len(self.suffix_array), dtype=np.int64)
+            rank[self.suffix_array] = np.arange(len(self.suffix_array))
+            self._rank = rank
+        return self._rmq, self._rank
+
+    def build_child_table(self):
+        """
+        Returns the enhanced suffix array (child table over the LCP array), building it on first use.
+        It walks the LCP intervals top-down like suffix tree nodes: find_range matches a pattern in
+        O(m |Σ|) and child_intervals enumerates the children of an interval.
+        :return: EnhancedSuffixArray.
+
+        Time Complexity: O(n) on first use.
+        Space Complexity: O(n).
+        """
+        if self._child_table is None:
+            from structures.enhanced_suffix_array import EnhancedSuffixArray
+
+            self._child_table = EnhancedSuffixArray(self)
+        return self._child_table
+
+    def lce(self, i, j):
+        """
+        Longest common extension: length of the longest common prefix of the suffixes at i and j.
+        It is the minimum LCP value between the two suffixes in suffix array order.
+        :param i: Start of the first suffix.
+        :param j: Start of the second suffix.
+        :return: Length of the common prefix (integer).
+
+        Time Complexity: O(1) after the first call.
+        Space Complexity: O(1).
+        """
+        n = len(self.suffix_array)
+        if not (0 <= i < n and 0 <= j < n):
+            raise IndexError(f"Positions ({i}, {j}) are outside the text of length {n}.")
+        if i == j:
+            return n - i
+        rmq, rank = self.build_rmq()
+        a, b = rank.item(i), rank.item(j)
+        return rmq.query(min(a, b) + 1, max(a, b) + 1)
+
+    def lce_many(self, I, J):
+        """
+        Vectorized lce for many pairs of positions.
+        :param I: Numpy array of first suffix starts.
+        :param J: Numpy array of second suffix starts.
+        :return: Numpy int64 array of common prefix lengths.
+
+        Time Complexity: O(1) per pair, vectorized.
+        Space Complexity: O(k), where k is the number of pairs.
+        """
+        I = np.asarray(I, dtype=np.int64)
+        J = np.asarray(J, dtype=np.int64)
+        n = len(self.suffix_array)
+        if I.size and (min(I.min(), J.min()) < 0 or max(I.max(), J.max()) >= n):
+            raise IndexError(f"Positions are outside the text of length {n}.")
+        rmq, rank = self.build_rmq()
+        result = np.full(len(I), n, dtype=np.int64) - I
+        different = I != J
+        a, b = rank[I[different]], rank[J[different]]
+        result[different] = rmq.query_many(np.minimum(a, b) + 1, np.maximum(a, b) + 1)
+        return result
+
+    def save(self, path):
+        """
+        Writes the index to a directory:
+        - header.json: format name, layout version, text kind (str or bytes), character width,
+          construction algorithm and text length.
+        - text.bin: the encoded text bytes (see encode).
+        - suffix_array.npy, lcp_array.npy: the arrays in NumPy format.
+        The header is written last, so an interrupted save is never opened as a valid index.
+        :param path: Directory to write to (created if missing).
+        :return: None
+        """
+        os.makedirs(path, exist_ok=True)
+        header_path = os.path.join(path, "header.json")
+        if os.path.exists(header_path):
+            os.remove(header_path)
+
+        with open(os.path.join(path, "text.bin"), "wb") as file:
+            file.write(self.data)
+        np.save(os.path.join(path, "suffix_array.npy"), self.suffix_array)
+        np.save(os.path.join(path, "lcp_array.npy"), self.lcp_array)
+
+        header = {
+            "format": self.FORMAT,
+            "version": self.FORMAT_VERSION,
+            "kind": "bytes" if self.is_bytes else "str",
+            "width": self.width,
+            "algorithm": self.algorithm,
+            "length": len(self.suffix_array),
+        }
+        with open(header_path, "w") as file:
+            json.dump(header, file)
+
+    @classmethod
+    def open(cls, path, mmap=True):
+        """
+        Loads an index written by save (or build_external) without rebuilding it.
+        With mmap, text.bin and the suffix and LCP arrays are memory-mapped read-only, so opening
+        is near-instant, memory stays bounded for indexes larger than RAM, and processes opening
+        the same index share the page cache. Searches compare the pattern with the mapped text
+        bytes in place; text is then a MappedText, which decodes only the characters and
+        slices that are read. Query methods work unchanged; the structures they build on first
+        use (the LLCP/RLCP arrays of use_lcp, the RMQ of lce) still take O(n) memory, and insert
+        and delete need a text in memory (open with mmap=False).
+        :param path: Directory written by save.
+        :param mmap: If True, map the text and arrays instead of reading them into memory.
+        :return: SuffixArray.
+
+        Time Complexity: O(1) with mmap, O(n) to read and decode the text otherwise.
+        Space Complexity: O(1) with mmap, pages are read on demand; O(n) otherwise.
+        """
+        with open(os.path.join(path, "header.json")) as file:
+            header = json.load(file)
+        if header.get("format") != cls.FORMAT:
+            raise ValueError(f"'{path}' does not contain a suffix array index.")
+        if header.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported suffix array index version {header.get('version')}, "
+                             f"expected {cls.FORMAT_VERSION}.")
+
+        with open(os.path.join(path, "text.bin"), "rb") as file:
+            if mmap and os.fstat(file.fileno()).st_size:
+                # The map stays valid after the file is closed
+                data = mmap_module.mmap(file.fileno(), 0, access=mmap_module.ACCESS_READ)
+            else:
+                data = file.read()
+        width = header["width"]
+        mode = "r" if mmap else None
+        suffix_array = np.load(os.path.join(path, "suffix_array.npy"), mmap_mode=mode)
+        lcp_array = np.load(os.path.join(path, "lcp_array.npy"), mmap_mode=mode)
+        if len(data) != header["length"] * width or len(suffix_array) != header["length"] or len(lcp_array) != header["length"]:
+            raise ValueError(f"Suffix array index '{path}' is truncated.")
+
+        is_bytes = header["kind"] == "bytes"
+        if mmap:
+            text = MappedText(data, width, is_bytes)
+        elif is_bytes:
+            text = data
+        else:
+            text = data.decode("latin-1" if width == 1 else "utf-32-be")
+
+        index = cls.__new__(cls)
+        index.algorithm = header["algorithm"]
+        index.original_text = index.text = text
+        index.is_bytes = is_bytes
+        index.set_buffer(data, width)
+        index.suffix_array = suffix_array
+        index.lcp_array = lcp_array
+        return index
 
     def insert(self, new_text):
         self.text += new_text
-        self.suffix_array = self.build_suffix_array(self.text)
+        self.encode()
+        self.suffix_array = self.construct_suffix_array(self.text)
+        self.lcp_array = self.build_lcp_array_phi()
         print(f"Inserted '{new_text}'. Rebuilt Suffix Array.")
 
     def delete(self, substring):
         index = self.text.find(substring)
         if index != -1:
             self.text = self.text[:index] + self.text[index + len(substring):]
-            self.suffix_array = self.build_suffix_array(self.text)
+            self.encode()
+            self.suffix_array = self.construct_suffix_array(self.text)
+            self.lcp_array = self.build_lcp_array_phi()
             print(f"Deleted '{substring}'. Rebuilt Suffix Array.")
         else:
             print(f"Substring '{substring}' not found in text.")
 
-    def lz_compress(self):
+    def build_lpf_array(self):
+        """
+        Computes the Longest Previous Factor array from the suffix and LCP arrays.
+        :return: A tuple (lpf, previous) of numpy arrays, where lpf[i] is the length of the longest
+            prefix of suffix i that also starts at an earlier position, and previous[i] is such a
+            position (-1 when lpf[i] is 0).
+
+        Time Complexity: O(n) expected, vectorized (see lpf_array).
+        Space Complexity: O(n).
+        """
+        return lpf_array(self.suffix_array, self.lcp_array)
+
+    def lz_compress(self, method="search"):
         """
         Compresses the text using the LZ77 compression algorithm, leveraging the suffix and LCP arrays.
+        - "search": binary search for each position and check the neighbouring suffixes (prints every step).
+        - "lpf": greedy parse taking the longest previous factor at every position, read from the
+          LPF array; this is the longest possible match, so the parse has the fewest tokens.
+        :param method: "search" or "lpf".
         :return: A list of tuples representing the compressed data (offset, length, next character).
         
-        Time Complexity: O(n log n), where n is the length of the text.
+        Time Complexity: O(n log n), where n is the length of the text; O(n) with "lpf".
         Space Complexity: O(n), as the suffix array and LCP array are used.
         """
+        if method not in self.LZ_METHODS:
+            raise ValueError(f"Unknown compression method '{method}', expected one of {self.LZ_METHODS}.")
+        if method == "lpf":
+            return self._lz_compress_lpf()
+
         n = len(self.text)
         result = []
         i = 0
@@ -263,42 +887,702 @@ class SuffixArray:
         return result
 
 
-def find_longest_common_substring(str1, str2):
+    def _lz_compress_lpf(self):
+        """
+        Greedy LZ77 parse driven by the LPF array: one step per token instead of per character,
+        with the token fields gathered vectorized once the token starts are known.
+        :return: A list of tuples (offset, length, next character).
+        """
+        text = self.text
+        n = len(text)
+        if n == 0:
+            return []
+        lpf, previous = self.build_lpf_array()
+
+        # Only the chain of token starts is sequential
+        starts = []
+        lengths = lpf.tolist()
+        i = 0
+        while i < n:
+            starts.append(i)
+            i += lengths[i] + 1
+
+        starts = np.array(starts, dtype=np.int64)
+        lengths = lpf[starts]
+        offsets = np.where(lengths > 0, starts - previous[starts], 0)
+        ends = (starts + lengths).tolist()
+        next_chars = [text[end] for end in ends[:-1]]
+        next_chars.append(text[ends[-1]] if ends[-1] < n else None)
+        return list(zip(offsets.tolist(), lengths.tolist(), next_chars))
+
+
+class MappedText:
+    def __init__(self, data, width, is_bytes):
+        """
+        Read-only text of an index opened with SuffixArray.open(mmap=True), over its encoded
+        bytes (see SuffixArray.encode) instead of a decoded copy: len, indexing and slicing
+        behave as on the str or bytes text, decoding only the characters they return.
+        :param data: Encoded text (memory map or bytes).
+        :param width: Number of bytes per character (1 or 4).
+        :param is_bytes: True for a bytes text, False for a str text.
+        """
+        self.data = data
+        self.width = width
+        self.is_bytes = is_bytes
+        self.encoding = "latin-1" if width == 1 else "utf-32-be"
+
+    def __len__(self):
+        return len(self.data) // self.width
+
+    def __getitem__(self, item):
+        width = self.width
+        if isinstance(item, slice):
+            positions = range(*item.indices(len(self)))
+            if positions.step != 1:
+                # Decode the span covered, then step through it
+                low = min(positions[0], positions[-1]) if positions else 0
+                high = max(positions[0], positions[-1]) + 1 if positions else 0
+                return self[low:high][positions[0] - low::positions.step] if positions else self[0:0]
+            raw = self.data[positions.start * width:max(positions.start, positions.stop) * width]
+            return raw if self.is_bytes else raw.decode(self.encoding)
+        n = len(self)
+        if item < 0:
+            item += n
+        if not 0 <= item < n:
+            raise IndexError("text index out of range")
+        if self.is_bytes:
+            return self.data[item]
+        return self.data[item * width:(item + 1) * width].decode(self.encoding)
+
+    def __repr__(self):
+        return f"MappedText(length={len(self)})"
+
+
+def _starts_with(data, key, offset):
     """
-    Finds the longest common substring between two strings using a combined suffix array and LCP array.
-    :param str1: First input string.
-    :param str2: Second input string.
-    :return: The longest common substring (string).
+    bytes.startswith(key, offset) for buffers that only have find (memory maps).
+    """
+    return data.find(key, offset, offset + len(key)) == offset
 
-    Time Complexity: O(n log n), where n is the combined length of the two strings.
-    Space Complexity: O(n), due to suffix array and LCP array storage.
+
+class SearchResult:
+    def __init__(self, positions):
+        """
+        Occurrences of a pattern, held as a view of the suffix array block that matches it
+        (suffix order, not text order). Nothing is copied until the caller asks for it.
+        :param positions: Numpy array (usually a view) of starting positions.
+        """
+        self.positions = positions
+
+    @property
+    def count(self):
+        return len(self.positions)
+
+    @property
+    def exists(self):
+        return len(self.positions) > 0
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __bool__(self):
+        return self.exists
+
+    def __iter__(self):
+        """
+        Not iterable: pattern_search used to return a tuple (exists, positions), and unpacking a
+        result as one must fail instead of silently taking its first two positions.
+        """
+        raise TypeError("SearchResult is not iterable (pattern_search no longer returns "
+                        "(exists, positions)); use .exists, .iter_positions(), .sorted() or .positions")
+
+    def iter_positions(self):
+        """
+        Yields the starting positions (integers) one at a time, in suffix order.
+        """
+        for position in self.positions:
+            yield int(position)
+
+    def first(self):
+        """
+        Returns the first occurrence in suffix order, or None when the pattern does not occur.
+
+        Time Complexity: O(1).
+        """
+        return int(self.positions[0]) if len(self.positions) else None
+
+    def sorted(self):
+        """
+        Returns the starting positions in text order.
+        :return: Numpy array (a sorted copy of the view).
+
+        Time Complexity: O(occ log occ), where occ is the number of occurrences.
+        Space Complexity: O(occ).
+        """
+        return np.sort(self.positions)
+
+    def __repr__(self):
+        return f"SearchResult(count={self.count})"
+
+
+def text_buffer(text):
     """
-    separator = '#'
-    if separator in str1 or separator in str2:
-        raise ValueError("Strings must not contain the separator character '#'.")
+    Encodes a text into bytes whose byte order matches the character order.
+    :param text: Input string, bytes or bytearray.
+    :return: A tuple (data, width): the encoded bytes and the number of bytes per character
+        (1 for bytes and Latin-1 strings, 4 for other strings, stored as big-endian code points).
 
-    concatenated = str1 + separator + str2
+    Time Complexity: O(n), where n is the length of the text.
+    Space Complexity: O(n), for the encoded bytes.
+    """
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        return bytes(text), 1
+    try:
+        return text.encode("latin-1"), 1
+    except UnicodeEncodeError:
+        return text.encode("utf-32-be"), 4
 
-    suffix_array_obj = SuffixArray(concatenated)
 
-    sa = suffix_array_obj.suffix_array
-    lcp = suffix_array_obj.lcp_array
-    text = suffix_array_obj.text
+def encode_text(text):
+    """
+    Converts a text into a NumPy array of its character codes.
+    :param text: Input string, bytes or bytearray.
+    :return: Numpy array of unsigned integers (uint8, or big-endian uint32 code points).
+
+    Time Complexity: O(n), where n is the length of the text.
+    Space Complexity: O(n), for the code array.
+    """
+    data, width = text_buffer(text)
+    return np.frombuffer(data, dtype=np.uint8 if width == 1 else ">u4")
+
+
+def suffix_array_doubling(codes):
+    """
+    Builds a suffix array from an integer code array by prefix doubling.
+    In round d every suffix i is keyed by the pair (rank[i], rank[i + d]), packed into
+    rank[i] * (n + 1) + rank[i + d] + 1 (below 2^62 for any n < 2^31, the int32 suffix array
+    limit), the keys are sorted in one argsort and the new ranks are the running count of key
+    changes.
+    :param codes: Numpy array of integer character codes.
+    :return: Suffix array (numpy array of int32).
+
+    Time Complexity: O(n log^2 n), where n is the number of codes.
+    Space Complexity: O(n), for the rank and key arrays.
+    """
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int32)
 
-    n1 = len(str1)
-    max_length = 0
-    lcs_start = 0
+    # Dense initial ranks based on the first character
+    rank = np.unique(codes, return_inverse=True)[1].astype(np.int64).reshape(n)
+    sa = np.argsort(rank, kind="stable")
+    distinct = int(rank.max()) + 1
 
-    for i in range(1, len(lcp)):
-        suffix1 = sa[i]
-        suffix2 = sa[i - 1]
+    d = 1
+    while distinct < n:
+        # Second key is the rank d positions ahead, 0 when the suffix is shorter than d
+        second = np.zeros(n, dtype=np.int64)
+        second[:n - d] = rank[d:] + 1
+        key = rank * (n + 1) + second
 
-        if (suffix1 < n1 and suffix2 > n1) or (suffix2 < n1 and suffix1 > n1):
-            if lcp[i] > max_length:
-                max_length = lcp[i]
-                lcs_start = suffix1 if suffix1 < n1 else suffix2
+        sa = np.argsort(key)
+        sorted_key = key[sa]
+
+        # A new rank starts wherever the sorted (rank, rank + d) pair changes
+        new_rank = np.empty(n, dtype=np.int64)
+        new_rank[sa[0]] = 0
+        new_rank[sa[1:]] = np.cumsum(np.diff(sorted_key) != 0)
+        rank = new_rank
+
+        distinct = int(rank[sa[-1]]) + 1
+        d *= 2
+
+    return sa.astype(np.int32)
+
+
+def suffix_array_sais(codes):
+    """
+    Builds a suffix array from an integer code array with SA-IS (Nong, Zhang and Chan).
+    The induced-sorting passes are vectorized with numpy (see _induce), so no step loops over
+    the characters or the buckets in Python.
+    :param codes: Numpy array of integer character codes.
+    :return: Suffix array (numpy array of int32).
+
+    Time Complexity: O(n log n log r), where n is the number of codes and r the longest run of
+        suffixes of the same type (small on text); the bucket-pointer scans of SA-IS are O(n)
+        but sequential, so each pass sorts keys instead.
+    Space Complexity: O(n).
+    """
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    # Remap to a dense alphabet 0..sigma - 1 so the buckets stay O(n)
+    dense = np.unique(codes, return_inverse=True)[1].astype(np.int64).reshape(n)
+    return _sais(dense, int(dense.max()) + 1).astype(np.int32)
+
+
+def _sais(s, sigma):
+    """
+    Recursive SA-IS over a dense integer array.
+    :param s: Numpy int64 array with values in [0, sigma).
+    :param sigma: Alphabet size.
+    :return: Suffix array (numpy int64 array).
+    """
+    n = len(s)
+    if n == 1:
+        return np.zeros(1, dtype=np.int64)
+
+    # Classify suffixes: stype[i] is True for S-type (suffix i smaller than suffix i + 1); a
+    # character equal to the next one takes the type of the next different one
+    step = np.empty(n, dtype=np.int64)
+    step[:-1] = np.sign(s[1:] - s[:-1])
+    step[-1] = -1
+    stype = step[_next_true(step != 0, n)[:n]] > 0
+    lms = np.flatnonzero(stype[1:] & ~stype[:-1]) + 1
+    m = len(lms)
+
+    # Bucket boundaries: bucket c is [starts[c], ends[c]), its S-part starts at s_starts[c]
+    counts = np.bincount(s, minlength=sigma)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    s_starts = starts + np.bincount(s[~stype], minlength=sigma)
+
+    sa = _induce(s, stype, lms, starts, ends, s_starts)
+    if not m:
+        return sa
+
+    # Name the LMS substrings (from an LMS position to the next one, both included) by their
+    # order; neighbours in sa are compared together, one character offset per round
+    lms_index = np.full(n, -1, dtype=np.int64)
+    lms_index[lms] = np.arange(m)
+    sorted_lms = sa[lms_index[sa] >= 0]
+    lengths = np.append(lms[1:], n) - lms
+    left, right = sorted_lms[:-1], sorted_lms[1:]
+    length = lengths[lms_index[left]]
+    differs = length != lengths[lms_index[right]]
+    active = np.flatnonzero(~differs)
+    offset = 0
+    while active.size:
+        i, j = left[active] + offset, right[active] + offset
+        # The substring ending at n runs into the sentinel, which equals nothing
+        mismatch = (i >= n) | (j >= n)
+        mismatch[~mismatch] = s[i[~mismatch]] != s[j[~mismatch]]
+        differs[active[mismatch]] = True
+        active = active[~mismatch & (length[active] > offset)]
+        offset += 1
+    names = np.zeros(m, dtype=np.int64)
+    names[lms_index[sorted_lms[1:]]] = np.cumsum(differs)
+
+    distinct = int(names.max()) + 1
+    if distinct < m:
+        sorted_lms = lms[_sais(names, distinct)]
+    return _induce(s, stype, lms, starts, ends, s_starts, sorted_lms)
+
+
+def _induce(s, stype, lms, starts, ends, s_starts, sorted_lms=None):
+    """
+    Induced sorting: places the LMS suffixes at the ends of their buckets, then induces the
+    L-type suffixes from left to right and the S-type suffixes from right to left.
+    The scans of SA-IS place a suffix i within its bucket by the slot of its successor i + 1,
+    so the induced order is the order of the sequences (bucket of i, bucket of i + 1, ...,
+    slot of j), where j is the first suffix after i of the other type, whose slot is already
+    known. Instead of scanning with bucket pointers one suffix at a time, each pass ranks those
+    sequences for all the suffixes of its type with prefix doubling (_rank_runs).
+    :param s: Numpy int64 array of dense character codes.
+    :param stype: Numpy boolean array of suffix types.
+    :param lms: Numpy array of the LMS positions, in text order.
+    :param starts, ends, s_starts: Bucket starts, ends and S-part starts.
+    :param sorted_lms: LMS positions in their final order (text order when None).
+    :return: Suffix array (numpy int64 array).
+    """
+    n = len(s)
+    sorted_lms = lms if sorted_lms is None else sorted_lms
+    # slots[i]: position of suffix i in the array; the virtual sentinel suffix n comes first
+    slots = np.empty(n + 1, dtype=np.int64)
+    slots[n] = -1
+
+    # LMS suffixes keep their order at the end of their buckets
+    characters = s[sorted_lms]
+    order = np.argsort(characters, kind="stable")
+    slots[sorted_lms[order]] = ends[characters[order]] - np.searchsorted(
+        characters[order], characters[order], side="right") + np.arange(len(order))
+
+    # L-type suffixes first, before the S-part of their bucket: their runs end at an LMS suffix
+    # or at the sentinel. Then the S-type suffixes, which are all placed again from the S-part
+    # starts: their runs end at an L-type suffix placed by the first pass.
+    sa = np.empty(n, dtype=np.int64)
+    for is_s, bucket_slots in ((False, starts), (True, s_starts)):
+        members = np.flatnonzero(stype == is_s)
+        if not members.size:
+            continue
+        slots[members] = bucket_slots[s[members]]
+        _rank_runs(slots, stype != is_s, members)
+        sa[slots[members]] = members
+    return sa
+
+
+def _next_true(flags, default):
+    """
+    Index of the first True at or after every position.
+    :param flags: Numpy boolean array.
+    :param default: Value where no True follows.
+    :return: Numpy int64 array, one longer than flags (its last entry is default).
+    """
+    index = np.full(len(flags) + 1, default, dtype=np.int64)
+    index[:-1][flags] = np.flatnonzero(flags)
+    return np.minimum.accumulate(index[::-1])[::-1]
+
+
+def _rank_runs(slots, ends_run, members):
+    """
+    Sorts suffixes by their sequence of slots up to the end of their run, and gives each one
+    its final slot. The members of a bucket start with the slot of the bucket part they fill,
+    so the slots are group starts: prefix doubling splits every group in place, and only the
+    groups still tied are sorted again in the next round.
+    :param slots: Numpy int64 array of n + 1 slots: the bucket slot of every member, the final
+        slot of every run end (the sentinel n always ends a run, with slot -1). Updated in place.
+    :param ends_run: Numpy boolean array, True where a run ends.
+    :param members: Numpy array of the positions to sort (the positions not ending a run).
+    :return: None
+    """
+    n = len(slots) - 1
+    rank = slots + 1
+    active = members
+    # Number of slots after the first one in the sequence of every active position
+    lengths = _next_true(ends_run, n)[members] - members
+    d = 1
+    while active.size:
+        # Second key is the rank d slots ahead, 0 when the sequence is shorter
+        first = rank[active]
+        second = np.zeros(len(active), dtype=np.int64)
+        has_second = lengths >= d
+        second[has_second] = rank[active[has_second] + d] + 1
+        order = np.argsort(first * (n + 2) + second)
+        active, first, second, lengths = active[order], first[order], second[order], lengths[order]
+        # A group starting at rank r splits into groups starting at r + their offset in it
+        same_first = first[1:] == first[:-1]
+        first += _group_starts(same_first & (second[1:] == second[:-1])) - _group_starts(same_first)
+        rank[active] = first
+        tied = _tied(first)
+        active, lengths = active[tied], lengths[tied]
+        d *= 2
+    slots[members] = rank[members] - 1
+
+
+def _group_starts(same):
+    """
+    Index of the first element of every group of a sorted array.
+    :param same: Numpy boolean array, True where an element equals the previous one.
+    :return: Numpy int64 array, one longer than same.
+    """
+    index = np.arange(len(same) + 1)
+    index[1:][same] = 0
+    return np.maximum.accumulate(index)
+
+
+def _tied(rank):
+    """
+    Flags the elements whose rank is shared with a neighbour.
+    :param rank: Sorted numpy array of ranks.
+    :return: Numpy boolean array.
+    """
+    same = rank[1:] == rank[:-1]
+    tied = np.zeros(len(rank), dtype=bool)
+    tied[1:] |= same
+    tied[:-1] |= same
+    return tied
+
+
+def lcp_array_phi(codes, sa, batch_depth=32):
+    """
+    Builds the LCP array from an integer code array and its suffix array using Phi/PLCP.
+    Phi[sa[i]] = sa[i - 1] pairs every suffix with its predecessor in suffix order. All pairs are
+    extended together one character per round until batch_depth; the few pairs with a longer
+    common prefix are finished in text order, reusing PLCP[i] >= PLCP[i - 1] - 1 as in Kasai.
+    :param codes: Numpy array of integer character codes.
+    :param sa: Suffix array of codes.
+    :param batch_depth: Number of vectorized comparison rounds before switching to the Kasai pass.
+    :return: LCP array (numpy array of int32), lcp[i] = lcp(sa[i - 1], sa[i]) and lcp[0] = 0.
+
+    Time Complexity: O(n + n * batch_depth) in the worst case and close to O(n) for typical texts.
+    Space Complexity: O(n).
+    """
+    n = len(sa)
+    if n < 2:
+        return np.zeros(n, dtype=np.int32)
+
+    sa = sa.astype(np.int64)
+    phi = np.full(n, -1, dtype=np.int64)
+    phi[sa[1:]] = sa[:-1]
+
+    # Position n acts as an end-of-text marker that never equals a real character
+    padded = np.empty(n + 1, dtype=np.int64)
+    padded[:n] = codes
+    padded[n] = -1
+
+    plcp = np.zeros(n, dtype=np.int64)
+    active = np.flatnonzero(phi >= 0)
+    partner = phi[active]
+    h = 0
+    while active.size and h < batch_depth:
+        match = padded[np.minimum(active + h, n)] == padded[np.minimum(partner + h, n)]
+        plcp[active[~match]] = h
+        active = active[match]
+        partner = partner[match]
+        h += 1
+
+    if active.size:
+        # Finish the long common prefixes in text order with galloping block comparisons
+        buffer = codes.astype(">u4").tobytes()
+        previous, previous_h = -2, 0
+        for i, j in zip(active.tolist(), partner.tolist()):
+            start = max(batch_depth, previous_h - 1) if previous == i - 1 else batch_depth
+            previous_h = _extend_match(buffer, i, j, start, n)
+            plcp[i] = previous_h
+            previous = i
+
+    lcp = plcp[sa].astype(np.int32)
+    lcp[0] = 0
+    return lcp
+
+
+def _extend_match(buffer, i, j, h, n, width=4):
+    """
+    Extends a known common prefix of suffixes i and j, comparing blocks of doubling size.
+    :param buffer: Text as big-endian codes of width bytes (bytes, memoryview or mmap).
+    :param i: Start of the first suffix.
+    :param j: Start of the second suffix.
+    :param h: Length of the prefix already known to match.
+    :param n: Length of the text.
+    :param width: Number of bytes per character in the buffer.
+    :return: Length of the longest common prefix of the two suffixes.
+    """
+    limit = n - max(i, j)
+    step = 8
+    while h < limit:
+        k = min(step, limit - h)
+        a, b = width * (i + h), width * (j + h)
+        if buffer[a:a + width * k] == buffer[b:b + width * k]:
+            h += k
+            step *= 2
+            continue
+
+        # The mismatch lies within the next k characters: binary search for it
+        low, high = 0, k
+        while high - low > 1:
+            mid = (low + high) // 2
+            if buffer[a:a + width * mid] == buffer[b:b + width * mid]:
+                low = mid
+            else:
+                high = mid
+        return h + low
+    return limit
+
+
+def llcp_rlcp_arrays(lcp):
+    """
+    Precomputes the LLCP/RLCP arrays for the Manber-Myers search tree over [0, n - 1].
+    The search visits intervals (L, R) with midpoint M = (L + R) // 2 and recurses into (L, M)
+    or (M, R); LLCP[M] = lcp(sa[L], sa[M]) and RLCP[M] = lcp(sa[M], sa[R]). Every level of the
+    tree is computed at once with np.minimum.reduceat over the LCP array.
+    :param lcp: LCP array (lcp[i] = lcp(sa[i - 1], sa[i])).
+    :return: A tuple (llcp, rlcp) of numpy int32 arrays indexed by midpoint.
+
+    Time Complexity: O(n log n) vectorized work, where n is the length of the LCP array.
+    Space Complexity: O(n).
+    """
+    n = len(lcp)
+    llcp = np.zeros(n, dtype=np.int32)
+    rlcp = np.zeros(n, dtype=np.int32)
+    if n < 3:
+        return llcp, rlcp
+
+    padded = np.append(np.asarray(lcp, dtype=np.int32), 0)
+    left = np.array([0], dtype=np.int64)
+    right = np.array([n - 1], dtype=np.int64)
+    while left.size:
+        mid = (left + right) // 2
+        # Segments [L + 1, M] and [M + 1, R]; the third segment of each triple is ignored
+        bounds = np.stack([left + 1, mid + 1, right + 1], axis=1).ravel()
+        minima = np.minimum.reduceat(padded, bounds)
+        llcp[mid] = minima[0::3]
+        rlcp[mid] = minima[1::3]
+
+        # Children in left-to-right order keep the ignored segments short
+        left = np.stack([left, mid], axis=1).ravel()
+        right = np.stack([mid, right], axis=1).ravel()
+        keep = right - left > 1
+        left, right = left[keep], right[keep]
+
+    return llcp, rlcp
+
+
+def suffix_ranges_many(codes, sa, flat, starts, lengths, low=None, high=None, block=16, max_cells=1 << 20):
+    """
+    Vectorized binary search for the suffix array blocks of many patterns.
+    All patterns of a batch advance one binary-search step together. The text below every probe
+    is compared with the padded pattern rows block by block, and only rows that are still equal
+    read the next block, so long patterns cost little more than short ones.
+    :param codes: Numpy array of integer character codes of the text.
+    :param sa: Suffix array of codes.
+    :param flat: Numpy array with the codes of all patterns concatenated.
+    :param starts: Start of each pattern in flat.
+    :param lengths: Length of each pattern.
+    :param low: Optional start of the block each search is restricted to (default 0).
+    :param high: Optional end of the block each search is restricted to (default n).
+    :param block: Number of characters compared per step.
+    :param max_cells: Upper bound on the number of pattern cells in one batch.
+    :return: Numpy array of shape (k, 2) with the [left, right) block of each pattern.
+
+    Time Complexity: O(k m log n), vectorized, where k is the number of patterns and m the longest pattern length.
+    Space Complexity: O(k + max_cells).
+    """
+    n = len(sa)
+    k = len(lengths)
+    low = np.zeros(k, dtype=np.int64) if low is None else np.asarray(low, dtype=np.int64)
+    high = np.full(k, n, dtype=np.int64) if high is None else np.asarray(high, dtype=np.int64)
+    ranges = np.zeros((k, 2), dtype=np.int64)
+    if k == 0:
+        return ranges
+
+    order = np.argsort(lengths, kind="stable")
+    sa = sa.astype(np.int64)
+    steps = max(1, int(n).bit_length())
+    too_large = np.iinfo(np.int64).max
+
+    start = 0
+    while start < k:
+        # Patterns sorted by length: take as many as fit in the cell budget
+        stop = start + 1
+        while stop < k and (stop - start + 1) * (int(lengths[order[stop]]) + 1) <= max_cells:
+            stop += 1
+        batch = order[start:stop]
+        width = int(lengths[batch[-1]]) + 1
+        start = stop
+
+        # Pattern rows, padded past their end with -2 (below every text code, lower bound) or
+        # with a huge value (above every text code, upper bound); -1 marks the end of the text
+        columns = np.arange(width)
+        padding = columns[None, :] >= lengths[batch][:, None]
+        source = np.where(padding, 0, starts[batch][:, None] + columns[None, :])
+        lower = np.where(padding, -2, flat[source] if len(flat) else 0)
+        upper = np.where(padding, too_large, lower)
+
+        def smaller_than(rows, probes, pattern):
+            # Whether the suffix at each probe sorts before the pattern row
+            result = np.zeros(len(rows), dtype=bool)
+            pending = np.arange(len(rows))
+            column = 0
+            while pending.size:
+                span = columns[column:column + block]
+                index = sa[probes[pending]][:, None] + span[None, :]
+                window = codes[np.minimum(index, n - 1)].astype(np.int64)
+                window[index >= n] = -1
+                expected = pattern[rows[pending][:, None], span[None, :]]
+                differs = window != expected
+                found = differs.any(axis=1)
+                first = np.argmax(differs[found], axis=1)
+                hit = np.flatnonzero(found)
+                result[pending[found]] = window[hit, first] < expected[hit, first]
+                pending = pending[~found]
+                column += block
+            return result
+
+        def search(low, high, pattern):
+            for _ in range(steps):
+                rows = np.flatnonzero(low < high)
+                if not rows.size:
+                    break
+                mid = (low[rows] + high[rows]) // 2
+                smaller = smaller_than(rows, mid, pattern)
+                low[rows[smaller]] = mid[smaller] + 1
+                high[rows[~smaller]] = mid[~smaller]
+            return low
+
+        batch_high = high[batch]
+        left = search(low[batch].copy(), batch_high.copy(), lower)
+        right = search(left.copy(), batch_high.copy(), upper)
+        ranges[batch, 0] = left
+        ranges[batch, 1] = right
+
+    return ranges
+
+
+def lpf_array(sa, lcp):
+    """
+    Computes the Longest Previous Factor array and the matching previous positions.
+    The best earlier suffix for sa[k] is its previous or next smaller value in suffix order
+    (the nearest slot holding a smaller position), and the common prefix with it is the minimum
+    of the LCP values in between. Both are found for all slots at once by pointer jumping:
+    every slot follows the pointer of the slot it points to until that slot holds a smaller
+    position, carrying the running LCP minimum along.
+    :param sa: Suffix array.
+    :param lcp: LCP array, lcp[k] = lcp(sa[k - 1], sa[k]).
+    :return: A tuple (lpf, previous) of numpy int64 arrays indexed by text position.
+
+    Time Complexity: O(n) expected, in O(log n) vectorized rounds for typical texts.
+    Space Complexity: O(n).
+    """
+    n = len(sa)
+    lpf = np.zeros(n, dtype=np.int64)
+    previous = np.full(n, -1, dtype=np.int64)
+    if n < 2:
+        return lpf, previous
+
+    # Position -1 at both ends stops every pointer
+    dtype = np.int32 if n + 2 < 1 << 31 else np.int64
+    positions = np.full(n + 2, -1, dtype=dtype)
+    positions[1:-1] = sa
+    heights = np.zeros(n + 2, dtype=dtype)
+    heights[2:-1] = lcp[1:]
+
+    best_length = np.zeros(n + 2, dtype=dtype)
+    best_slot = np.zeros(n + 2, dtype=dtype)
+    slots = np.arange(1, n + 1, dtype=dtype)
+    for step in (-1, 1):
+        # pointer[k]: a slot with no smaller position strictly between it and k;
+        # reach[k]: minimum LCP over the slots between them, i.e. their common prefix length
+        pointer = np.arange(n + 2, dtype=dtype) + step
+        pointer[0], pointer[-1] = 0, n + 1
+        reach = heights.copy()
+        if step > 0:
+            reach[:-1] = heights[1:]
+
+        active = slots[positions[slots + step] > positions[slots]]
+        own = positions[active]
+        while active.size:
+            target = pointer[active]
+            reach[active] = np.minimum(reach[active], reach[target])
+            target = pointer[target]
+            pointer[active] = target
+            keep = positions[target] > own
+            active, own = active[keep], own[keep]
+
+        better = (positions[pointer[slots]] >= 0) & (reach[slots] > best_length[slots])
+        best_length[slots[better]] = reach[slots[better]]
+        best_slot[slots[better]] = pointer[slots[better]]
+
+    found = best_length[slots] > 0
+    lpf[sa[found]] = best_length[slots[found]]
+    previous[sa[found]] = positions[best_slot[slots[found]]]
+    return lpf, previous
+
+
+def find_longest_common_substring(str1, str2):
+    """
+    Finds the longest common substring between two strings using a generalized suffix array and LCP array.
+    The strings are separated by unique sentinels, so any character is allowed in them.
+    :param str1: First input string.
+    :param str2: Second input string.
+    :return: The longest common substring (string).
+
+    Time Complexity: O(n log n), where n is the combined length of the two strings.
+    Space Complexity: O(n), due to suffix array and LCP array storage.
+    """
+    from structures.generalized_suffix_array import longest_common_substring
 
-    return text[lcs_start:lcs_start + max_length]
+    return longest_common_substring([str1, str2])
 
 
 def lz_decompress(compressed_data):
@@ -334,9 +1618,9 @@ def main():
 
     print("\n=== Pattern Search ===")
     pattern = "ana"
-    results, exists = suffix_array_obj.pattern_search(pattern)
-    print(f"Pattern '{pattern}' exists: {exists}")
-    print("Matching suffixes:", results)
+    result = suffix_array_obj.pattern_search(pattern)
+    print(f"Pattern '{pattern}' exists: {result.exists}")
+    print("Matching positions:", result.sorted().tolist())
 
     print("\n=== Count Substring Occurrences ===")
     count = suffix_array_obj.count_substring_occurrences(pattern)
@@ -0,0 +1,265 @@
+from array import array
+
+ROOT = 0
+NO_NODE = -1
+OPEN = -1  # End of a leaf edge: the end of the text
+
+
+class SuffixTree:
+    def __init__(self):
+        """
+        Generalized suffix tree of the reversed words, a path-compressed PrefixTrie with the same
+        queries. The reversed words are stored one after the other in a single text, each
+        followed by its own separator (a negative code, so no pattern can match it). Edges are
+        labelled by text offsets instead of characters:
+        - starts[v], ends[v]: the label of the edge into node v is text[starts[v]:ends[v]];
+          leaf edges are open (ends[v] == OPEN) and run to the end of the text.
+        - depths[v]: string depth of an internal node (length of its path label).
+        - links[v]: suffix link of an internal node (its path label without the first character).
+        - children[v]: dictionary of first edge character code -> child node.
+        Every suffix of a word ends with a unique separator, so the tree has one leaf per suffix
+        and at most as many internal nodes: O(N) nodes for a total length N, against O(N^2) for
+        the trie. A leaf edge may continue past its separator into the following words; since
+        nothing matches a separator, the label is read as ending there.
+        """
+        self.text = array("i")
+        self.starts = array("i", [0])
+        self.ends = array("i", [0])
+        self.depths = array("i", [0])
+        self.links = array("i", [ROOT])
+        self.children = [{}]
+        self.word_indices = []
+        self.root = ROOT
+        self._counts = None
+
+        # Ukkonen's active point and number of suffixes still to insert
+        self.active_node = ROOT
+        self.active_edge = 0
+        self.active_length = 0
+        self.remainder = 0
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add_node(self, start, end, depth):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.depths.append(depth)
+        self.links.append(ROOT)
+        self.children.append({})
+        return len(self.starts) - 1
+
+    def edge_length(self, node):
+        end = self.ends[node]
+        return (len(self.text) if end == OPEN else end) - self.starts[node]
+
+    def insert(self, word, index=None):
+        """
+        Reverses the word and adds all its suffixes with Ukkonen's algorithm: the characters are
+        appended to the text one at a time, and each one extends all the suffixes still pending
+        (implicit in the tree) from the active point, creating leaves and splitting edges and
+        following suffix links from one extension to the next.
+        :param word: The word to insert (string).
+        :param index: Optional, index of the word occurrence (int), kept in word_indices.
+        :return: None
+
+        Time Complexity: O(n), amortized, where n is the length of the word.
+        Space Complexity: O(n), for at most 2n + 2 new nodes.
+        """
+        reversed_word = word[::-1]
+        separator = -1 - len(self.word_indices)
+        self.word_indices.append(index)
+        for code in map(ord, reversed_word):
+            self.extend(code)
+        self.extend(separator)
+        self._counts = None
+        print(f"Inserted all suffixes (inverted): '{word}'")
+
+    def extend(self, code):
+        """
+        One phase of Ukkonen's algorithm: appends a character to the text.
+        :param code: Character code, or a separator.
+        :return: None
+        """
+        text, starts, children = self.text, self.starts, self.children
+        position = len(text)
+        text.append(code)
+        self.remainder += 1
+        last_new = NO_NODE
+        while self.remainder > 0:
+            if self.active_length == 0:
+                self.active_edge = position
+            node = self.active_node
+            edge_code = text[self.active_edge]
+            child = children[node].get(edge_code, NO_NODE)
+            if child == NO_NODE:
+                children[node][edge_code] = self.add_node(position, OPEN, 0)
+                if last_new != NO_NODE:
+                    self.links[last_new] = node
+                    last_new = NO_NODE
+            else:
+                length = self.edge_length(child)
+                if self.active_length >= length:
+                    # Walk down to the next node (skip/count)
+                    self.active_edge += length
+                    self.active_length -= length
+                    self.active_node = child
+                    continue
+                if text[starts[child] + self.active_length] == code:
+                    # Already in the tree: the remaining suffixes stay implicit until the next phase
+                    if last_new != NO_NODE and node != ROOT:
+                        self.links[last_new] = node
+                    self.active_length += 1
+                    break
+                split = self.add_node(starts[child], starts[child] + self.active_length,
+                                      self.depths[node] + self.active_length)
+                children[node][edge_code] = split
+                children[split][code] = self.add_node(position, OPEN, 0)
+                starts[child] += self.active_length
+                children[split][text[starts[child]]] = child
+                if last_new != NO_NODE:
+                    self.links[last_new] = split
+                last_new = split
+            self.remainder -= 1
+            if self.active_node == ROOT and self.active_length > 0:
+                self.active_length -= 1
+                self.active_edge = position - self.remainder + 1
+            elif self.active_node != ROOT:
+                self.active_node = self.links[self.active_node]
+
+    def locate(self, pattern):
+        """
+        Walks the reversed pattern down from the root.
+        :param pattern: Pattern (string).
+        :return: The node at or just below the end of the path, or NO_NODE if the pattern is absent.
+
+        Time Complexity: O(m), where m is the length of the pattern.
+        """
+        codes = array("i", map(ord, pattern[::-1]))
+        text, starts, children = self.text, self.starts, self.children
+        node, matched, m = ROOT, 0, len(codes)
+        while matched < m:
+            node = children[node].get(codes[matched], NO_NODE)
+            if node == NO_NODE:
+                return NO_NODE
+            length = min(self.edge_length(node), m - matched)
+            if text[starts[node]:starts[node] + length] != codes[matched:matched + length]:
+                return NO_NODE
+            matched += length
+        return node
+
+    def find_pattern(self, pattern):
+        """
+        Checks if a pattern exists as a substring of an inserted word: the substrings are the
+        prefixes of the suffixes, so the reversed pattern is one path from the root.
+        :param pattern: Pattern to check (string).
+        :return: True if pattern exists, False otherwise.
+
+        Time Complexity: O(m), where m is the length of the pattern.
+        Space Complexity: O(m).
+        """
+        if self.locate(pattern) != NO_NODE:
+            print(f"Pattern '{pattern}' exists as a substring.")
+            return True
+        else:
+            print(f"Pattern '{pattern}' does not exist as a substring.")
+            return False
+
+    def find_longest_common_substring(self, word):
+        """
+        Finds the longest common substring between the tree and the given word.
+        Computes the matching statistics of the reversed word: the longest prefix of each of its
+        suffixes found in the tree. After each one, the match is moved to the next suffix
+        through the suffix link of the last node and the rest of the edge is re-walked by
+        lengths only, as in Ukkonen's algorithm.
+        :param word: Word to compare with the tree (string).
+        :return: Longest common substring (string); on ties, the one ending last in the word,
+            as PrefixTrie.find_longest_common_substring.
+
+        Time Complexity: O(m), amortized, where m is the length of the word.
+        Space Complexity: O(m).
+        """
+        codes = array("i", map(ord, word[::-1]))
+        text, starts, ends, depths, children = self.text, self.starts, self.ends, self.depths, self.children
+        m = len(codes)
+        best_start, best_length = 0, 0
+        # The match of suffix i is the path to node, then matched - depths[node] characters further
+        node, matched = ROOT, 0
+        for i in range(m):
+            while i + matched < m:
+                code = codes[i + matched]
+                offset = matched - depths[node]
+                if offset == 0:
+                    child = children[node].get(code, NO_NODE)
+                    if child == NO_NODE:
+                        break
+                else:
+                    child = children[node][codes[i + depths[node]]]
+                    if text[starts[child] + offset] != code:
+                        break
+                matched += 1
+                if ends[child] != OPEN and depths[child] == matched:
+                    node = child
+            if matched > best_length:
+                best_start, best_length = i, matched
+            if matched == 0:
+                continue
+
+            matched -= 1
+            node = self.links[node]
+            # The depths of internal nodes are exact, so the edges are skipped by their lengths
+            while matched > depths[node]:
+                child = children[node][codes[i + 1 + depths[node]]]
+                if ends[child] == OPEN or depths[child] > matched:
+                    break
+                node = child
+
+        return word[::-1][best_start:best_start + best_length][::-1]
+
+    def end_counts(self):
+        """
+        Number of distinct suffixes of the reversed words below every node (the end nodes below
+        the same point in PrefixTrie). A suffix ends at an internal node when one of the node's
+        leaves starts with a separator, otherwise inside its leaf edge, before the separator.
+        :return: List of counts, by node.
+
+        Time Complexity: O(N), computed once after the last insert.
+        Space Complexity: O(N).
+        """
+        if self._counts is not None:
+            return self._counts
+        text, starts, ends, children = self.text, self.starts, self.ends, self.children
+        counts = [0] * len(self)
+        order = []
+        stack = [ROOT]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(children[node].values())
+        for node in reversed(order):
+            if ends[node] == OPEN:
+                counts[node] = int(text[starts[node]] >= 0)
+                continue
+            total = 0
+            ends_here = False
+            for child in children[node].values():
+                total += counts[child]
+                ends_here = ends_here or (ends[child] == OPEN and text[starts[child]] < 0)
+            counts[node] = total + (ends_here and node != ROOT)
+        self._counts = counts
+        return counts
+
+    def count_substring_occurrences(self, pattern):
+        """
+        Counts the occurrences of a pattern as PrefixTrie does: the distinct suffixes of the
+        reversed words that start with the reversed pattern.
+        :param pattern: Pattern to count (string).
+        :return: Number of occurrences (int).
+
+        Time Complexity: O(m) after the counts are computed, where m is the length of the pattern.
+        Space Complexity: O(m).
+        """
+        node = self.locate(pattern)
+        if node == NO_NODE:
+            return 0
+        return self.end_counts()[node]
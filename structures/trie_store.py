@@ -0,0 +1,574 @@
+from array import array
+from itertools import chain
+from types import MappingProxyType
+
+import numpy as np
+
+from structures.repeats import nearest_smaller
+from structures.rmq import RangeMinimumQuery
+from structures.suffix_array import encode_text, suffix_array_doubling, lcp_array_phi
+
+ROOT = 0
+NO_NODE = -1
+
+
+class NodeStore:
+    """
+    Node storage of a PrefixTrie. Nodes are integer ids, the root is ROOT, and every node has:
+    - children: one child per character, looked up with child(node, char);
+    - an end flag, set on the last node of every inserted suffix;
+    - a list of word indices, appended to by insert(word, index);
+    - an integer depth field (used by lz_compress as the dictionary index);
+    - counters of the subtree: end nodes (end_count), inserted suffixes passing through the
+      node (occurrence_count) and distinct words having one of them (word_count).
+    """
+
+    root = ROOT
+
+    def insert_suffixes(self, word, index=None, word_id=None):
+        """
+        Inserts every suffix of a word, one character node at a time.
+        :param word: The word (string), already reversed by PrefixTrie.insert.
+        :param index: Optional index appended to every node on the path of every suffix.
+        :param word_id: Number of the word, to update the counters along every path; if None,
+            the counters are left to aggregate_counts.
+        :return: List of the end nodes, one per suffix.
+
+        Time Complexity: O(n^2), where n is the length of the word.
+        Space Complexity: O(n^2), for the new nodes.
+        """
+        counting = word_id is not None
+        ends = []
+        for i in range(len(word)):
+            node = ROOT
+            path = [ROOT]
+            for char in word[i:]:
+                child = self.child(node, char)
+                node = self.add_child(node, char) if child == NO_NODE else child
+                if counting:
+                    path.append(node)
+                if index is not None:
+                    self.add_index(node, index)
+            if counting:
+                self.count_suffix(path, word_id, not self.is_end(node))
+            self.set_end(node)
+            ends.append(node)
+        return ends
+
+    def preorder(self):
+        """
+        Lists the nodes in preorder, with the explicit-stack dfs of trie_traversal.
+        :return: A tuple (order, depths) of numpy int64 arrays: the nodes in preorder and their depths.
+
+        Time Complexity: O(N), where N is the number of nodes.
+        Space Complexity: O(N).
+        """
+        from structures.trie_traversal import dfs
+
+        pairs = np.fromiter(chain.from_iterable(dfs(self)), dtype=np.int64, count=2 * len(self))
+        return pairs[0::2], pairs[1::2]
+
+    def copy_to(self, store):
+        """
+        Copies every node into an empty store of another kind, e.g. a trie built with the
+        dictionary lookups of DictNodeStore, then kept in the flat arrays of ArrayNodeStore.
+        The nodes are copied level by level with the bfs of trie_traversal, so the parent of
+        every node is already in the new store; the new ids are the level order.
+        :param store: Empty NodeStore.
+        :return: The store, holding the same trie.
+
+        Time Complexity: O(N + I), where N is the number of nodes and I the number of stored indices.
+        Space Complexity: O(N).
+        """
+        from structures.trie_traversal import bfs
+
+        ids = [NO_NODE] * len(self)
+        ids[self.root] = store.root
+        counts = np.zeros((3, len(self)), dtype=np.int64)
+        for node, _ in bfs(self):
+            copy = ids[node]
+            for char, child in self.children(node):
+                ids[child] = store.add_child(copy, char)
+            if self.is_end(node):
+                store.set_end(copy)
+            for index in self.indices(node):
+                store.add_index(copy, index)
+            store.set_depth(copy, self.depth(node))
+            counts[:, copy] = self.end_count(node), self.occurrence_count(node), self.word_count(node)
+        store.add_counts(*counts)
+        return store
+
+
+class TrieNode:
+    def __init__(self):
+        self.children = {}      # Child node ids (dictionary of characters)
+        self.is_end = False     # Marks the end of a word
+        self.indices = []       # Store the indices of word occurrences
+        self.depth = 0          # Depth of the node (length of the substring it represents)
+        self.end_count = 0      # End nodes in the subtree
+        self.occurrences = 0    # Inserted suffixes passing through the node
+        self.word_count = 0     # Distinct words among them
+        self.last_word = -1     # Last word counted in word_count
+
+
+class NodeView:
+    def __init__(self, store, node):
+        """
+        Read-only view of a node of a store with the attributes of a TrieNode, so that code
+        walking PrefixTrie.root through .children keeps working with any store.
+        The children mapping is built on first access and kept; it is a read-only mapping, so
+        adding a child through it raises TypeError instead of being lost (the trie is changed
+        through the store: add_child, set_end, ...).
+        :param store: NodeStore.
+        :param node: Node id.
+        """
+        self.store = store
+        self.node = node
+        self._children = None
+
+    @property
+    def children(self):
+        if self._children is None:
+            self._children = MappingProxyType({char: NodeView(self.store, child)
+                                               for char, child in self.store.children(self.node)})
+        return self._children
+
+    @property
+    def is_end(self):
+        return self.store.is_end(self.node)
+
+    @property
+    def indices(self):
+        return self.store.indices(self.node)
+
+    @property
+    def depth(self):
+        return self.store.depth(self.node)
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.store is self.store and other.node == self.node
+
+    def __hash__(self):
+        return hash((id(self.store), self.node))
+
+    def __repr__(self):
+        return f"NodeView(node={self.node})"
+
+
+class DictNodeStore(NodeStore):
+    def __init__(self):
+        """
+        One TrieNode object per node, with a dictionary of children.
+        Node ids index the nodes list.
+        """
+        self.nodes = [TrieNode()]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def child(self, node, char):
+        return self.nodes[node].children.get(char, NO_NODE)
+
+    def add_child(self, node, char):
+        self.nodes.append(TrieNode())
+        self.nodes[node].children[char] = len(self.nodes) - 1
+        return len(self.nodes) - 1
+
+    def children(self, node):
+        return self.nodes[node].children.items()
+
+    def is_end(self, node):
+        return self.nodes[node].is_end
+
+    def set_end(self, node):
+        self.nodes[node].is_end = True
+
+    def indices(self, node):
+        return self.nodes[node].indices
+
+    def add_index(self, node, index):
+        self.nodes[node].indices.append(index)
+
+    def depth(self, node):
+        return self.nodes[node].depth
+
+    def set_depth(self, node, depth):
+        self.nodes[node].depth = depth
+
+    def end_count(self, node):
+        return self.nodes[node].end_count
+
+    def occurrence_count(self, node):
+        return self.nodes[node].occurrences
+
+    def word_count(self, node):
+        return self.nodes[node].word_count
+
+    def count_suffix(self, path, word_id, new_end):
+        for node in map(self.nodes.__getitem__, path):
+            node.occurrences += 1
+            if node.last_word != word_id:
+                node.last_word = word_id
+                node.word_count += 1
+            if new_end:
+                node.end_count += 1
+
+    def end_flags(self):
+        """
+        :return: Numpy bool array, the end flag of every node.
+        """
+        return np.fromiter((trie_node.is_end for trie_node in self.nodes), dtype=bool, count=len(self.nodes))
+
+    def add_counts(self, end_counts, occurrences, word_counts):
+        for node, ends, occurrence, words in zip(self.nodes, end_counts.tolist(), occurrences.tolist(),
+                                                 word_counts.tolist()):
+            node.end_count = ends
+            node.occurrences += occurrence
+            node.word_count += words
+
+
+class ArrayNodeStore(NodeStore):
+    def __init__(self):
+        """
+        Struct-of-arrays node pool: every field is a flat array indexed by node id.
+        - chars: code point of the edge into the node (array 'I').
+        - first_child, next_sibling: child lists as first-child / next-sibling links (array 'i').
+        - depth: the depth field (array 'i').
+        - end_counts, occurrences, word_counts, last_words: the counters (arrays 'i').
+        - ends: end flags packed eight per byte.
+        - index_lists: word indices, only for the nodes that have any.
+        A node takes 32 bytes and one bit (nbytes) instead of several hundred for a TrieNode with its
+        dictionaries and lists. Child lookup follows the sibling links, O(|Σ|) per step.
+        """
+        self.chars = array("I", [0])
+        self.first_child = array("i", [NO_NODE])
+        self.next_sibling = array("i", [NO_NODE])
+        self.depths = array("i", [0])
+        self.end_counts = array("i", [0])
+        self.occurrences = array("i", [0])
+        self.word_counts = array("i", [0])
+        self.last_words = array("i", [-1])
+        self.ends = bytearray(1)
+        self.index_lists = {}
+
+    def __len__(self):
+        return len(self.chars)
+
+    @property
+    def nbytes(self):
+        arrays = (self.chars, self.first_child, self.next_sibling, self.depths, self.end_counts,
+                  self.occurrences, self.word_counts, self.last_words)
+        return sum(len(a) * a.itemsize for a in arrays) + len(self.ends)
+
+    def child(self, node, char):
+        code = ord(char)
+        child = self.first_child[node]
+        while child != NO_NODE and self.chars[child] != code:
+            child = self.next_sibling[child]
+        return child
+
+    def add_child(self, node, char):
+        child = len(self.chars)
+        self.chars.append(ord(char))
+        self.first_child.append(NO_NODE)
+        # New children are linked in front of their siblings
+        self.next_sibling.append(self.first_child[node])
+        self.first_child[node] = child
+        self.depths.append(0)
+        self.end_counts.append(0)
+        self.occurrences.append(0)
+        self.word_counts.append(0)
+        self.last_words.append(-1)
+        if child >> 3 == len(self.ends):
+            self.ends.append(0)
+        return child
+
+    def children(self, node):
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield chr(self.chars[child]), child
+            child = self.next_sibling[child]
+
+    def is_end(self, node):
+        return bool(self.ends[node >> 3] >> (node & 7) & 1)
+
+    def set_end(self, node):
+        self.ends[node >> 3] |= 1 << (node & 7)
+
+    def indices(self, node):
+        return self.index_lists.get(node, [])
+
+    def add_index(self, node, index):
+        self.index_lists.setdefault(node, []).append(index)
+
+    def depth(self, node):
+        return self.depths[node]
+
+    def set_depth(self, node, depth):
+        self.depths[node] = depth
+
+    def end_count(self, node):
+        return self.end_counts[node]
+
+    def occurrence_count(self, node):
+        return self.occurrences[node]
+
+    def word_count(self, node):
+        return self.word_counts[node]
+
+    def count_suffix(self, path, word_id, new_end):
+        occurrences, word_counts, last_words, end_counts = \
+            self.occurrences, self.word_counts, self.last_words, self.end_counts
+        for node in path:
+            occurrences[node] += 1
+            if last_words[node] != word_id:
+                last_words[node] = word_id
+                word_counts[node] += 1
+            if new_end:
+                end_counts[node] += 1
+
+    def end_flags(self):
+        """
+        :return: Numpy bool array, the end flag of every node.
+        """
+        return np.unpackbits(np.frombuffer(bytes(self.ends), dtype=np.uint8), bitorder="little")[:len(self)].astype(bool)
+
+    def parents(self):
+        """
+        :return: Numpy int64 array, the parent of every node (NO_NODE for the root). A first child
+            gets its parent directly; its next siblings get it from the previous sibling, by
+            pointer jumping along the sibling lists.
+        """
+        n = len(self)
+        first_child = np.frombuffer(self.first_child, dtype=np.int32).astype(np.int64)
+        next_sibling = np.frombuffer(self.next_sibling, dtype=np.int32).astype(np.int64)
+        parents = np.full(n, NO_NODE, dtype=np.int64)
+        heads = np.flatnonzero(first_child != NO_NODE)
+        parents[first_child[heads]] = heads
+        previous = np.full(n, NO_NODE, dtype=np.int64)
+        linked = np.flatnonzero(next_sibling != NO_NODE)
+        previous[next_sibling[linked]] = linked
+
+        active = np.flatnonzero(previous != NO_NODE)
+        while active.size:
+            target = previous[active]
+            parents[active] = parents[target]
+            previous[active] = previous[target]
+            active = active[parents[active] == NO_NODE]
+        return parents
+
+    def preorder(self):
+        """
+        Same as NodeStore.preorder, vectorized: depths and preorder positions are computed from
+        the parent array (see node_depths and preorder_positions) instead of by visiting the
+        nodes one at a time, which costs more here, where children are followed through the
+        sibling links.
+        :return: A tuple (order, depths) of numpy int64 arrays: the nodes in preorder and their depths.
+
+        Time Complexity: O(N log N), vectorized, where N is the number of nodes.
+        Space Complexity: O(N).
+        """
+        parents = self.parents()
+        depths = node_depths(parents)
+        order = np.empty(len(parents), dtype=np.int64)
+        order[preorder_positions(parents, depths)] = np.arange(len(parents))
+        return order, depths[order]
+
+    def add_counts(self, end_counts, occurrences, word_counts):
+        self.end_counts = array("i", end_counts.astype(np.int32).tobytes())
+        occurrences = np.frombuffer(self.occurrences, dtype=np.int32) + occurrences
+        self.occurrences = array("i", occurrences.astype(np.int32).tobytes())
+        word_counts = np.frombuffer(self.word_counts, dtype=np.int32) + word_counts
+        self.word_counts = array("i", word_counts.astype(np.int32).tobytes())
+
+    def insert_suffixes(self, word, index=None, word_id=None):
+        """
+        Inserts every suffix of a word. Into an empty store (and without indices), all nodes
+        are created at once from the suffix array of the word instead of one by one:
+        - In suffix order, suffix sa[r] creates the nodes of depths lcp[r] + 1 .. n - sa[r];
+          the nodes before are shared with the previous suffix. Numbering the nodes in that
+          order lists them in depth-first order.
+        - The first new node of suffix r hangs below depth lcp[r] of the path of the suffix q
+          before r with lcp[q] < lcp[r] (the previous smaller value), which created that node.
+        - Children of a node are consecutive in id order, which gives the sibling links.
+        - The suffixes of one word are distinct, so the end and occurrence counts of a node are
+          both the number of end nodes in its subtree (see aggregate_counts).
+        Otherwise, suffixes are inserted one character at a time.
+        :param word: The word (string), already reversed by PrefixTrie.insert.
+        :param index: Optional index appended to every node on the path of every suffix.
+        :param word_id: Number of the word, to update the counters; if None, they are left to aggregate_counts.
+        :return: List of the end nodes, one per suffix.
+
+        Time Complexity: O(n log^2 n + N) vectorized into an empty store, where N is the number
+            of nodes created, O(n^2 |Σ|) otherwise.
+        Space Complexity: O(N).
+        """
+        if len(self) > 1 or index is not None or not isinstance(word, str) or not word:
+            return super().insert_suffixes(word, index, word_id)
+
+        codes = encode_text(word).astype(np.int64)
+        n = len(codes)
+        sa = suffix_array_doubling(codes).astype(np.int64)
+        lcp = lcp_array_phi(codes, sa).astype(np.int64)
+        created = n - sa - lcp
+        base = np.cumsum(created) - created + 1  # Id of the first node of every suffix
+        total = int(created.sum())
+
+        rank = np.repeat(np.arange(n), created)
+        node = np.arange(1, total + 1)
+        depth = lcp[rank] + 1 + node - base[rank]
+        chars = codes[sa[rank] + depth - 1]
+
+        parent = node - 1
+        first = base
+        previous = nearest_smaller(lcp, -1)
+        shared = lcp > 0
+        parent[first - 1] = ROOT
+        q = previous[shared]
+        parent[first[shared] - 1] = base[q] + lcp[shared] - lcp[q] - 1
+
+        first_child = np.full(total + 1, NO_NODE, dtype=np.int32)
+        next_sibling = np.full(total + 1, NO_NODE, dtype=np.int32)
+        order = np.argsort(parent, kind="stable")
+        siblings, children = parent[order], node[order]
+        same = siblings[1:] == siblings[:-1]
+        next_sibling[children[:-1][same]] = children[1:][same]
+        heads = np.concatenate(([True], ~same))
+        first_child[siblings[heads]] = children[heads]
+
+        ends = np.zeros(total + 1, dtype=bool)
+        ends[base + created - 1] = True
+        depths = np.concatenate(([0], depth))
+
+        self.chars = array("I", np.concatenate(([0], chars)).astype(np.uint32).tobytes())
+        self.first_child = array("i", first_child.tobytes())
+        self.next_sibling = array("i", next_sibling.tobytes())
+        self.depths = array("i", bytes(4 * (total + 1)))
+        self.ends = bytearray(np.packbits(ends, bitorder="little").tobytes())
+        self.end_counts = array("i", bytes(4 * (total + 1)))
+        self.occurrences = array("i", bytes(4 * (total + 1)))
+        self.word_counts = array("i", bytes(4 * (total + 1)))
+        self.last_words = array("i", np.full(total + 1, -1, dtype=np.int32).tobytes())
+        if word_id is not None:
+            end_counts = subtree_sums(ends, nearest_smaller(depths, 1, strict=False))
+            self.add_counts(end_counts, end_counts, np.ones(total + 1, dtype=np.int64))
+            self.last_words = array("i", np.full(total + 1, word_id, dtype=np.int32).tobytes())
+        return (base + created - 1)[np.argsort(sa)].tolist()
+
+
+def subtree_sums(values, stops):
+    """
+    Sums values over every subtree of a tree whose nodes are numbered in preorder: the subtree
+    of node p is the range [p, q), where q is the next node with a smaller or equal depth
+    (p plus the subtree size).
+    :param values: Numpy array, value of every node, by preorder position.
+    :param stops: Numpy array, end q of the subtree of every node, by preorder position.
+    :return: Numpy int64 array of subtree sums, by preorder position.
+
+    Time Complexity: O(N), where N is the number of nodes.
+    Space Complexity: O(N).
+    """
+    totals = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(values, out=totals[1:])
+    return totals[stops] - totals[:-1]
+
+
+def node_depths(parents):
+    """
+    Depth of every node of a tree given by parent pointers, by pointer jumping: every node adds
+    the distance its pointer covers and moves the pointer to the pointer's own target.
+    :param parents: Numpy int64 array, parent of every node, NO_NODE for the root.
+    :return: Numpy int64 array of depths.
+
+    Time Complexity: O(N log D), in O(log D) vectorized rounds, where D is the height of the tree.
+    Space Complexity: O(N).
+    """
+    depths = (parents != NO_NODE).astype(np.int64)
+    jump = np.where(parents == NO_NODE, ROOT, parents)
+    while (jump != ROOT).any():
+        depths = depths + depths[jump]
+        jump = jump[jump]
+    return depths
+
+
+def preorder_positions(parents, depths):
+    """
+    Position of every node in a preorder of the tree, computed level by level: subtree sizes
+    bottom-up, then each node starts right after its parent and the subtrees of its previous
+    siblings.
+    :param parents: Numpy int64 array, parent of every node, NO_NODE for the root.
+    :param depths: Numpy int64 array of depths.
+    :return: Numpy int64 array, the preorder position of every node.
+
+    Time Complexity: O(N log N) for sorting the nodes by level, then O(N) in O(D) vectorized steps.
+    Space Complexity: O(N).
+    """
+    n = len(parents)
+    by_level = np.lexsort((parents, depths))
+    height = int(depths.max(initial=0))
+    bounds = np.searchsorted(depths[by_level], np.arange(height + 2))
+    levels = [by_level[bounds[d]:bounds[d + 1]] for d in range(height + 1)]
+    # Nodes of a level are grouped by parent
+    firsts = [np.flatnonzero(np.r_[True, parents[nodes][1:] != parents[nodes][:-1]]) for nodes in levels]
+
+    sizes = np.ones(n, dtype=np.int64)
+    for nodes, first in zip(levels[:0:-1], firsts[:0:-1]):
+        sizes[parents[nodes[first]]] += np.add.reduceat(sizes[nodes], first)
+
+    positions = np.zeros(n, dtype=np.int64)
+    for nodes, first in zip(levels[1:], firsts[1:]):
+        before = np.cumsum(sizes[nodes]) - sizes[nodes]
+        group = np.repeat(before[first], np.diff(np.r_[first, len(nodes)]))
+        positions[nodes] = positions[parents[nodes]] + 1 + before - group
+    return positions
+
+
+def aggregate_counts(store, ends_by_word):
+    """
+    Brings the counters of a store up to date after words were inserted without them
+    (insert_suffixes with word_id None), in one pass over the trie instead of one update per
+    character of every suffix:
+    - The nodes are put in preorder (NodeStore.preorder), so subtrees are ranges (see
+      subtree_sums) and the parent of a node is the previous one with a smaller depth.
+    - end counts: subtree sums of the end flags (recomputed for the whole trie).
+    - occurrences: subtree sums of the number of new suffixes ending at every node.
+    - word counts: every new word adds 1 at each of its end nodes and -1 at the lowest common
+      ancestor of every two of them consecutive in preorder, so a subtree sum counts each word
+      once. The lowest common ancestor of positions p < q is the parent of the shallowest node
+      in (p, q], found with a range minimum query.
+    :param store: NodeStore.
+    :param ends_by_word: List of the end nodes of every new word, as returned by insert_suffixes.
+    :return: None
+
+    Time Complexity: O(N log N + S log S), vectorized, where N is the number of nodes and S the
+        number of new suffixes.
+    Space Complexity: O(N + S).
+    """
+    order, depths = store.preorder()
+    n = len(order)
+    ends = store.end_flags()[order]
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(n)
+    stops = nearest_smaller(depths, 1, strict=False)
+    parent_positions = nearest_smaller(depths, -1)[1:]
+
+    counts = [len(ends_of_word) for ends_of_word in ends_by_word]
+    suffixes = position[np.fromiter((node for ends_of_word in ends_by_word for node in ends_of_word),
+                                    dtype=np.int64, count=sum(counts))]
+    owners = np.repeat(np.arange(len(counts)), counts)
+    marks = np.bincount(suffixes, minlength=n)
+    occurrences = subtree_sums(marks, stops)
+
+    sort = np.lexsort((suffixes, owners))
+    suffixes, owners = suffixes[sort], owners[sort]
+    same = owners[1:] == owners[:-1]
+    if same.any():
+        keys = RangeMinimumQuery(depths * n + np.arange(n))
+        shallowest = keys.query_many(suffixes[:-1][same] + 1, suffixes[1:][same] + 1) % n
+        # The root is at position 0 and never the shallowest node of a range
+        marks = marks - np.bincount(parent_positions[shallowest - 1], minlength=n)
+    word_counts = subtree_sums(marks, stops)
+
+    by_node = np.empty((3, n), dtype=np.int64)
+    by_node[:, order] = subtree_sums(ends, stops), occurrences, word_counts
+    store.add_counts(*by_node)
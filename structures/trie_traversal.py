@@ -0,0 +1,92 @@
+from collections import deque
+
+from structures.trie_store import ROOT, NO_NODE
+
+
+def walk(store, chars, node=ROOT):
+    """
+    Follows a sequence of characters down from a node, one child lookup per character.
+    :param store: NodeStore of the trie.
+    :param chars: Iterable of characters (e.g. a string).
+    :param node: Starting node.
+    :return: Generator of the nodes reached, one per character; it stops at the first character
+        without a child.
+
+    Time Complexity: O(m), where m is the number of characters.
+    Space Complexity: O(1).
+    """
+    for char in chars:
+        node = store.child(node, char)
+        if node == NO_NODE:
+            return
+        yield node
+
+
+def follow(store, chars, node=ROOT):
+    """
+    Finds the node at the end of a sequence of characters.
+    :param store: NodeStore of the trie.
+    :param chars: Iterable of characters (e.g. a string).
+    :param node: Starting node.
+    :return: The node, or NO_NODE if some character has no child.
+
+    Time Complexity: O(m), where m is the number of characters.
+    Space Complexity: O(1).
+    """
+    for char in chars:
+        node = store.child(node, char)
+        if node == NO_NODE:
+            break
+    return node
+
+
+def match_length(store, chars, node=ROOT):
+    """
+    Length of the longest prefix of a sequence of characters that is a path from a node.
+    :param store: NodeStore of the trie.
+    :param chars: Iterable of characters (e.g. a string).
+    :param node: Starting node.
+    :return: Number of characters matched (integer).
+
+    Time Complexity: O(m), where m is the number of characters.
+    Space Complexity: O(1).
+    """
+    length = 0
+    for _ in walk(store, chars, node):
+        length += 1
+    return length
+
+
+def dfs(store, node=ROOT):
+    """
+    Depth-first (pre-order) traversal with an explicit stack instead of recursion, so the stack
+    of the interpreter stays constant whatever the depth of the trie.
+    :param store: NodeStore of the trie.
+    :param node: Root of the traversed subtree.
+    :return: Generator of tuples (node, depth), depth relative to the starting node.
+
+    Time Complexity: O(N), where N is the number of nodes of the subtree.
+    Space Complexity: O(N) in the worst case, for the pending children.
+    """
+    stack = [(node, 0)]
+    while stack:
+        node, depth = stack.pop()
+        yield node, depth
+        stack.extend((child, depth + 1) for _, child in store.children(node))
+
+
+def bfs(store, node=ROOT):
+    """
+    Breadth-first (level-order) traversal with a queue.
+    :param store: NodeStore of the trie.
+    :param node: Root of the traversed subtree.
+    :return: Generator of tuples (node, depth), by increasing depth relative to the starting node.
+
+    Time Complexity: O(N), where N is the number of nodes of the subtree.
+    Space Complexity: O(W), where W is the largest number of nodes on one level.
+    """
+    queue = deque([(node, 0)])
+    while queue:
+        node, depth = queue.popleft()
+        yield node, depth
+        queue.extend((child, depth + 1) for _, child in store.children(node))